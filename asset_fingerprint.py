@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Asset fingerprinting build stage for client extensions
+Renames every asset a client-extension.yaml points at (global.css,
+global.js, ...) to a content-hashed name such as global.3f9a1c0b2e.css,
+rewrites the url: entries to match and adds .gz and .br sidecars at maximum
+compression. A changed asset gets a new URL, so the assets can be served
+with immutable cache headers, and a server with precompressed-file support
+never compresses them per request.
+
+The YAML is rewritten line by line, keeping its comments and layout. Brotli
+sidecars need the brotli package and are skipped with a warning otherwise.
+"""
+
+import os
+import re
+import gzip
+
+from build_manifest import hash_file
+from build_stages import BuildStage
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CONFIG_NAME = 'client-extension.yaml'
+
+HASH_LENGTH = 10
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# Assets worth precompressing; images and fonts are already compressed
+SIDECAR_EXTENSIONS = ('.css', '.js', '.mjs', '.json', '.svg', '.html', '.map')
+
+# Content encoding -> sidecar suffix
+SIDECAR_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+_URL_LINE = re.compile(r'^(?P<key>\s*url:\s*)(?P<quote>[\'"]?)(?P<url>[^\'"\s#]+)(?P=quote)(?P<rest>\s*(?:#.*)?)$')
+_FINGERPRINTED = re.compile(r'\.[0-9a-f]{%d}\.[A-Za-z0-9]+$' % HASH_LENGTH)
+
+
+def is_fingerprinted(name):
+    """True for names produced by this stage (name.<hash>.ext), which never change content"""
+    return _FINGERPRINTED.search(name) is not None
+
+
+def fingerprinted_name(url, digest, length=HASH_LENGTH):
+    """global.css -> global.<first length hex digits of digest>.css"""
+    root, ext = os.path.splitext(url)
+    return f"{root}.{digest[:length]}{ext}"
+
+
+def extension_urls(text):
+    """Relative url: values in client-extension.yaml text"""
+    urls = []
+    for line in text.splitlines():
+        match = _URL_LINE.match(line)
+        if match and '://' not in match.group('url') and not match.group('url').startswith('/'):
+            urls.append(match.group('url'))
+    return urls
+
+
+def assemble_sources(text):
+    """Directories the assemble block copies into the extension (assets/ when it cannot be read)"""
+    if yaml is not None:
+        try:
+            config = yaml.safe_load(text) or {}
+        except yaml.YAMLError:
+            config = {}
+        sources = [step['from'].strip('/') for step in config.get('assemble', []) or []
+                   if isinstance(step, dict) and step.get('from')]
+        if sources:
+            return sources
+    return ['assets']
+
+
+def rewrite_urls(text, renamed):
+    """client-extension.yaml text with each url: in renamed replaced, everything else untouched"""
+    lines = []
+    for line in text.splitlines(keepends=True):
+        body = line.rstrip('\r\n')
+        match = _URL_LINE.match(body)
+        if match and match.group('url') in renamed:
+            quote = match.group('quote')
+            body = f"{match.group('key')}{quote}{renamed[match.group('url')]}{quote}{match.group('rest')}"
+            line = body + line[len(line.rstrip('\r\n')):]
+        lines.append(line)
+    return ''.join(lines)
+
+
+def gzip_sidecar(data):
+    """Gzip at maximum compression with a fixed header, or None if it saves nothing"""
+    compressed = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    return compressed if len(compressed) < len(data) else None
+
+
+def brotli_sidecar(data):
+    """Brotli at maximum quality, or None if it saves nothing"""
+    compressed = brotli.compress(data, quality=BROTLI_QUALITY, mode=brotli.MODE_TEXT)
+    return compressed if len(compressed) < len(data) else None
+
+
+class AssetFingerprintStage(BuildStage):
+    """
+    Content-hash the assets of a client extension and precompress them
+
+    Only entry lists containing a top-level client-extension.yaml are
+    touched, so the stage passes fragment collections through unchanged.
+    """
+
+    name = 'fingerprint'
+    version = 1
+
+    def __init__(self, length=HASH_LENGTH, **kwargs):
+        super().__init__(**kwargs)
+        self.length = length
+        self._seen = set()
+        self._warned = False
+
+    def options(self):
+        return {
+            'length': self.length,
+            'gzip_level': GZIP_LEVEL,
+            'brotli_quality': BROTLI_QUALITY if brotli is not None else None,
+        }
+
+    def sidecars(self, file_path, archive_path):
+        """(file_path, archive_path) entries of the precompressed copies worth shipping"""
+        entries = []
+        encoders = [('.gz', gzip_sidecar)] + ([('.br', brotli_sidecar)] if brotli is not None else [])
+        for suffix, encode in encoders:
+            sidecar_path, _ = self.cached(file_path, os.path.splitext(archive_path)[1] + suffix, encode)
+            if sidecar_path != file_path:
+                entries.append((sidecar_path, archive_path + suffix))
+        return entries
+
+    def process(self, entries):
+        files = {archive_path: file_path for file_path, archive_path in entries}
+        config_path = files.get(CONFIG_NAME)
+        if config_path is None:
+            return entries
+        if brotli is None and not self._warned:
+            print("⚠️ brotli not installed: fingerprinted assets get .gz sidecars only")
+            self._warned = True
+
+        with open(config_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        sources = assemble_sources(text)
+        renamed_urls = {}
+        renamed_paths = {}
+        for url in extension_urls(text):
+            for source in sources:
+                archive_path = f"{source}/{url}"
+                if archive_path in files and not is_fingerprinted(url):
+                    renamed_urls[url] = fingerprinted_name(url, hash_file(files[archive_path]), self.length)
+                    renamed_paths[archive_path] = f"{source}/{renamed_urls[url]}"
+                    break
+        if not renamed_urls:
+            return entries
+
+        asset_paths = [files[archive_path] for archive_path in sorted(renamed_paths)]
+        (new_config_path, *_), _ = self.cached_outputs(
+            [config_path] + asset_paths, ['.yaml'],
+            lambda inputs: [rewrite_urls(inputs[0].decode('utf-8'), renamed_urls).encode('utf-8')])
+
+        output = []
+        for file_path, archive_path in entries:
+            if archive_path == CONFIG_NAME:
+                output.append((new_config_path, archive_path))
+            elif archive_path in renamed_paths:
+                new_archive_path = renamed_paths[archive_path]
+                output.append((file_path, new_archive_path))
+                sidecars = []
+                if new_archive_path.lower().endswith(SIDECAR_EXTENSIONS):
+                    sidecars = self.sidecars(file_path, new_archive_path)
+                    output.extend(sidecars)
+                if (file_path, new_archive_path) not in self._seen:
+                    self._seen.add((file_path, new_archive_path))
+                    size = os.path.getsize(file_path)
+                    sizes = ', '.join(f"{os.path.splitext(path)[1]} {os.path.getsize(path):,}" for path, _ in sidecars)
+                    # Sidecars are added to the package; they only shrink what is transferred
+                    self.record(file_path, size, size + sum(os.path.getsize(path) for path, _ in sidecars),
+                                f"→ {os.path.basename(new_archive_path)}" + (f" ({sizes})" if sizes else ''))
+                    self.records[-1]['transfer'] = min((os.path.getsize(path) for path, _ in sidecars), default=size)
+            else:
+                output.append((file_path, archive_path))
+        return output
+
+    @classmethod
+    def print_report(cls, records):
+        """Sidecars make the package bigger, so report them as added bytes next to the transfer size"""
+        if not records:
+            return
+        size = sum(r['before'] for r in records)
+        added = sum(r['after'] - r['before'] for r in records)
+        transfer = sum(r.get('transfer', r['before']) for r in records)
+        print(f"\n{cls.name} stage: {len(records)} assets renamed, {size:,} bytes "
+              f"+ {added:,} bytes of sidecars, {transfer:,} bytes transferred with {'br' if brotli else 'gzip'}")
+        for r in sorted(records, key=lambda r: r['before'], reverse=True):
+            print(f"  {r['path']:<70} {r['before']:>10,} +{r['after'] - r['before']:>9,}  {r['note']}")
+        if brotli is None:
+            print("  ⚠️ no .br sidecars written: brotli is not installed (pip install brotli); "
+                  "only .gz sidecars are in the package")
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Build toolchain benchmark over synthetic fragment collections
+Generates YBS, Sigma and JM workspaces of 10, 100 and 1,000 fragments with
+the real file mix (HTML, CSS, JS, configuration and PNG thumbnails), times
+validation, packaging, debug cleaning and the end-to-end builders on them,
+and compares the results against a saved baseline
+
+Every task runs in a fresh child process, so timings include imports and the
+peak RSS is the task's own. The synthetic content is seeded, so the same
+sizes always produce the same bytes.
+
+Usage:
+    python3 benchmark_builds.py                          # 10, 100 and 1,000 fragments
+    python3 benchmark_builds.py --sizes 10 100 --save    # write benchmark-baseline.json
+    python3 benchmark_builds.py --compare                # fail on regressions against it
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import shutil
+import struct
+import platform
+import argparse
+import tempfile
+import statistics
+import contextlib
+import subprocess
+
+from benchmark_zip_stream import peak_rss_kb
+
+DEFAULT_SIZES = [10, 100, 1000]
+DEFAULT_REPEAT = 3
+BASELINE_FILE = "benchmark-baseline.json"
+
+# Slowdown against the baseline that counts as a regression, and the absolute
+# floor below which differences are treated as noise
+REGRESSION_THRESHOLD = 0.15
+NOISE_FLOOR_SECONDS = 0.05
+
+# brand prefix -> collection directory name (JM matches create_fragment_zips.py)
+BRANDS = {
+    'ybs': 'ybs-collection',
+    'sigma': 'sigma-collection',
+    'jm': 'johnson-matthey-collection',
+}
+
+# Run in this order: 'rebuild ybs' reuses the manifest 'build ybs' leaves
+# behind. 'build *' runs with --force; 'rebuild ybs' finds nothing changed.
+TASKS = ['validate', 'package', 'clean', 'build ybs', 'rebuild ybs', 'build sigma', 'build jm']
+
+# Tasks that touch one brand's collection; the rest cover all of them
+SINGLE_BRAND = frozenset({'package', 'build ybs', 'rebuild ybs', 'build sigma', 'build jm'})
+
+SEED = 20240601
+THUMBNAIL_SIZE = 96
+RESOURCE_SIZE = 256
+RESOURCES_PER_COLLECTION = 4
+
+
+def noise_png(rng, size):
+    """An RGB PNG of random pixels: valid, and as incompressible as real photos"""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    rows = b''.join(b'\x00' + rng.randbytes(size * 3) for _ in range(size))
+    header = struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(rows, 9)) + chunk(b'IEND', b''))
+
+
+def fragment_html(key, rng):
+    """~7KB of fragment markup using configuration fields and collection resources"""
+    resource = f"bench-resource-{rng.randrange(RESOURCES_PER_COLLECTION)}.png"
+    cards = ''.join(
+        f'      <article class="{key}__card">\n'
+        f'        <h3 class="{key}__card-title">Card {n}</h3>\n'
+        f'        <p class="{key}__card-text">Lorem ipsum dolor sit amet, consectetur adipiscing elit, '
+        f'sed do eiusmod tempor incididunt ut labore {rng.random():.6f}.</p>\n'
+        f'        <a class="{key}__card-link" href="/page-{n}" data-analytics="{key}-{n}">Read more</a>\n'
+        f'      </article>\n'
+        for n in range(18))
+    return (f'<div class="{key} ${{configuration.style}}" data-fragment="{key}">\n'
+            f'  <h2 class="{key}__heading">${{configuration.heading}}</h2>\n'
+            f'  <img class="{key}__image" src="[resources:{resource}]" alt="" loading="lazy" width="640" height="360">\n'
+            f'  [#if configuration.showCards]\n'
+            f'    <div class="{key}__cards">\n{cards}    </div>\n'
+            f'  [/#if]\n'
+            f'</div>\n')
+
+
+def fragment_css(key, rng):
+    """~10KB of component rules"""
+    rules = []
+    for n in range(60):
+        rules.append(f'.{key} .{key}__element-{n} {{\n'
+                     f'  display: flex;\n  gap: {rng.randrange(4, 32)}px;\n'
+                     f'  color: #{rng.randrange(0x1000000):06x};\n  transition: opacity 0.2s ease;\n}}\n')
+        if n % 10 == 0:
+            rules.append(f'@media (max-width: 768px) {{\n  .{key} .{key}__element-{n} {{ flex-direction: column; }}\n}}\n')
+    return ''.join(rules)
+
+
+def fragment_js(key, rng):
+    """~15KB of fragment script, with the debug calls clean_debug.py strips"""
+    functions = []
+    for n in range(40):
+        functions.append(
+            f'  function handle{n}(event) {{\n'
+            f'    console.log("{key}: handle{n}", event.type);\n'
+            f'    const target = fragmentElement.querySelector(".{key}__element-{n}");\n'
+            f'    if (!target) {{ return; }}\n'
+            f'    target.classList.toggle("is-active", {rng.choice(["true", "false"])});\n'
+            f'    target.setAttribute("data-state", "state-{rng.randrange(1000)}");\n'
+            f'  }}\n'
+            f'  fragmentElement.addEventListener("click", handle{n});\n')
+    return ('(function () {\n  "use strict";\n'
+            + ''.join(functions)
+            + f'  console.debug("{key} ready");\n}})();\n')
+
+
+def fragment_configuration():
+    return {
+        'fieldSets': [{
+            'fields': [
+                {'name': 'heading', 'label': 'Heading', 'type': 'text', 'defaultValue': 'Benchmark'},
+                {'name': 'style', 'label': 'Style', 'type': 'select', 'defaultValue': 'light',
+                 'typeOptions': {'validValues': [{'label': 'Light', 'value': 'light'},
+                                                 {'label': 'Dark', 'value': 'dark'}]}},
+                {'name': 'showCards', 'label': 'Show cards', 'type': 'checkbox', 'defaultValue': True},
+            ]
+        }]
+    }
+
+
+def fragment_metadata(index):
+    """fragment.json fields; also what create_fragment_zips.py needs in FRAGMENTS"""
+    return {'name': f"Bench Fragment {index}", 'type': 'section' if index % 3 else 'component', 'icon': 'cards2'}
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content if isinstance(content, bytes) else content.encode('utf-8'))
+
+
+def generate_collection(workspace, brand, collection_name, fragments):
+    """Write one synthetic collection; returns its fragment keys"""
+    rng = random.Random(f"{SEED}-{brand}")
+    collection = os.path.join(workspace, 'fragment-collection', collection_name)
+    write_file(os.path.join(collection, 'collection.json'), json.dumps(
+        {'fragmentCollectionKey': collection_name, 'name': f"{brand.upper()} Benchmark Collection"}, indent=2))
+    for n in range(RESOURCES_PER_COLLECTION):
+        write_file(os.path.join(collection, 'resources', f"bench-resource-{n}.png"), noise_png(rng, RESOURCE_SIZE))
+
+    # A quarter of the thumbnails are the same image, as with placeholder thumbnails
+    shared_thumbnail = noise_png(rng, THUMBNAIL_SIZE)
+    configuration = json.dumps(fragment_configuration(), indent=2)
+    keys = []
+    for index in range(fragments):
+        key = f"{brand}-bench-{index:04d}"
+        fragment = os.path.join(collection, key)
+        metadata = fragment_metadata(index)
+        # Same layout as create_fragment_json() writes, so the JM builder leaves it alone
+        write_file(os.path.join(fragment, 'fragment.json'), json.dumps({
+            'fragmentEntryKey': key, 'name': metadata['name'], 'type': metadata['type'],
+            'htmlPath': 'index.html', 'cssPath': 'index.css', 'jsPath': 'index.js',
+            'configurationPath': 'configuration.json', 'thumbnailPath': 'thumbnail.png',
+            'icon': metadata['icon'],
+        }, indent=2))
+        write_file(os.path.join(fragment, 'configuration.json'), configuration)
+        write_file(os.path.join(fragment, 'index.html'), fragment_html(key, rng))
+        write_file(os.path.join(fragment, 'index.css'), fragment_css(key, rng))
+        write_file(os.path.join(fragment, 'index.js'), fragment_js(key, rng))
+        write_file(os.path.join(fragment, 'thumbnail.png'),
+                   shared_thumbnail if index % 4 == 0 else noise_png(rng, THUMBNAIL_SIZE))
+        keys.append(key)
+    return keys
+
+
+def generate_extension(workspace, brand):
+    """Write a synthetic <brand>-frontend-client-extension with global CSS and JS"""
+    rng = random.Random(f"{SEED}-{brand}-extension")
+    extension = os.path.join(workspace, f"{brand}-frontend-client-extension")
+    write_file(os.path.join(extension, 'client-extension.yaml'),
+               f"assemble:\n  - from: assets\n    into: static\n\n"
+               f"{brand}-global-css:\n  name: {brand.upper()} Global CSS\n  type: globalCSS\n  url: global.css\n\n"
+               f"{brand}-global-js:\n  name: {brand.upper()} Global JavaScript\n  type: globalJS\n"
+               f"  scriptLocation: bottom\n  url: global.js\n")
+    write_file(os.path.join(extension, 'assets', 'global.css'), fragment_css(f"{brand}-global", rng) * 2)
+    write_file(os.path.join(extension, 'assets', 'global.js'), fragment_js(f"{brand}-global", rng))
+
+
+def generate_workspace(workspace, fragments):
+    """Write every brand's collection and client extension; returns the JM fragment keys"""
+    keys = {}
+    for brand, collection_name in BRANDS.items():
+        keys[brand] = generate_collection(workspace, brand, collection_name, fragments)
+        generate_extension(workspace, brand)
+    with open(os.path.join(workspace, 'jm-fragments.json'), 'w') as f:
+        json.dump({key: fragment_metadata(index) for index, key in enumerate(keys['jm'])}, f)
+    return keys
+
+
+def run_task(task, workspace):
+    """Run one task inside workspace; the builders' own output is discarded"""
+    os.chdir(workspace)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        if task == 'validate':
+            from build_collections import discover_targets
+            from fragment_validator import validate_targets, issue_counts
+            results = validate_targets([(t['kind'], t['source']) for t in discover_targets()])
+            success = issue_counts(results)[0] == 0
+        elif task == 'package':
+            from build_collections import collect_directory_entries
+            from build_manifest import BuildManifest, write_zip_incremental
+            source = os.path.join('fragment-collection', BRANDS['ybs'])
+            entries = collect_directory_entries(source, archive_root=BRANDS['ybs'])
+            write_zip_incremental('package.zip', entries, BuildManifest(path='package-manifest.json'),
+                                  force=True, verbose=False)
+            success = True
+        elif task == 'clean':
+            from clean_debug import clean_all, find_js_files
+            success = bool(clean_all(find_js_files(), write=False))
+        elif task in ('build ybs', 'rebuild ybs'):
+            import build_ybs_zips
+            success = build_ybs_zips.main(force=task == 'build ybs', verbose=False)
+        elif task == 'build sigma':
+            import build_sigma_zips
+            success = build_sigma_zips.main(force=True, verbose=False)
+        elif task == 'build jm':
+            # create_fragment_zips.py packages the fragments listed in FRAGMENTS
+            import create_fragment_zips
+            with open('jm-fragments.json') as f:
+                create_fragment_zips.FRAGMENTS = json.load(f)
+            success = create_fragment_zips.main(force=True, verbose=False)
+        else:
+            raise ValueError(f"Unknown task '{task}'")
+    if not success:
+        sys.stderr.write(output.getvalue())
+    return success
+
+
+def run_child(task, workspace):
+    """Time one task in this process and print seconds and peak RSS as JSON"""
+    started = time.perf_counter()
+    success = run_task(task, workspace)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({'seconds': elapsed, 'peak_rss_kb': peak_rss_kb(), 'success': success}))
+
+
+def measure(task, workspace):
+    """Run one task in a child process and return its JSON result"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', task, workspace],
+        cwd=script_dir, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"{task} crashed:\n{completed.stderr.strip()}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    if not result['success']:
+        raise RuntimeError(f"{task} failed:\n{completed.stderr.strip()}")
+    result['wall_seconds'] = wall
+    return result
+
+
+def benchmark_size(fragments, tasks, repeat):
+    """Generate a workspace of the given size and time each task; returns {task: result}"""
+    workspace = tempfile.mkdtemp(prefix=f"build-bench-{fragments}-")
+    try:
+        started = time.perf_counter()
+        generate_workspace(workspace, fragments)
+        print(f"\n📂 {fragments:,} fragments per brand "
+              f"(generated in {time.perf_counter() - started:.1f}s, {directory_size(workspace) / 1024 / 1024:.1f} MB)")
+        results = {}
+        for task in TASKS:
+            if task not in tasks:
+                continue
+            runs = [measure(task, workspace) for _ in range(repeat)]
+            seconds = statistics.median(run['seconds'] for run in runs)
+            results[task] = {
+                'seconds': round(seconds, 4),
+                'wall_seconds': round(statistics.median(run['wall_seconds'] for run in runs), 4),
+                'peak_rss_kb': max(run['peak_rss_kb'] for run in runs),
+                'ms_per_fragment': round(seconds * 1000 / (fragments * (1 if task in SINGLE_BRAND else len(BRANDS))), 3),
+            }
+            r = results[task]
+            print(f"  {task:<12} {r['seconds']:>9.3f}s {r['wall_seconds']:>9.3f}s "
+                  f"{r['peak_rss_kb'] / 1024:>8.1f} MB {r['ms_per_fragment']:>10.3f}")
+        return results
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Print each task's change against the baseline
+
+    Returns the (fragments, task) pairs that got slower by more than threshold
+    (and by more than NOISE_FLOOR_SECONDS).
+    """
+    if baseline.get('environment') != environment():
+        print("⚠️ Baseline was recorded on a different machine or Python; expect noise")
+    regressions = []
+    print(f"\n📊 Against baseline ({baseline.get('recorded', 'unknown date')}):")
+    print(f"  {'fragments':>9}  {'task':<12} {'baseline':>9} {'now':>9} {'change':>8}")
+    for size, tasks in results.items():
+        for task, result in tasks.items():
+            before = baseline['results'].get(size, {}).get(task)
+            if before is None:
+                print(f"  {size:>9}  {task:<12} {'—':>9} {result['seconds']:>8.3f}s {'new':>8}")
+                continue
+            change = (result['seconds'] - before['seconds']) / before['seconds'] if before['seconds'] else 0.0
+            regressed = change > threshold and result['seconds'] - before['seconds'] > NOISE_FLOOR_SECONDS
+            marker = ' ❌' if regressed else (' ✓' if change < -threshold else '')
+            print(f"  {size:>9}  {task:<12} {before['seconds']:>8.3f}s {result['seconds']:>8.3f}s "
+                  f"{change:>+7.0%}{marker}")
+            if regressed:
+                regressions.append((size, task))
+    return regressions
+
+
+def main(argv=None):
+    """Run the benchmark, then save it or compare it against a baseline"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, metavar='N',
+                        help=f'Fragments per brand collection (default: {DEFAULT_SIZES})')
+    parser.add_argument('--tasks', nargs='+', choices=TASKS, default=TASKS, metavar='TASK',
+                        help=f"Tasks to time (default: all of {', '.join(TASKS)})")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f'Runs per task; the median time is reported (default: {DEFAULT_REPEAT})')
+    parser.add_argument('--save', nargs='?', const=BASELINE_FILE, metavar='PATH',
+                        help=f'Write the results as a baseline (default: {BASELINE_FILE})')
+    parser.add_argument('--compare', nargs='?', const=BASELINE_FILE, metavar='PATH',
+                        help=f'Compare against a saved baseline and fail on regressions (default: {BASELINE_FILE})')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD * 100, metavar='PERCENT',
+                        help=f'Slowdown that counts as a regression (default: {REGRESSION_THRESHOLD * 100:.0f})')
+    parser.add_argument('--child', nargs=2, metavar=('TASK', 'WORKSPACE'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(*args.child)
+        return True
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"❌ Cannot read baseline {args.compare}: {e}")
+            return False
+
+    print("=" * 60)
+    print("Build Toolchain Benchmark")
+    print("=" * 60)
+    print(f"  {'task':<12} {'in-task':>10} {'process':>10} {'peak RSS':>11} {'ms/fragment':>10}")
+
+    results = {}
+    for fragments in args.sizes:
+        try:
+            results[str(fragments)] = benchmark_size(fragments, args.tasks, args.repeat)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return False
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'recorded': time.strftime('%Y-%m-%d %H:%M:%S'), 'environment': environment(),
+                       'repeat': args.repeat, 'results': results}, f, indent=2)
+            f.write('\n')
+        print(f"\n💾 Baseline written to {args.save}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold / 100)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:.0f}%")
+            return False
+        print("\n✓ No regressions")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
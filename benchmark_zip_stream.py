@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for buffered vs streaming ZIP packaging
+Generates synthetic collections of growing size and reports the peak RSS of
+each packaging mode, measured in a fresh child process per run
+
+Usage:
+    python3 benchmark_zip_stream.py --sizes 16 64 256
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import resource
+import argparse
+import tempfile
+import subprocess
+
+DEFAULT_SIZES_MB = [16, 64, 256]
+MODES = ['buffered', 'stream']
+
+
+def generate_collection(root, size_mb):
+    """
+    Write a synthetic collection of roughly size_mb megabytes
+
+    Mirrors the real mix: incompressible PNG-like thumbnails (a quarter of them
+    duplicated across fragments), one large resource that grows with the
+    input, and small HTML/CSS/JS text files.
+    """
+    collection = os.path.join(root, 'synthetic-collection')
+    os.makedirs(os.path.join(collection, 'resources'))
+    with open(os.path.join(collection, 'collection.json'), 'w') as f:
+        json.dump({'fragmentCollectionKey': 'synthetic-collection', 'name': 'Synthetic Collection'}, f)
+
+    total = size_mb * 1024 * 1024
+    with open(os.path.join(collection, 'resources', 'hero-background.png'), 'wb') as f:
+        for _ in range(total // 4 // (1024 * 1024)):
+            f.write(os.urandom(1024 * 1024))
+
+    text = ("#wrapper .synthetic-fragment { display: flex; gap: 1rem; }\n" * 400).encode('utf-8')
+    shared_thumbnail = os.urandom(512 * 1024)
+    written = total // 4
+    index = 0
+    while written < total:
+        fragment = os.path.join(collection, f"synthetic-fragment-{index}")
+        os.makedirs(fragment)
+        thumbnail = shared_thumbnail if index % 4 == 0 else os.urandom(512 * 1024)
+        with open(os.path.join(fragment, 'thumbnail.png'), 'wb') as f:
+            f.write(thumbnail)
+        for name in ('index.html', 'index.css', 'index.js', 'configuration.json', 'fragment.json'):
+            with open(os.path.join(fragment, name), 'wb') as f:
+                f.write(text)
+        written += len(thumbnail) + 5 * len(text)
+        index += 1
+    return collection
+
+
+def peak_rss_kb():
+    """
+    Peak resident set size of this process in kilobytes
+
+    Prefers VmHWM from /proc, which is reset on exec; ru_maxrss can carry the
+    parent's peak over into a freshly spawned child on Linux.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_child(mode, source_dir, output_path):
+    """Package source_dir in this process and print timing and peak RSS as JSON"""
+    from build_collections import collect_directory_entries
+    from build_manifest import BuildManifest, write_zip_incremental
+    from zip_stream import DEFAULT_CHUNK_SIZE
+
+    entries = collect_directory_entries(source_dir, archive_root=os.path.basename(source_dir))
+    manifest = BuildManifest(path=f"{output_path}.manifest.json")
+    started = time.perf_counter()
+    write_zip_incremental(output_path, entries, manifest, force=True, verbose=False,
+                          stream_chunk_size=DEFAULT_CHUNK_SIZE if mode == 'stream' else None)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({'peak_rss_kb': peak_rss_kb(), 'seconds': elapsed, 'bytes': os.path.getsize(output_path)}))
+
+
+def measure(mode, source_dir, work_dir):
+    """Run one packaging mode in a child process and return its JSON result"""
+    output_path = os.path.join(work_dir, f"{mode}.zip")
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', mode, source_dir, output_path],
+        cwd=script_dir, capture_output=True, text=True, check=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    os.remove(output_path)
+    return result
+
+
+def main(argv=None):
+    """Run the benchmark and print peak RSS per input size and mode"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES_MB, metavar='MB',
+                        help=f'Synthetic collection sizes in MB (default: {DEFAULT_SIZES_MB})')
+    parser.add_argument('--child', nargs=3, metavar=('MODE', 'SOURCE', 'OUTPUT'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(*args.child)
+        return True
+
+    print("=" * 60)
+    print("ZIP Packaging Memory Benchmark")
+    print("=" * 60)
+    print(f"{'Input':>8}  {'Mode':<9} {'Peak RSS':>12} {'Time':>8} {'ZIP size':>14}")
+
+    for size_mb in args.sizes:
+        work_dir = tempfile.mkdtemp(prefix='zip-stream-bench-')
+        try:
+            source_dir = generate_collection(work_dir, size_mb)
+            for mode in MODES:
+                result = measure(mode, source_dir, work_dir)
+                print(f"{size_mb:>6}MB  {mode:<9} {result['peak_rss_kb'] / 1024:>10.1f}MB "
+                      f"{result['seconds']:>7.2f}s {result['bytes']:>14,}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Content-addressed blob store for Liferay ZIP packaging
+Identical thumbnails and resources are read from disk and compressed once per
+build, and a dedupe report shows how much duplicated content the ZIPs carry
+"""
+
+import os
+import zlib
+from collections import defaultdict
+
+from zip_policy import CompressionPolicy, compress_with_policy
+
+
+class Blob:
+    """A compressed entry payload, ready to be written raw into any ZIP"""
+
+    __slots__ = ('crc', 'file_size', 'compress_type', 'raw')
+
+    def __init__(self, crc, file_size, compress_type, raw):
+        self.crc = crc
+        self.file_size = file_size
+        self.compress_type = compress_type
+        self.raw = raw
+
+
+class BlobStore:
+    """
+    Compress each unique content hash once and hand out the cached result
+
+    Call plan() with every hash the build will write so the store only keeps
+    blobs that are used more than once, and frees each after its last use.
+    """
+
+    def __init__(self, policy=None, stats=None):
+        self.policy = policy or CompressionPolicy()
+        self.stats = stats
+        self._remaining = defaultdict(int)
+        self._blobs = {}
+        self.hits = 0
+        self.bytes_reused = 0
+
+    def plan(self, content_hashes):
+        """Register the content hashes that are about to be written"""
+        for content_hash in content_hashes:
+            self._remaining[content_hash] += 1
+
+    def get(self, file_path, content_hash, archive_path):
+        """Return the Blob for a file, compressing it only on first use"""
+        compress_type = self.policy.compress_type(archive_path)
+        key = (content_hash, compress_type)
+        self._remaining[content_hash] -= 1
+
+        blob = self._blobs.get(key)
+        if blob is not None:
+            self.hits += 1
+            self.bytes_reused += blob.file_size
+        else:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            compress_type, raw = compress_with_policy(data, archive_path, self.policy, self.stats)
+            blob = Blob(zlib.crc32(data), len(data), compress_type, raw)
+            if self._remaining[content_hash] > 0:
+                self._blobs[key] = blob
+
+        if self._remaining[content_hash] <= 0:
+            self._blobs.pop(key, None)
+        return blob
+
+    def release(self, content_hash):
+        """Drop a planned use that will not be written, e.g. an up-to-date artifact"""
+        self._remaining[content_hash] -= 1
+        if self._remaining[content_hash] <= 0:
+            for key in [k for k in self._blobs if k[0] == content_hash]:
+                del self._blobs[key]
+
+    def summary(self):
+        """One-line description of what deduplication saved this build"""
+        return f"{self.hits} duplicate entries reused ({self.bytes_reused:,} bytes not re-read or recompressed)"
+
+
+def write_blob_entry(zipf, zinfo, blob):
+    """Append a pre-compressed blob to an open ZipFile under zinfo's name"""
+    zinfo.compress_type = blob.compress_type
+    zinfo.CRC = blob.crc
+    zinfo.file_size = blob.file_size
+    zinfo.compress_size = len(blob.raw)
+    zinfo.flag_bits &= ~0x08
+    zinfo.header_offset = zipf.fp.tell()
+    zipf.fp.write(zinfo.FileHeader())
+    zipf.fp.write(blob.raw)
+    zipf.filelist.append(zinfo)
+    zipf.NameToInfo[zinfo.filename] = zinfo
+    zipf.start_dir = zipf.fp.tell()
+
+
+def find_duplicates(artifacts, hash_source):
+    """
+    Group every input by content hash
+
+    artifacts maps an output path to its (file_path, archive_path) entries.
+    Returns {content_hash: [(output_path, file_path), ...]} for hashes that
+    appear more than once across all artifacts.
+    """
+    groups = defaultdict(list)
+    for output_path, entries in artifacts.items():
+        for file_path, archive_path in entries:
+            groups[hash_source(file_path)].append((output_path, file_path))
+    return {h: uses for h, uses in groups.items() if len(uses) > 1}
+
+
+def dedupe_report(artifacts, hash_source, policy=None):
+    """
+    Print duplicate inputs and how much smaller the ZIPs would be if shared
+
+    'Within ZIP' counts copies inside the same artifact; 'shared' assumes one
+    copy of every blob across all artifacts, e.g. a common resources collection.
+    Sizes are the compressed sizes under the current policy.
+    """
+    policy = policy or CompressionPolicy()
+    duplicates = find_duplicates(artifacts, hash_source)
+
+    compressed_sizes = {}
+    for content_hash, uses in duplicates.items():
+        output_path, file_path = uses[0]
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        _, raw = compress_with_policy(data, file_path, policy)
+        compressed_sizes[content_hash] = len(raw)
+
+    print("\nDuplicate inputs:")
+    if not duplicates:
+        print("  ✓ No duplicate files found")
+        return {'duplicates': 0, 'within_zip_savings': {}, 'shared_savings': 0}
+
+    ordered = sorted(duplicates.items(), key=lambda item: compressed_sizes[item[0]] * (len(item[1]) - 1), reverse=True)
+    for content_hash, uses in ordered:
+        size = os.path.getsize(uses[0][1])
+        print(f"  {content_hash[:12]}  {size:>10,} bytes × {len(uses)}")
+        for _, file_path in sorted(set(uses)):
+            print(f"    • {file_path}")
+
+    within_zip_savings = {}
+    shared_savings = 0
+    for content_hash, uses in duplicates.items():
+        size = compressed_sizes[content_hash]
+        per_output = defaultdict(int)
+        for output_path, _ in uses:
+            per_output[output_path] += 1
+        for output_path, count in per_output.items():
+            if count > 1:
+                within_zip_savings[output_path] = within_zip_savings.get(output_path, 0) + size * (count - 1)
+        shared_savings += size * (len(uses) - 1)
+
+    print("\nPotential savings if duplicates were shared:")
+    for output_path in sorted(artifacts):
+        current = os.path.getsize(output_path) if os.path.exists(output_path) else None
+        saving = within_zip_savings.get(output_path, 0)
+        if not saving:
+            continue
+        if current:
+            print(f"  {output_path:<55} -{saving:>12,} bytes ({saving / current:.0%} of {current:,})")
+        else:
+            print(f"  {output_path:<55} -{saving:>12,} bytes")
+    print(f"  {'Within each ZIP':<55} -{sum(within_zip_savings.values()):>12,} bytes")
+    print(f"  {'Shared across all ZIPs':<55} -{shared_savings:>12,} bytes")
+
+    return {
+        'duplicates': len(duplicates),
+        'within_zip_savings': within_zip_savings,
+        'shared_savings': shared_savings,
+    }
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Performance budgets for fragment collections
+Budgets live in a performance-budget.json next to collection.json (defaults
+for every fragment plus collection totals) or next to fragment.json (a
+per-fragment override), and cap raw and gzipped bytes per asset type
+
+Example collection budget:
+    {
+      "fragment":   {"js": {"raw": 32000, "gzip": 8000}, "thumbnail": {"raw": 850000}},
+      "collection": {"js": {"gzip": 40000}, "images": {"raw": 3000000}}
+    }
+
+A fragment-level file uses the same shape as the "fragment" section.
+"""
+
+import os
+import sys
+import json
+import gzip
+import argparse
+
+BUDGET_FILE = "performance-budget.json"
+
+CATEGORIES = ('html', 'css', 'js', 'images', 'thumbnail')
+METRICS = ('raw', 'gzip')
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.svg', '.ico')
+
+
+class BudgetError(ValueError):
+    """Raised for a malformed performance-budget.json"""
+
+
+def asset_category(file_name):
+    """Budget category of a file, or None for files budgets ignore (JSON, docs)"""
+    lower = file_name.lower()
+    if lower == 'thumbnail.png':
+        # Only shown in the page editor sidebar, so it never affects page weight
+        return 'thumbnail'
+    if lower.endswith(('.html', '.ftl')):
+        return 'html'
+    if lower.endswith('.css'):
+        return 'css'
+    if lower.endswith('.js'):
+        return 'js'
+    if lower.endswith(IMAGE_EXTENSIONS):
+        return 'images'
+    return None
+
+
+# Path -> ((mtime, size), (raw, gzip)), so repeated checks in one process only measure changed files
+_measured = {}
+
+
+def measure_file(path):
+    """Raw and gzipped byte counts of one file"""
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _measured.get(path)
+    if cached is None or cached[0] != signature:
+        with open(path, 'rb') as f:
+            data = f.read()
+        cached = _measured[path] = (signature, (len(data), len(gzip.compress(data, compresslevel=6, mtime=0))))
+    return cached[1]
+
+
+def measure_directory(directory):
+    """Raw and gzipped bytes per category for every file under directory"""
+    sizes = {category: {'raw': 0, 'gzip': 0} for category in CATEGORIES}
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in files:
+            category = asset_category(name)
+            if category is None:
+                continue
+            raw, compressed = measure_file(os.path.join(root, name))
+            sizes[category]['raw'] += raw
+            sizes[category]['gzip'] += compressed
+    return sizes
+
+
+def _validate_limits(limits, path):
+    for category, metrics in limits.items():
+        if category not in CATEGORIES:
+            raise BudgetError(f"{path}: unknown category '{category}' (expected one of {', '.join(CATEGORIES)})")
+        if not isinstance(metrics, dict) or any(m not in METRICS for m in metrics):
+            raise BudgetError(f"{path}: '{category}' must map 'raw' and/or 'gzip' to byte limits")
+        for metric, limit in metrics.items():
+            if not isinstance(limit, int) or limit < 0:
+                raise BudgetError(f"{path}: {category}.{metric} must be a non-negative integer")
+    return limits
+
+
+def load_budget(directory):
+    """The parsed performance-budget.json in directory, or None"""
+    path = os.path.join(directory, BUDGET_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except json.JSONDecodeError as e:
+        raise BudgetError(f"{path}: invalid JSON: {e}")
+
+
+def _merge_limits(base, override):
+    merged = {category: dict(metrics) for category, metrics in (base or {}).items()}
+    for category, metrics in (override or {}).items():
+        merged.setdefault(category, {}).update(metrics)
+    return merged
+
+
+def _violations(scope, name, sizes, limits):
+    found = []
+    for category, metrics in limits.items():
+        for metric, limit in metrics.items():
+            actual = sizes[category][metric]
+            if actual > limit:
+                found.append({'scope': scope, 'name': name, 'category': category, 'metric': metric,
+                              'actual': actual, 'limit': limit})
+    return found
+
+
+def fragment_directories(collection_dir):
+    """Fragment directories of a collection, in name order"""
+    return [os.path.join(collection_dir, item) for item in sorted(os.listdir(collection_dir))
+            if os.path.exists(os.path.join(collection_dir, item, 'fragment.json'))]
+
+
+def check_collection_budgets(collection_dir):
+    """
+    Measure a collection against its budgets
+
+    Returns (violations, checked) where checked counts the budgeted scopes;
+    raises BudgetError for malformed budget files.
+    """
+    collection_budget = load_budget(collection_dir) or {}
+    for section in ('fragment', 'collection'):
+        _validate_limits(collection_budget.get(section, {}), os.path.join(collection_dir, BUDGET_FILE))
+    fragment_defaults = collection_budget.get('fragment', {})
+
+    violations = []
+    checked = 0
+    for fragment_dir in fragment_directories(collection_dir):
+        override = load_budget(fragment_dir)
+        if override:
+            _validate_limits(override, os.path.join(fragment_dir, BUDGET_FILE))
+        limits = _merge_limits(fragment_defaults, override)
+        if limits:
+            checked += 1
+            violations += _violations('fragment', os.path.basename(fragment_dir), measure_directory(fragment_dir),
+                                      limits)
+
+    if collection_budget.get('collection'):
+        checked += 1
+        violations += _violations('collection', os.path.basename(os.path.normpath(collection_dir)),
+                                  measure_directory(collection_dir), collection_budget['collection'])
+    return violations, checked
+
+
+def print_budget_report(violations):
+    """Print budget violations, worst overrun first"""
+    ranked = sorted(violations, key=lambda v: (v['actual'] - v['limit']) / max(v['limit'], 1), reverse=True)
+    print(f"❌ {len(ranked)} performance budget{'s' if len(ranked) != 1 else ''} exceeded:")
+    for rank, v in enumerate(ranked, 1):
+        over = v['actual'] - v['limit']
+        print(f"  {rank:>2}. {v['scope']:<10} {v['name']:<28} {v['category']:<9} {v['metric']:<4} "
+              f"{v['actual']:>10,} / {v['limit']:>10,} bytes  (+{over:,}, {over / max(v['limit'], 1):.0%} over)")
+
+
+def main(argv=None):
+    """Check every collection (or the ones given) against its budgets"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('collections', nargs='*', help='Collection directories (default: all under fragment-collection/)')
+    args = parser.parse_args(argv)
+
+    collections = args.collections or [
+        os.path.join('fragment-collection', item) for item in sorted(os.listdir('fragment-collection'))
+        if os.path.exists(os.path.join('fragment-collection', item, 'collection.json'))]
+
+    ok = True
+    for collection_dir in collections:
+        print(f"\n📏 {collection_dir}")
+        try:
+            violations, checked = check_collection_budgets(collection_dir)
+        except BudgetError as e:
+            print(f"❌ {e}")
+            ok = False
+            continue
+        if violations:
+            print_budget_report(violations)
+            ok = False
+        elif checked:
+            print(f"✓ Within budget ({checked} budgets checked)")
+        else:
+            print(f"⚠️ No {BUDGET_FILE} found")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
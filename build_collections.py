@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""
+Liferay Multi-Collection Builder
+Discovers every fragment collection and frontend client extension, then
+validates and packages them concurrently on a process pool
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import contextlib
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from build_manifest import BuildManifest, write_zip_incremental
+from zip_stream import DEFAULT_CHUNK_SIZE
+from zip_policy import CompressionPolicy, PolicyStats, DEFAULT_COMPRESSION_LEVEL
+from blob_store import dedupe_report
+from zip_reproducible import print_digests
+from build_stages import run_stages, drain_stage_records, print_stage_reports
+from image_optimizer import ImageOptimizationStage
+from clean_debug import DebugStripStage
+from minify import MinifyStage
+from critical_css import CriticalCSSStage
+from image_hints import ImageHintsStage
+from unused_css import PruneCSSStage
+from nav_snapshot import NavigationSnapshotStage, DEFAULT_MAX_AGE_HOURS
+from asset_fingerprint import AssetFingerprintStage
+from budgets import BUDGET_FILE, BudgetError, check_collection_budgets, print_budget_report
+from fragment_templates import generate_for_build
+from fragment_validator import validate_collection, validate_extension, print_target_report
+from build_profile import BuildProfiler, activate, span, finish, add_profile_args, profiler_from_args
+
+COLLECTION_ROOT = "fragment-collection"
+CLIENT_EXTENSION_SUFFIX = "-frontend-client-extension"
+
+DEFAULT_EXCLUDE_PATTERNS = ['.DS_Store', '__pycache__', '*.pyc', '.git', BUDGET_FILE]
+
+def collect_directory_entries(source_dir, exclude_patterns=None, archive_root=None):
+    """
+    Collect (file_path, archive_path) pairs for a directory with optional exclusions
+    """
+    if exclude_patterns is None:
+        exclude_patterns = DEFAULT_EXCLUDE_PATTERNS
+    
+    entries = []
+    with span('walk', source=source_dir) as profile:
+        for root, dirs, files in os.walk(source_dir):
+            # Remove excluded directories
+            dirs[:] = [d for d in dirs if not any(pattern in d for pattern in exclude_patterns)]
+            
+            for file in files:
+                # Skip excluded files
+                if any(pattern in file for pattern in exclude_patterns):
+                    continue
+                    
+                file_path = os.path.join(root, file)
+                # Get relative path from source directory
+                relative_path = os.path.relpath(file_path, source_dir)
+                if archive_root:
+                    relative_path = f"{archive_root}/{relative_path}"
+                entries.append((file_path, relative_path))
+        if profile is not None:
+            profile['files'] = len(entries)
+    
+    return entries
+
+def create_zip_from_directory(source_dir, output_path, exclude_patterns=None, manifest=None, force=False,
+                              policy=None, stats=None, stages=None, stream_chunk_size=None, verbose=True):
+    """
+    Create a ZIP file from a directory with optional exclusions
+    Entries pass through the optional build stages, unchanged entries are reused
+    from the previous build via the build manifest, and each new entry is
+    stored or deflated according to the compression policy; verbose=False
+    drops the per-file lines
+    """
+    print(f"Creating ZIP: {output_path}")
+    print(f"Source directory: {source_dir}")
+    
+    own_manifest = manifest is None
+    if own_manifest:
+        manifest = BuildManifest()
+    
+    entries = run_stages(stages, collect_directory_entries(source_dir, exclude_patterns))
+    with span('write zip', output=output_path):
+        write_zip_incremental(output_path, entries, manifest, force=force, verbose=verbose and not stream_chunk_size,
+                              policy=policy, stats=stats, stream_chunk_size=stream_chunk_size)
+    
+    if own_manifest:
+        manifest.save()
+    return True
+
+def create_fragment_collection_zip(source_dir, output_path, collection_name, manifest=None, force=False,
+                                   policy=None, stats=None, stages=None, stream_chunk_size=None, verbose=True):
+    """
+    Create a fragment collection ZIP with proper Liferay structure (root directory wrapper)
+    Entries pass through the optional build stages, unchanged entries are reused
+    from the previous build via the build manifest, and each new entry is
+    stored or deflated according to the compression policy; verbose=False
+    drops the per-file lines
+    """
+    print(f"Creating ZIP: {output_path}")
+    print(f"Source directory: {source_dir}")
+    
+    own_manifest = manifest is None
+    if own_manifest:
+        manifest = BuildManifest()
+    
+    # Add collection name as root directory in ZIP
+    entries = run_stages(stages, collect_directory_entries(source_dir, archive_root=collection_name))
+    with span('write zip', output=output_path):
+        write_zip_incremental(output_path, entries, manifest, force=force, verbose=verbose and not stream_chunk_size,
+                              policy=policy, stats=stats, stream_chunk_size=stream_chunk_size)
+    
+    if own_manifest:
+        manifest.save()
+    return True
+
+def validate_fragment_collection(collection_dir, enforce_budgets=True):
+    """
+    Validate fragment collection structure and performance budgets
+    Every fragment is parsed and schema-checked (see fragment_validator.py);
+    with enforce_budgets=False budget overruns are reported but do not fail
+    """
+    print(f"\nValidating fragment collection: {collection_dir}")
+    
+    result = validate_collection(collection_dir)
+    print_target_report(result)
+    if any(check.count('error') for check in result['checks']):
+        return False
+    
+    print(f"✓ Collection: {result['name']}")
+    print(f"✓ Key: {result['key']}")
+    print(f"✓ Found {len(result['fragments'])} fragments: {', '.join(result['fragments'])}")
+    
+    try:
+        violations, checked = check_collection_budgets(collection_dir)
+    except BudgetError as e:
+        print(f"❌ {e}")
+        return False
+    if violations:
+        print_budget_report(violations)
+        return not enforce_budgets
+    if checked:
+        print(f"✓ Within performance budget ({checked} budgets checked)")
+    return True
+
+def validate_client_extension(extension_dir):
+    """
+    Validate client extension structure and client-extension.yaml
+    """
+    print(f"\nValidating client extension: {extension_dir}")
+    
+    result = validate_extension(extension_dir)
+    print_target_report(result)
+    if any(check.count('error') for check in result['checks']):
+        return False
+    
+    print(f"✓ Valid client-extension.yaml")
+    return True
+
+def collection_brand(collection_dir):
+    """
+    Derive the brand prefix of a collection from its fragment keys (e.g. 'ybs')
+    """
+    prefixes = {}
+    for item in sorted(os.listdir(collection_dir)):
+        if os.path.exists(os.path.join(collection_dir, item, 'fragment.json')):
+            prefix = item.split('-', 1)[0]
+            prefixes[prefix] = prefixes.get(prefix, 0) + 1
+    if not prefixes:
+        return os.path.basename(collection_dir).split('-', 1)[0]
+    return max(prefixes, key=prefixes.get)
+
+def discover_targets(base_dir="."):
+    """
+    Discover every fragment collection and client extension to build
+
+    Returns a list of target dicts with 'kind', 'brand', 'source' and 'output'.
+    Each brand's artifacts go to '<brand>-builds/', matching ybs-builds/ and sigma-builds/.
+    """
+    targets = []
+    
+    collection_root = os.path.join(base_dir, COLLECTION_ROOT)
+    if os.path.isdir(collection_root):
+        for name in sorted(os.listdir(collection_root)):
+            collection_dir = os.path.join(collection_root, name)
+            if not os.path.exists(os.path.join(collection_dir, 'collection.json')):
+                continue
+            brand = collection_brand(collection_dir)
+            targets.append({
+                'kind': 'collection',
+                'brand': brand,
+                'name': name,
+                'source': os.path.normpath(collection_dir),
+                'output': os.path.normpath(os.path.join(base_dir, f"{brand}-builds", f"{name}.zip")),
+            })
+    
+    for name in sorted(os.listdir(base_dir)):
+        extension_dir = os.path.join(base_dir, name)
+        if name.endswith(CLIENT_EXTENSION_SUFFIX) and os.path.isdir(extension_dir):
+            brand = name[:-len(CLIENT_EXTENSION_SUFFIX)]
+            targets.append({
+                'kind': 'client-extension',
+                'brand': brand,
+                'name': name,
+                'source': os.path.normpath(extension_dir),
+                'output': os.path.normpath(os.path.join(base_dir, f"{brand}-builds", f"{name}.zip")),
+            })
+    
+    return targets
+
+def build_target(target, force=False, policy=None, stages=None, stream_chunk_size=None, enforce_budgets=True,
+                 profile=False, verbose=True):
+    """
+    Validate and package a single target; runs inside a worker process
+
+    Output is captured so concurrent builds print as whole blocks, and the
+    manifest record is returned for the parent process to merge and save.
+    With profile=True the target's spans are returned under 'profile'.
+    """
+    log = io.StringIO()
+    started = time.perf_counter()
+    manifest = BuildManifest()
+    stats = PolicyStats()
+    ok = False
+    profiler = BuildProfiler() if profile else None
+    previous_profiler = activate(profiler)
+    
+    with contextlib.redirect_stdout(log), span(target['name'], 'target', kind=target['kind']):
+        try:
+            os.makedirs(os.path.dirname(target['output']), exist_ok=True)
+            if target['kind'] == 'collection':
+                with span('validate'):
+                    valid = validate_fragment_collection(target['source'], enforce_budgets)
+                if valid:
+                    ok = create_fragment_collection_zip(target['source'], target['output'], target['name'],
+                                                        manifest, force, policy, stats, stages,
+                                                        stream_chunk_size, verbose)
+                else:
+                    print(f"❌ Fragment collection validation failed")
+            else:
+                with span('validate'):
+                    valid = validate_client_extension(target['source'])
+                if valid:
+                    ok = create_zip_from_directory(target['source'], target['output'], manifest=manifest,
+                                                   force=force, policy=policy, stats=stats, stages=stages,
+                                                   stream_chunk_size=stream_chunk_size, verbose=verbose)
+                else:
+                    print(f"❌ Client extension validation failed")
+        except Exception as e:
+            print(f"❌ Build error for {target['name']}: {e}")
+            ok = False
+    activate(previous_profiler)
+    
+    return {
+        'target': target,
+        'ok': ok,
+        'log': log.getvalue(),
+        'seconds': time.perf_counter() - started,
+        'record': manifest.artifacts.get(target['output']) if ok else None,
+        'policy_stats': stats.to_dict(),
+        'stage_records': drain_stage_records(stages),
+        'profile': profiler.to_dict() if profiler else None,
+    }
+
+def build_all(targets, force=False, jobs=None, policy=None, stages=None, stream_chunk_size=None,
+              enforce_budgets=True, profile=False, verbose=True):
+    """
+    Build all targets on a process pool sized to the available cores
+    Returns results in target order
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(targets)))
+    options = (force, policy, stages, stream_chunk_size, enforce_budgets, profile, verbose)
+    
+    if jobs == 1:
+        return [build_target(target, *options) for target in targets]
+    
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(build_target, target, *options) for target in targets]
+        return [future.result() for future in futures]
+
+def print_summary(results):
+    """
+    Print one combined summary for every target
+    """
+    print("\n" + "=" * 60)
+    print("BUILD SUMMARY")
+    print("=" * 60)
+    
+    for result in results:
+        target = result['target']
+        status = "✓" if result['ok'] else "❌"
+        size = ""
+        if result['ok'] and os.path.exists(target['output']):
+            size = f"{os.path.getsize(target['output']):,} bytes"
+        print(f"  {status} {target['brand']:<8} {target['kind']:<17} {target['output']:<55} {size:>16} {result['seconds']:6.2f}s")
+    
+    failed = [r for r in results if not r['ok']]
+    if failed:
+        print(f"\n❌ {len(failed)} of {len(results)} builds failed! Please check the errors above.")
+    else:
+        print(f"\n✓ All {len(results)} builds completed successfully!")
+
+def target_entries(target):
+    """
+    Collect the (file_path, archive_path) entries a target will package
+    """
+    if target['kind'] == 'collection':
+        return collect_directory_entries(target['source'], archive_root=target['name'])
+    return collect_directory_entries(target['source'])
+
+def main(brands=None, force=False, jobs=None, policy=None, report_duplicates=False, stages=None,
+         stream_chunk_size=None, enforce_budgets=True, profiler=None, verbose=True):
+    """
+    Main function to build every discovered collection and client extension
+    With a profiler, every step in this process and in the workers is timed into it
+    """
+    activate(profiler)
+    print("=" * 60)
+    print("Liferay Multi-Collection Builder")
+    print("=" * 60)
+    print(f"Build started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    # Templated fragments are regenerated once, before workers read them
+    with span('regenerate templates'):
+        if not generate_for_build(brands):
+            return False
+    
+    with span('discover targets'):
+        targets = discover_targets()
+    if brands:
+        targets = [t for t in targets if t['brand'] in brands]
+    if not targets:
+        print("❌ No collections or client extensions found to build")
+        return False
+    
+    print(f"Discovered {len(targets)} targets: {', '.join(t['name'] for t in targets)}")
+    
+    if report_duplicates:
+        artifacts = {target['output']: target_entries(target) for target in targets}
+        dedupe_report(artifacts, BuildManifest().hash_source, policy)
+        return True
+    
+    if policy is None:
+        policy = CompressionPolicy()
+    with span('build targets', targets=len(targets)):
+        results = build_all(targets, force=force, jobs=jobs, policy=policy, stages=stages,
+                            stream_chunk_size=stream_chunk_size, enforce_budgets=enforce_budgets,
+                            profile=profiler is not None, verbose=verbose)
+    
+    # Workers only read the manifest; merge their records and save once
+    manifest = BuildManifest()
+    policy_stats = PolicyStats()
+    stage_records = {}
+    for result in results:
+        print(result['log'], end='')
+        if result['record']:
+            manifest.artifacts[result['target']['output']] = result['record']
+        policy_stats.merge(result['policy_stats'])
+        for name, records in result['stage_records'].items():
+            stage_records.setdefault(name, []).extend(records)
+        if profiler is not None:
+            profiler.merge(result['profile'])
+    with span('save manifest'):
+        manifest.save()
+    
+    print_summary(results)
+    if policy.reproducible:
+        print_digests({r['target']['output']: r['record']['zip_hash'] for r in results if r['record']})
+    policy_stats.print_report(policy)
+    print_stage_reports(stages, stage_records)
+    print(f"\nBuild completed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    return all(r['ok'] for r in results)
+
+def build_brand(brand, collection_zip, extension_zip, report_duplicates=False, **options):
+    """
+    Build one brand and print its deployment steps
+    Shared by the single-brand builders (build_ybs_zips.py, build_sigma_zips.py);
+    options are passed to main()
+    """
+    success = main(brands=[brand], report_duplicates=report_duplicates, **options)
+    
+    if success and not report_duplicates:
+        print(f"\nDeployment Instructions:")
+        print(f"1. Upload {collection_zip} to Liferay's Fragment Collections")
+        print(f"2. Upload {extension_zip} to Liferay's Client Extensions")
+        print("3. Configure fragments on your Liferay pages")
+    
+    return success
+
+def brand_cli(brand, collection_zip, extension_zip, description, argv=None):
+    """
+    Command line of a single-brand builder: the shared options minus --only
+    """
+    args = build_parser(description, exclude=('only',)).parse_args(argv)
+    profiler = profiler_from_args(args)
+    success = build_brand(brand, collection_zip, extension_zip, force=args.force, jobs=args.jobs,
+                          policy=policy_from_args(args), report_duplicates=args.dedupe_report,
+                          stages=stages_from_args(args), stream_chunk_size=args.chunk_size if args.stream else None,
+                          enforce_budgets=not args.ignore_budgets, profiler=profiler, verbose=not args.quiet)
+    finish(profiler, args.profile_json, args.trace)
+    return success
+
+def build_parser(description=None, exclude=()):
+    """
+    Argument parser with the options shared by every builder entry point
+    Options whose dest is in exclude are left out but still default on the
+    parsed namespace, so policy_from_args() and stages_from_args() work for
+    every builder
+    """
+    parser = argparse.ArgumentParser(description=description or __doc__.strip().splitlines()[0])
+
+    def add(*flags, **kwargs):
+        dest = kwargs.get('dest') or flags[0].lstrip('-').replace('-', '_')
+        if dest in exclude:
+            parser.set_defaults(**{dest: kwargs.get('default', False if kwargs.get('action') == 'store_true' else None)})
+        else:
+            parser.add_argument(*flags, **kwargs)
+
+    add('--only', nargs='+', metavar='BRAND',
+        help='Only build these brands (e.g. ybs sigma jm)')
+    add('--jobs', type=int, default=None,
+        help='Worker processes (default: available cores)')
+    add('--force', action='store_true',
+        help='Ignore the build manifest and recompress every entry')
+    add('--ignore-budgets', action='store_true',
+        help='Report performance budget overruns without failing the build')
+    add('--compression-level', type=int, default=DEFAULT_COMPRESSION_LEVEL,
+        help=f'Deflate level 0-9 for text entries (default: {DEFAULT_COMPRESSION_LEVEL})')
+    add('--measure-policy', action='store_true',
+        help='Also compress each entry the other way to report what the policy saved')
+    add('--reproducible', action='store_true',
+        help='Sorted entries, fixed timestamps and permissions: identical sources, identical bytes')
+    add('--dedupe-report', action='store_true',
+        help='Report duplicate inputs and potential ZIP savings without building')
+    add('--nav-snapshot', metavar='SOURCE',
+        help="Pre-render the navigation menu exported at SOURCE (file or URL, {brand} expands) into each header")
+    add('--nav-max-age', type=float, default=DEFAULT_MAX_AGE_HOURS, metavar='HOURS',
+        help=f'With --nav-snapshot, hours before headers fetch the live menu again; '
+             f'older export files fail the build (default: {DEFAULT_MAX_AGE_HOURS})')
+    add('--strip-debug', action='store_true',
+        help='Strip console debug calls (console.error is kept) from packaged JavaScript')
+    add('--prune-css', action='store_true',
+        help='Drop CSS rules that no fragment markup can match (see unused_css.py)')
+    add('--critical-css', action='store_true',
+        help='Inline the critical CSS of *-hero fragments and leave the rest in index.css')
+    add('--image-hints', action='store_true',
+        help='Add loading/decoding/size hints to fragment images and move inline SVGs to resources/')
+    add('--minify', action='store_true',
+        help='Minify packaged JavaScript and CSS (comments and whitespace only)')
+    add('--source-maps', action='store_true',
+        help='With --minify, add a .map file next to every minified asset')
+    add('--optimize-images', action='store_true',
+        help='Downscale thumbnails, recompress PNGs and emit WebP variants for resources/')
+    add('--fingerprint-assets', action='store_true',
+        help='Content-hash client extension asset names, rewrite client-extension.yaml and add .gz/.br sidecars')
+    add('--stream', action='store_true',
+        help='Stream entries and output in fixed-size chunks to keep memory flat')
+    add('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+        help=f'Chunk size in bytes for --stream (default: {DEFAULT_CHUNK_SIZE})')
+    add_profile_args(parser)
+    return parser
+
+def parse_args(argv=None):
+    """
+    Parse command-line options shared by every builder entry point
+    """
+    return build_parser().parse_args(argv)
+
+def policy_from_args(args):
+    """
+    Build the compression policy selected on the command line
+    """
+    return CompressionPolicy(level=args.compression_level, measure=args.measure_policy,
+                             reproducible=args.reproducible)
+
+def stages_from_args(args):
+    """
+    Build the list of optional build stages selected on the command line
+    """
+    stages = []
+    if args.nav_snapshot:
+        stages.append(NavigationSnapshotStage(args.nav_snapshot, args.nav_max_age))
+    if args.strip_debug:
+        stages.append(DebugStripStage())
+    if args.prune_css:
+        stages.append(PruneCSSStage())
+    if args.critical_css:
+        stages.append(CriticalCSSStage())
+    if args.image_hints:
+        stages.append(ImageHintsStage())
+    if args.minify:
+        stages.append(MinifyStage(source_maps=args.source_maps))
+    if args.optimize_images:
+        stages.append(ImageOptimizationStage())
+    # Last, so the hashes cover what the other stages produced
+    if args.fingerprint_assets:
+        stages.append(AssetFingerprintStage())
+    return stages
+
+if __name__ == "__main__":
+    args = parse_args()
+    profiler = profiler_from_args(args)
+    success = main(brands=args.only, force=args.force, jobs=args.jobs, policy=policy_from_args(args),
+                   report_duplicates=args.dedupe_report, stages=stages_from_args(args),
+                   stream_chunk_size=args.chunk_size if args.stream else None,
+                   enforce_budgets=not args.ignore_budgets, profiler=profiler, verbose=not args.quiet)
+    finish(profiler, args.profile_json, args.trace)
+    sys.exit(0 if success else 1)
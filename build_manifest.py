@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Persistent build manifest for incremental Liferay ZIP rebuilds
+Records a content hash per source file and per output ZIP entry so unchanged
+artifacts are skipped and unchanged entries are copied without recompressing
+"""
+
+import os
+import json
+import hashlib
+import zipfile
+
+from zip_policy import CompressionPolicy
+from blob_store import BlobStore, write_blob_entry
+from zip_stream import ChunkedWriter, write_streamed_entry, DEFAULT_CHUNK_SIZE
+from zip_reproducible import entry_info, normalize_zipinfo, sorted_entries
+from build_profile import span, count
+
+MANIFEST_PATH = ".build-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def discard_partial(tmp_path):
+    """Remove a temporary output that was never moved into place"""
+    try:
+        os.remove(tmp_path)
+    except FileNotFoundError:
+        pass
+
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """
+    JSON manifest keyed by output ZIP path
+
+    Each artifact records the hash of every entry (archive path -> source hash)
+    and the hash of the written ZIP, so a tampered or deleted output is rebuilt.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.artifacts = {}
+        self._hash_cache = {}
+        self.load()
+
+    def load(self):
+        """Load the manifest from disk, starting empty if missing or stale"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Ignoring unreadable build manifest {self.path}: {e}")
+            return
+        if data.get('version') == MANIFEST_VERSION:
+            self.artifacts = data.get('artifacts', {})
+
+    def save(self):
+        """Write the manifest atomically"""
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({'version': MANIFEST_VERSION, 'artifacts': self.artifacts}, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            discard_partial(tmp_path)
+            raise
+
+    def hash_source(self, file_path):
+        """
+        Hash a source file once, even if several artifacts include it
+        A long-lived manifest (watch mode) re-hashes only files whose size or mtime changed
+        """
+        key = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._hash_cache.get(key)
+        if cached is None or cached[0] != signature:
+            cached = self._hash_cache[key] = (signature, hash_file(file_path))
+        return cached[1]
+
+    def previous_entries(self, output_path, options=None):
+        """
+        Return the entry hashes recorded for an artifact on the last build
+        Entries built with different packaging options are never reused
+        """
+        record = self.artifacts.get(output_path, {})
+        if record.get('options') != options:
+            return {}
+        return record.get('entries', {})
+
+    def is_current(self, output_path, entry_hashes, options=None):
+        """Check whether an artifact exists and was built from exactly these entries"""
+        record = self.artifacts.get(output_path)
+        if not record or not os.path.exists(output_path):
+            return False
+        if record.get('entries') != entry_hashes or record.get('options') != options:
+            return False
+        return record.get('zip_hash') == hash_file(output_path)
+
+    def record(self, output_path, entry_hashes, options=None):
+        """Remember the entries and resulting ZIP hash of a freshly written artifact"""
+        self.artifacts[output_path] = {
+            'entries': entry_hashes,
+            'options': options,
+            'zip_hash': hash_file(output_path),
+        }
+
+
+def _seek_raw_entry(zipf, info):
+    """Position an open ZIP at the still-compressed bytes of an entry"""
+    zipf.fp.seek(info.header_offset)
+    header = zipf.fp.read(zipfile.sizeFileHeader)
+    name_length = int.from_bytes(header[26:28], 'little')
+    extra_length = int.from_bytes(header[28:30], 'little')
+    zipf.fp.seek(info.header_offset + zipfile.sizeFileHeader + name_length + extra_length)
+
+
+def read_raw_entry(zipf, info):
+    """The still-compressed bytes of an entry, exactly as stored in the ZIP"""
+    _seek_raw_entry(zipf, info)
+    return zipf.fp.read(info.compress_size)
+
+
+def _copy_raw_entry(source_zip, info, target_zip, chunk_size=DEFAULT_CHUNK_SIZE, reproducible=False):
+    """Append an entry from one ZIP to another without recompressing it, in chunks"""
+    zinfo = zipfile.ZipInfo(info.filename, info.date_time)
+    zinfo.external_attr = info.external_attr
+    zinfo.create_system = info.create_system
+    if reproducible:
+        normalize_zipinfo(zinfo)
+    zinfo.flag_bits = info.flag_bits & ~0x08
+    zinfo.compress_type = info.compress_type
+    zinfo.CRC = info.CRC
+    zinfo.file_size = info.file_size
+    zinfo.compress_size = info.compress_size
+    zinfo.header_offset = target_zip.fp.tell()
+    target_zip.fp.write(zinfo.FileHeader())
+
+    _seek_raw_entry(source_zip, info)
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = source_zip.fp.read(min(chunk_size, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated entry {info.filename} in previous build")
+        target_zip.fp.write(chunk)
+        remaining -= len(chunk)
+
+    target_zip.filelist.append(zinfo)
+    target_zip.NameToInfo[zinfo.filename] = zinfo
+    target_zip.start_dir = target_zip.fp.tell()
+
+
+def write_zip_incremental(output_path, entries, manifest, force=False, verbose=True, policy=None, stats=None,
+                          blob_store=None, stream_chunk_size=None):
+    """
+    Write a ZIP from (file_path, archive_path) pairs, reusing unchanged work
+
+    Returns a dict with 'skipped', 'reused' and 'written' counts. The artifact
+    is skipped entirely when every entry hash matches the manifest; otherwise
+    entries whose hash is unchanged are copied raw from the previous ZIP and
+    only changed entries are compressed again, following the compression
+    policy and adding to stats if given.
+
+    A shared blob_store must already have every entry hash planned; it lets
+    identical content across entries and artifacts be compressed only once.
+
+    With stream_chunk_size set, nothing is held in memory: entries are read
+    and the ZIP is written in chunks of that size, bypassing the blob store.
+
+    A reproducible policy sorts the entries and fixes their metadata, so the
+    'digest' returned (the SHA-256 of the artifact) only changes with content.
+    """
+    if policy is None:
+        policy = CompressionPolicy()
+    if policy.reproducible:
+        entries = sorted_entries(entries)
+    options = policy.fingerprint()
+    with span('hash entries', entries=len(entries)):
+        entry_hashes = {archive_path: manifest.hash_source(file_path) for file_path, archive_path in entries}
+    own_store = blob_store is None
+    if own_store:
+        blob_store = BlobStore(policy, stats)
+        blob_store.plan(entry_hashes[archive_path] for _, archive_path in entries)
+
+    if not force and manifest.is_current(output_path, entry_hashes, options):
+        for _, archive_path in entries:
+            blob_store.release(entry_hashes[archive_path])
+        print(f"✓ Up to date: {output_path}")
+        digest = manifest.artifacts[output_path]['zip_hash']
+        if policy.reproducible:
+            print(f"  🔒 sha256 {digest}")
+        return {'skipped': True, 'reused': 0, 'written': 0, 'digest': digest}
+
+    previous = {} if force else manifest.previous_entries(output_path, options)
+    old_zip = None
+    if previous and os.path.exists(output_path):
+        try:
+            old_zip = zipfile.ZipFile(output_path, 'r')
+        except zipfile.BadZipFile:
+            old_zip = None
+
+    reused = written = 0
+    tmp_path = f"{output_path}.tmp"
+    chunk_size = stream_chunk_size or DEFAULT_CHUNK_SIZE
+    try:
+        with open(tmp_path, 'wb') as raw_output:
+            output = ChunkedWriter(raw_output, stream_chunk_size) if stream_chunk_size else raw_output
+            with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                for file_path, archive_path in entries:
+                    old_info = None
+                    if old_zip is not None and previous.get(archive_path) == entry_hashes[archive_path]:
+                        old_info = old_zip.NameToInfo.get(archive_path)
+
+                    mode = 'copy raw' if old_info is not None else 'stream' if stream_chunk_size else 'compress'
+                    with span(mode, 'file', path=archive_path) as profile:
+                        if old_info is not None:
+                            _copy_raw_entry(old_zip, old_info, zipf, chunk_size, policy.reproducible)
+                            blob_store.release(entry_hashes[archive_path])
+                            reused += 1
+                        elif stream_chunk_size:
+                            write_streamed_entry(zipf, file_path, archive_path, policy, stats, chunk_size)
+                            blob_store.release(entry_hashes[archive_path])
+                            written += 1
+                        else:
+                            blob = blob_store.get(file_path, entry_hashes[archive_path], archive_path)
+                            write_blob_entry(zipf, entry_info(file_path, archive_path, policy.reproducible), blob)
+                            written += 1
+                        if profile is not None:
+                            info = zipf.NameToInfo[archive_path]
+                            profile.update(bytes_in=info.file_size, bytes_out=info.compress_size)
+                            count('bytes in', info.file_size)
+                            count('bytes out', info.compress_size)
+                    if verbose and old_info is None:
+                        print(f"  Added: {archive_path}")
+            if stream_chunk_size:
+                output.close()
+    except BaseException:
+        discard_partial(tmp_path)
+        raise
+    finally:
+        if old_zip is not None:
+            old_zip.close()
+
+    try:
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        discard_partial(tmp_path)
+        raise
+    manifest.record(output_path, entry_hashes, options)
+    digest = manifest.artifacts[output_path]['zip_hash']
+    print(f"✓ Created: {output_path} ({written} rewritten, {reused} reused)")
+    if policy.reproducible:
+        print(f"  🔒 sha256 {digest}")
+    if own_store and blob_store.hits:
+        print(f"  ↺ {blob_store.summary()}")
+    return {'skipped': False, 'reused': reused, 'written': written, 'digest': digest}
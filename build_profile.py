@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Build profiling: timing spans, peak memory and byte counters
+The builders wrap each step (walk, stages, validation, hashing, every ZIP
+entry) in a span. While a profiler is active the spans are collected and
+can be exported as JSON or as a Chrome trace-event file, which
+chrome://tracing and ui.perfetto.dev open directly. With no active profiler
+every span is a shared no-op, so normal builds pay nothing for it.
+
+Usage:
+    python3 build_profile.py build-trace.json   # summarize a saved --profile-json file
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import contextlib
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+_DISABLED = contextlib.nullcontext()
+
+# Profiler collecting spans in this process, if any
+_active = None
+
+
+def peak_rss_kb():
+    """Peak resident memory of this process in KB, or None where unsupported"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class BuildProfiler:
+    """
+    Collects timing spans, counters and peak-memory samples
+
+    Timestamps come from the monotonic clock in nanoseconds, which is shared
+    by every process on the machine, so spans recorded in build workers line
+    up with the parent's once merged.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.counters = {}
+        self.memory = []
+
+    @contextlib.contextmanager
+    def span(self, name, category='build', **args):
+        """Time a block; yields its args dict so the block can add results such as bytes_out"""
+        start = time.perf_counter_ns()
+        try:
+            yield args
+        finally:
+            end = time.perf_counter_ns()
+            self.spans.append({'name': name, 'cat': category, 'start': start, 'end': end,
+                               'pid': os.getpid(), 'tid': threading.get_ident(), 'args': args})
+            rss = peak_rss_kb()
+            if rss is not None and (not self.memory or self.memory[-1]['kb'] != rss):
+                self.memory.append({'ts': end, 'pid': os.getpid(), 'kb': rss})
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self):
+        return {'spans': self.spans, 'counters': self.counters, 'memory': self.memory}
+
+    def merge(self, data):
+        """Add the spans and counters a worker returned from to_dict()"""
+        if not data:
+            return
+        self.spans.extend(data['spans'])
+        self.memory.extend(data['memory'])
+        for name, value in data['counters'].items():
+            self.count(name, value)
+
+    def peak_memory_kb(self):
+        """Highest peak RSS of any single process"""
+        return max((sample['kb'] for sample in self.memory), default=None)
+
+    def wall_seconds(self):
+        if not self.spans:
+            return 0.0
+        return (max(s['end'] for s in self.spans) - min(s['start'] for s in self.spans)) / 1e9
+
+    def summary(self):
+        """Per (category, name) totals, slowest first"""
+        totals = {}
+        for s in self.spans:
+            key = (s['cat'], s['name'])
+            entry = totals.setdefault(key, {'category': s['cat'], 'name': s['name'], 'calls': 0,
+                                            'total_ms': 0.0, 'max_ms': 0.0, 'bytes_in': 0, 'bytes_out': 0})
+            duration = (s['end'] - s['start']) / 1e6
+            entry['calls'] += 1
+            entry['total_ms'] += duration
+            entry['max_ms'] = max(entry['max_ms'], duration)
+            entry['bytes_in'] += s['args'].get('bytes_in', 0)
+            entry['bytes_out'] += s['args'].get('bytes_out', 0)
+        return sorted(totals.values(), key=lambda e: e['total_ms'], reverse=True)
+
+    def slowest(self, category, limit=5):
+        spans = [s for s in self.spans if s['cat'] == category]
+        return sorted(spans, key=lambda s: s['end'] - s['start'], reverse=True)[:limit]
+
+    def print_report(self):
+        """Print where the build spent its time, memory and bytes"""
+        peak = self.peak_memory_kb()
+        memory = f", peak RSS {peak / 1024:.1f} MB" if peak else ''
+        print(f"\n⏱️ Build profile: {self.wall_seconds():.2f}s wall, "
+              f"{len({s['pid'] for s in self.spans})} processes{memory}")
+        print(f"  {'step':<34} {'calls':>6} {'total ms':>10} {'max ms':>9} {'bytes in':>12} {'bytes out':>12}")
+        for entry in self.summary():
+            label = f"{entry['category']}:{entry['name']}"
+            bytes_in = f"{entry['bytes_in']:,}" if entry['bytes_in'] else ''
+            bytes_out = f"{entry['bytes_out']:,}" if entry['bytes_out'] else ''
+            print(f"  {label[:34]:<34} {entry['calls']:>6,} {entry['total_ms']:>10.1f} {entry['max_ms']:>9.1f} "
+                  f"{bytes_in:>12} {bytes_out:>12}")
+        files = self.slowest('file')
+        if files:
+            print("  Slowest entries:")
+            for s in files:
+                print(f"    {(s['end'] - s['start']) / 1e6:8.1f} ms  {s['name']:<10} {s['args'].get('path', '')}")
+        for name, value in sorted(self.counters.items()):
+            print(f"  {name}: {value:,}")
+
+    def write_json(self, path):
+        """Spans, counters and a per-step summary as JSON (times in ms from the first span)"""
+        origin = min((s['start'] for s in self.spans), default=0)
+        data = {
+            'wall_seconds': round(self.wall_seconds(), 3),
+            'peak_rss_kb': self.peak_memory_kb(),
+            'counters': self.counters,
+            'summary': [{**e, 'total_ms': round(e['total_ms'], 3), 'max_ms': round(e['max_ms'], 3)}
+                        for e in self.summary()],
+            'spans': [{'name': s['name'], 'category': s['cat'], 'pid': s['pid'],
+                       'start_ms': round((s['start'] - origin) / 1e6, 3),
+                       'duration_ms': round((s['end'] - s['start']) / 1e6, 3), **s['args']}
+                      for s in sorted(self.spans, key=lambda s: s['start'])],
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.write('\n')
+
+    def write_trace(self, path):
+        """Chrome trace-event JSON: one complete event per span, peak RSS as a counter track"""
+        origin = min((s['start'] for s in self.spans), default=0)
+        main_pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                   'args': {'name': 'builder' if pid == main_pid else f"build worker {pid}"}}
+                  for pid in sorted({s['pid'] for s in self.spans})]
+        for s in self.spans:
+            events.append({'name': s['name'], 'cat': s['cat'], 'ph': 'X', 'pid': s['pid'], 'tid': s['tid'],
+                           'ts': (s['start'] - origin) / 1000, 'dur': (s['end'] - s['start']) / 1000,
+                           'args': s['args']})
+        for sample in self.memory:
+            events.append({'name': 'peak RSS (MB)', 'ph': 'C', 'pid': sample['pid'], 'tid': 0,
+                           'ts': max(0, sample['ts'] - origin) / 1000, 'args': {'MB': round(sample['kb'] / 1024, 2)}})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': self.counters}, f)
+
+
+def activate(profiler):
+    """Make profiler (or None) collect this process's spans; returns the previous one"""
+    global _active
+    previous, _active = _active, profiler
+    return previous
+
+
+def span(name, category='build', **args):
+    """Context manager timing a block while a profiler is active; yields an args dict or None"""
+    if _active is None:
+        return _DISABLED
+    return _active.span(name, category, **args)
+
+
+def count(name, value=1):
+    """Add to a counter of the active profiler"""
+    if _active is not None:
+        _active.count(name, value)
+
+
+def finish(profiler, json_path=None, trace_path=None):
+    """Print the report and write the requested exports"""
+    if profiler is None:
+        return
+    profiler.print_report()
+    if json_path:
+        profiler.write_json(json_path)
+        print(f"📊 Profile written to {json_path}")
+    if trace_path:
+        profiler.write_trace(trace_path)
+        print(f"📊 Trace written to {trace_path} (open in chrome://tracing or ui.perfetto.dev)")
+
+
+def add_profile_args(parser):
+    """Add the --quiet and profiling options every builder shares"""
+    parser.add_argument('--quiet', action='store_true',
+                        help='Drop the per-file lines; targets, reports and errors are still printed')
+    parser.add_argument('--profile', action='store_true',
+                        help='Time every step and file, and report peak memory and bytes in/out')
+    parser.add_argument('--profile-json', metavar='PATH',
+                        help='Write the profile as JSON (implies --profile)')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='Write a Chrome trace-event file for chrome://tracing or Perfetto (implies --profile)')
+
+
+def profiler_from_args(args):
+    """A BuildProfiler when any profiling option was given, else None"""
+    if args.profile or args.profile_json or args.trace:
+        return BuildProfiler()
+    return None
+
+
+def main(argv=None):
+    """Summarize a profile saved with --profile-json"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('profile', help='JSON written by a builder with --profile-json')
+    parser.add_argument('--top', type=int, default=15, help='Steps to show (default: 15)')
+    args = parser.parse_args(argv)
+
+    with open(args.profile) as f:
+        data = json.load(f)
+    peak = data.get('peak_rss_kb')
+    print(f"⏱️ {args.profile}: {data['wall_seconds']:.2f}s wall" + (f", peak RSS {peak / 1024:.1f} MB" if peak else ''))
+    for entry in data['summary'][:args.top]:
+        label = f"{entry['category']}:{entry['name']}"
+        print(f"  {label[:34]:<34} {entry['calls']:>6,} calls {entry['total_ms']:>10.1f} ms")
+    for name, value in sorted(data['counters'].items()):
+        print(f"  {name}: {value:,}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
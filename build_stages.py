@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Optional build stages applied to ZIP entries before packaging
+A stage rewrites (file_path, archive_path) entries, writing its outputs to a
+content-addressed cache so unchanged inputs are never processed twice
+"""
+
+import os
+import json
+import hashlib
+
+from build_manifest import hash_file
+from build_profile import span
+
+CACHE_DIR = ".build-cache"
+
+# Cached output path -> the source file it was ultimately produced from
+_origins = {}
+
+
+def origin(path):
+    """The source file a (possibly cached, chained) stage output came from"""
+    return _origins.get(path, path)
+
+
+class BuildStage:
+    """
+    Base class for build stages
+
+    Subclasses set name/version, implement process() and append one record
+    per processed file to self.records: {'path', 'before', 'after', 'note'}.
+    """
+
+    name = None
+    version = 1
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.records = []
+
+    def options(self):
+        """Settings that change the stage output; part of every cache key"""
+        return {}
+
+    def cache_path(self, content_hash, suffix):
+        """Path in the stage cache for an input hash under the current options"""
+        fingerprint = json.dumps([self.version, self.options(), content_hash], sort_keys=True)
+        key = hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, self.name, f"{key}{suffix}")
+
+    def cached(self, file_path, suffix, produce):
+        """
+        Return the cached output for file_path, calling produce(data) on a miss
+
+        produce returns the output bytes, or None to keep the input unchanged.
+        Returns (output_path, hit) where output_path is file_path when unchanged.
+        """
+        output_path = self.cache_path(hash_file(file_path), suffix)
+        unchanged_marker = f"{output_path}.unchanged"
+        _origins[output_path] = origin(file_path)
+        if os.path.exists(output_path):
+            return output_path, True
+        if os.path.exists(unchanged_marker):
+            return file_path, True
+
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        output = produce(data)
+
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        if output is None:
+            open(unchanged_marker, 'w').close()
+            return file_path, False
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(output)
+        os.replace(tmp_path, output_path)
+        return output_path, False
+
+    def cached_outputs(self, file_paths, suffixes, produce):
+        """
+        Cache several outputs derived from several inputs together
+
+        produce(list_of_input_bytes) returns one bytes-or-None per suffix,
+        None meaning the input at the same index is kept. Returns
+        (output_paths, hit).
+        """
+        combined = hashlib.sha256(json.dumps([hash_file(p) for p in file_paths]).encode('utf-8')).hexdigest()
+        output_paths = [self.cache_path(combined, suffix) for suffix in suffixes]
+        for file_path, output_path in zip(file_paths, output_paths):
+            _origins[output_path] = origin(file_path)
+
+        def resolve():
+            resolved = []
+            for file_path, output_path in zip(file_paths, output_paths):
+                if os.path.exists(output_path):
+                    resolved.append(output_path)
+                elif os.path.exists(f"{output_path}.unchanged"):
+                    resolved.append(file_path)
+                else:
+                    return None
+            return resolved
+
+        resolved = resolve()
+        if resolved is not None:
+            return resolved, True
+
+        inputs = []
+        for file_path in file_paths:
+            with open(file_path, 'rb') as f:
+                inputs.append(f.read())
+        outputs = produce(inputs)
+
+        os.makedirs(os.path.dirname(output_paths[0]), exist_ok=True)
+        for output_path, output in zip(output_paths, outputs):
+            if output is None:
+                open(f"{output_path}.unchanged", 'w').close()
+                continue
+            tmp_path = f"{output_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(output)
+            os.replace(tmp_path, output_path)
+        return resolve(), False
+
+    def record(self, path, before, after, note=''):
+        self.records.append({'path': origin(path), 'before': before, 'after': after, 'note': note})
+
+    def process(self, entries):
+        """Return the rewritten list of (file_path, archive_path) entries"""
+        raise NotImplementedError
+
+    @classmethod
+    def print_report(cls, records):
+        """Print before/after byte counts for the records of one stage"""
+        if not records:
+            return
+        before = sum(r['before'] for r in records)
+        after = sum(r['after'] for r in records)
+        print(f"\n{cls.name} stage: {len(records)} files, {before:,} → {after:,} bytes "
+              f"(saved {before - after:,})")
+        for r in sorted(records, key=lambda r: r['before'] - r['after'], reverse=True):
+            note = f"  {r['note']}" if r['note'] else ''
+            print(f"  {r['path']:<70} {r['before']:>10,} → {r['after']:>10,}{note}")
+
+
+def run_stages(stages, entries):
+    """Run each stage over the entries in order"""
+    for stage in stages or []:
+        with span(stage.name, 'stage', entries=len(entries)):
+            entries = stage.process(entries)
+    return entries
+
+
+def drain_stage_records(stages):
+    """
+    Stage records keyed by stage name, for returning from worker processes
+    Records are cleared so a stage reused across targets reports each file once
+    """
+    drained = {}
+    for stage in stages or []:
+        drained[stage.name] = stage.records
+        stage.records = []
+    return drained
+
+
+def print_stage_reports(stages, records_by_stage):
+    """Print every stage's report from merged worker records"""
+    for stage in stages or []:
+        stage.print_report(records_by_stage.get(stage.name, []))
@@ -1,43 +1,269 @@
 #!/usr/bin/env python3
 """
 Clean debugging statements from JavaScript files while preserving syntax
+Calls are found with a tokenizer, so nested parentheses, strings, template
+literals and comments are never cut through; console.error is kept
+
+Usage:
+    python3 clean_debug.py            # clean every fragment and client-extension JS file
+    python3 clean_debug.py --check    # report what would be removed, exit 1 if anything
 """
 
-import re
 import os
+import sys
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from build_stages import BuildStage
+from js_tokenizer import tokenize, matching_paren
+
+# console.error and console.assert report real failures and stay in production
+DEBUG_METHODS = frozenset({
+    'log', 'warn', 'info', 'debug', 'trace', 'table', 'dir', 'dirxml',
+    'group', 'groupCollapsed', 'groupEnd', 'time', 'timeEnd', 'timeLog', 'count',
+})
+
+# Tokens after which a console call starts a new statement
+STATEMENT_START = frozenset({';', '{', '}'})
+
+# Tokens after a call that mean its result is used further (member access, call, exponent)
+RESULT_USED = frozenset({'.', '?.', '(', '[', '**'})
+
+
+def _next_significant(tokens, index):
+    for position in range(index, len(tokens)):
+        if tokens[position].significant:
+            return position
+    return None
+
+
+def _previous_significant(tokens, index):
+    for position in range(index - 1, -1, -1):
+        if tokens[position].significant:
+            return position
+    return None
+
+
+def _statement_ends(tokens, close, following):
+    """Whether the call closed at tokens[close] is a complete expression statement"""
+    if following is None:
+        return True
+    token = tokens[following]
+    if token.kind == 'punct' and token.value in (';', '}'):
+        return True
+    # Automatic semicolon insertion: a line break followed by a new statement
+    line_break = any('\n' in t.value for t in tokens[close + 1:following])
+    return line_break and token.kind in ('name', 'string', 'number')
+
+
+def find_debug_calls(tokens, methods=DEBUG_METHODS):
+    """
+    Locate console.<method>(...) calls in a token list
+
+    Returns (first, last, action, method) tuples: action 'remove' means the
+    call is a whole statement (last includes its ';'), 'void' means the call
+    sits inside an expression and is replaced by 'void 0'.
+    """
+    calls = []
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        if not (token.kind == 'name' and token.value == 'console'):
+            index += 1
+            continue
+
+        previous = _previous_significant(tokens, index)
+        if previous is not None and tokens[previous].value in ('.', '?.', 'new'):
+            index += 1
+            continue
+        dot = _next_significant(tokens, index + 1)
+        method = _next_significant(tokens, dot + 1) if dot is not None else None
+        paren = _next_significant(tokens, method + 1) if method is not None else None
+        if (paren is None or tokens[dot].value != '.' or tokens[method].value not in methods
+                or tokens[paren].value != '('):
+            index += 1
+            continue
+        close = matching_paren(tokens, paren)
+        if close is None:
+            index += 1
+            continue
+
+        following = _next_significant(tokens, close + 1)
+        if following is not None and tokens[following].kind in ('punct', 'template') and (
+                tokens[following].value in RESULT_USED or tokens[following].kind == 'template'):
+            # console.log(x).foo or a tagged template: leave it alone
+            index = close + 1
+            continue
+
+        at_statement_start = previous is None or tokens[previous].value in STATEMENT_START
+        if at_statement_start and _statement_ends(tokens, close, following):
+            last = following if following is not None and tokens[following].value == ';' else close
+            calls.append((index, last, 'remove', tokens[method].value))
+        else:
+            calls.append((index, close, 'void', tokens[method].value))
+        index = close + 1
+    return calls
+
+
+def strip_debug_calls(source, methods=DEBUG_METHODS):
+    """
+    Remove console debug calls from JavaScript source
+
+    Statement calls are deleted, along with their line when nothing else is on
+    it; calls inside expressions (a && console.log(b)) become 'void 0'.
+    Returns (cleaned_source, [(line_number, method), ...]).
+    """
+    tokens = tokenize(source)
+    calls = find_debug_calls(tokens, methods)
+    if not calls:
+        return source, []
+
+    output = []
+    removed = []
+    cursor = 0
+    for first, last, action, method in calls:
+        start = tokens[first].start
+        end = tokens[last].end
+        removed.append((source.count('\n', 0, start) + 1, method))
+
+        if action == 'void':
+            output.append(source[cursor:start])
+            output.append('void 0')
+            cursor = end
+            continue
+
+        line_start = source.rfind('\n', 0, start) + 1
+        line_end = source.find('\n', end)
+        line_end = len(source) if line_end == -1 else line_end
+        if (line_start >= cursor and not source[line_start:start].strip()
+                and not source[end:line_end].strip()):
+            # The call is alone on its line(s): drop the whole line
+            output.append(source[cursor:line_start])
+            cursor = min(line_end + 1, len(source))
+        else:
+            output.append(source[cursor:start])
+            cursor = end
+            while cursor < len(source) and source[cursor] in ' \t':
+                cursor += 1
+    output.append(source[cursor:])
+    return ''.join(output), removed
 
-def clean_js_file(file_path):
-    """Remove console.log and console.warn statements while preserving console.error"""
-    
-    with open(file_path, 'r') as f:
+
+def clean_js_file(file_path, write=True):
+    """Strip debug calls from one file; returns a report dict with byte counts"""
+    with open(file_path, 'r', encoding='utf-8') as f:
         content = f.read()
-    
-    # Remove console.log lines
-    content = re.sub(r'^\s*console\.log\([^)]*\);\s*\n', '', content, flags=re.MULTILINE)
-    
-    # Remove console.warn lines  
-    content = re.sub(r'^\s*console\.warn\([^)]*\);\s*\n', '', content, flags=re.MULTILINE)
-    
-    # Remove multi-line console.log statements
-    content = re.sub(r'^\s*console\.log\([^;]*?\);\s*\n', '', content, flags=re.MULTILINE | re.DOTALL)
-    
-    # Remove debug blocks like === DEBUG === 
-    content = re.sub(r'^\s*console\.log\(\'===.*?===\'\);\s*\n', '', content, flags=re.MULTILINE)
-    
-    # Clean up multiple empty lines
-    content = re.sub(r'\n\s*\n\s*\n', '\n\n', content)
-    
-    with open(file_path, 'w') as f:
-        f.write(content)
-    
-    print(f"Cleaned {file_path}")
-
-# Clean header file
-header_file = 'fragment-collection/johnson-matthey-collection/jm-header/index.js'
-clean_js_file(header_file)
-
-# Clean footer file  
-footer_file = 'fragment-collection/johnson-matthey-collection/jm-footer/index.js'
-clean_js_file(footer_file)
-
-print("JavaScript files cleaned!")
\ No newline at end of file
+
+    cleaned, removed = strip_debug_calls(content)
+    if write and removed:
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(cleaned)
+
+    return {
+        'path': file_path,
+        'before': len(content.encode('utf-8')),
+        'after': len(cleaned.encode('utf-8')),
+        'calls': removed,
+    }
+
+
+def find_js_files(base_dir="."):
+    """Every fragment and client-extension JavaScript source under base_dir"""
+    patterns = [
+        os.path.join(base_dir, 'fragment-collection', '*', '*', '*.js'),
+        os.path.join(base_dir, '*-client-extension', '**', '*.js'),
+    ]
+    paths = set()
+    for pattern in patterns:
+        for path in glob.glob(pattern, recursive=True):
+            if 'node_modules' not in path.split(os.sep) and not path.endswith('.min.js'):
+                paths.add(os.path.normpath(path))
+    return sorted(paths)
+
+
+def clean_all(paths, write=True, jobs=None):
+    """Clean files in parallel worker processes; returns reports in path order"""
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(paths) or 1))
+    if jobs == 1:
+        return [clean_js_file(path, write) for path in paths]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(clean_js_file, paths, [write] * len(paths)))
+
+
+def print_report(reports):
+    """Print bytes removed per file, largest saving first"""
+    changed = [r for r in reports if r['calls']]
+    print(f"\nDebug statements: {sum(len(r['calls']) for r in changed)} calls in {len(changed)} of "
+          f"{len(reports)} files")
+    for r in sorted(changed, key=lambda r: r['before'] - r['after'], reverse=True):
+        methods = ', '.join(sorted({method for _, method in r['calls']}))
+        print(f"  {r['path']:<80} -{r['before'] - r['after']:>6,} bytes  "
+              f"{len(r['calls'])} × console.{{{methods}}}")
+    print(f"  {'Total':<80} -{sum(r['before'] - r['after'] for r in changed):>6,} bytes")
+
+
+class DebugStripStage(BuildStage):
+    """
+    Build stage that strips console debug calls from .js entries
+
+    Sources on disk are left untouched; only the packaged copies are cleaned.
+    """
+
+    name = 'debug'
+    version = 1
+
+    def __init__(self, methods=DEBUG_METHODS, **kwargs):
+        super().__init__(**kwargs)
+        self.methods = frozenset(methods)
+        self._seen = set()
+
+    def options(self):
+        return {'methods': sorted(self.methods)}
+
+    def _strip(self, data):
+        cleaned, removed = strip_debug_calls(data.decode('utf-8'), self.methods)
+        return cleaned.encode('utf-8') if removed else None
+
+    def process(self, entries):
+        output = []
+        for file_path, archive_path in entries:
+            if not archive_path.endswith('.js') or archive_path.endswith('.min.js'):
+                output.append((file_path, archive_path))
+                continue
+            cleaned_path, hit = self.cached(file_path, '.js', self._strip)
+            if cleaned_path != file_path and file_path not in self._seen:
+                self._seen.add(file_path)
+                self.record(file_path, os.path.getsize(file_path), os.path.getsize(cleaned_path),
+                            'cached' if hit else '')
+            output.append((cleaned_path, archive_path))
+        return output
+
+
+def main(argv=None):
+    """Clean every fragment and client-extension JS file in one parallel pass"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('paths', nargs='*', help='Files to clean (default: all fragment and client-extension JS)')
+    parser.add_argument('--check', action='store_true',
+                        help='Only report debug statements; exit 1 if any are found')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Worker processes (default: available cores)')
+    args = parser.parse_args(argv)
+
+    paths = args.paths or find_js_files()
+    reports = clean_all(paths, write=not args.check, jobs=args.jobs)
+    print_report(reports)
+
+    found = any(r['calls'] for r in reports)
+    if args.check:
+        if found:
+            print("❌ Debug statements found (run without --check to remove them)")
+        else:
+            print("✅ No debug statements found")
+        return not found
+    print("✅ JavaScript files cleaned!")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
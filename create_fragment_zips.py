@@ -5,9 +5,22 @@ Based on Liferay Fragment ZIP Structure Requirements
 """
 
 import os
-import zipfile
+import sys
 import json
-from pathlib import Path
+import time
+
+from build_manifest import BuildManifest, write_zip_incremental
+from zip_policy import CompressionPolicy, PolicyStats
+from blob_store import BlobStore, dedupe_report
+from zip_reproducible import print_digests
+from build_stages import run_stages
+from build_collections import build_parser, policy_from_args, stages_from_args
+from budgets import BUDGET_FILE, BudgetError, check_collection_budgets, print_budget_report
+from fragment_templates import TEMPLATE_ROOT, TemplateError, generate_for_build, generate_fragments, templated_fragment_dirs
+from file_watcher import DEFAULT_DEBOUNCE, create_watcher, watch_batches, InotifyWatcher
+from build_profile import activate, span, finish, profiler_from_args
+
+COLLECTION_DIR = "fragment-collection/johnson-matthey-collection"
 
 # Fragment names and their metadata
 FRAGMENTS = {
@@ -52,7 +65,6 @@ def create_thumbnail(fragment_path):
     """Create a thumbnail only if one doesn't exist"""
     thumbnail_path = os.path.join(fragment_path, 'thumbnail.png')
     if os.path.exists(thumbnail_path):
-        print(f"✓ Using existing thumbnail: {thumbnail_path}")
         return
         
     # Create placeholder thumbnail only if none exists
@@ -76,8 +88,17 @@ def create_fragment_json(fragment_path, fragment_key, fragment_data):
         "icon": fragment_data['icon']
     }
     
-    with open(os.path.join(fragment_path, 'fragment.json'), 'w') as f:
-        json.dump(fragment_json, f, indent=2)
+    # Only write when the metadata changed, so the file's hash and mtime stay put between builds
+    content = json.dumps(fragment_json, indent=2)
+    path = os.path.join(fragment_path, 'fragment.json')
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            if f.read() == content:
+                return False
+    with open(path, 'w') as f:
+        f.write(content)
+    print(f"✓ Wrote {path}")
+    return True
 
 def rename_fragment_files(fragment_path):
     """Rename fragment files to Liferay naming convention"""
@@ -93,110 +114,202 @@ def rename_fragment_files(fragment_path):
             os.rename(old_path, new_path)
             print(f"Renamed {old_name} to {new_name} in {fragment_path}")
 
-def prepare_fragments():
-    """Prepare all fragments with required files and naming"""
+def prepare_fragments(verbose=True):
+    """
+    Prepare all fragments with required files and naming
+    Fragments generated from fragment-templates/ already carry their
+    fragment.json, so only the template generator writes it
+    """
     base_path = "fragment-collection/johnson-matthey-collection"
+    templated = templated_fragment_dirs(['jm'])
     
     for fragment_key, fragment_data in FRAGMENTS.items():
         fragment_path = os.path.join(base_path, fragment_key)
         
         if os.path.exists(fragment_path):
-            print(f"Processing fragment: {fragment_key}")
-            
-            # Rename files to Liferay convention
+            # Each step is a no-op when the fragment is already in shape
             rename_fragment_files(fragment_path)
-            
-            # Create fragment.json
-            create_fragment_json(fragment_path, fragment_key, fragment_data)
-            
-            # Create thumbnail.png
+            if os.path.normpath(fragment_path) not in templated:
+                create_fragment_json(fragment_path, fragment_key, fragment_data)
             create_thumbnail(fragment_path)
-            
-            print(f"✓ Fragment {fragment_key} prepared")
+            if verbose:
+                print(f"✓ Fragment {fragment_key} prepared")
         else:
             print(f"⚠ Fragment path not found: {fragment_path}")
 
-def create_individual_fragment_zips():
-    """Create individual ZIP files for each fragment"""
+def individual_fragment_zip_entries(fragment_keys=None):
+    """Collect (file_path, archive_path) entries for each individual fragment ZIP (or only the given ones)"""
     base_path = "fragment-collection/johnson-matthey-collection"
     output_dir = "fragment-zips"
+    artifacts = {}
     
-    # Create output directory
-    os.makedirs(output_dir, exist_ok=True)
-    
-    for fragment_key in FRAGMENTS.keys():
+    for fragment_key in FRAGMENTS.keys() if fragment_keys is None else fragment_keys:
         fragment_path = os.path.join(base_path, fragment_key)
         
         if os.path.exists(fragment_path):
             zip_filename = os.path.join(output_dir, f"{fragment_key}.zip")
             
-            with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # Add all files in the fragment directory
-                for root, dirs, files in os.walk(fragment_path):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        # Create archive path: fragment-name/filename
-                        archive_path = os.path.join(fragment_key, os.path.relpath(file_path, fragment_path))
-                        zipf.write(file_path, archive_path)
-            
-            print(f"✓ Created individual ZIP: {zip_filename}")
+            # Add all files in the fragment directory
+            entries = []
+            for root, dirs, files in os.walk(fragment_path):
+                for file in files:
+                    if file == BUDGET_FILE:
+                        continue
+                    file_path = os.path.join(root, file)
+                    # Create archive path: fragment-name/filename
+                    archive_path = os.path.join(fragment_key, os.path.relpath(file_path, fragment_path))
+                    entries.append((file_path, archive_path))
+            artifacts[zip_filename] = entries
+    
+    return artifacts
 
-def create_collection_zip():
-    """Create complete fragment collection ZIP with proper structure"""
+def collection_zip_entries():
+    """Collect (file_path, archive_path) entries for the complete collection ZIP"""
     collection_name = "johnson-matthey-collection"
     base_path = f"fragment-collection/{collection_name}"
     zip_filename = f"{collection_name}.zip"
+    entries = []
     
-    with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        # Add collection.json at root
-        collection_json_path = os.path.join(base_path, "collection.json")
-        if os.path.exists(collection_json_path):
-            zipf.write(collection_json_path, f"{collection_name}/collection.json")
-        
-        # Add all fragments
-        for fragment_key in FRAGMENTS.keys():
-            fragment_path = os.path.join(base_path, fragment_key)
-            
-            if os.path.exists(fragment_path):
-                for root, dirs, files in os.walk(fragment_path):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        # Create archive path: collection-name/fragment-name/filename
-                        rel_path = os.path.relpath(file_path, base_path)
-                        archive_path = f"{collection_name}/{rel_path}"
-                        zipf.write(file_path, archive_path)
+    # Add collection.json at root
+    collection_json_path = os.path.join(base_path, "collection.json")
+    if os.path.exists(collection_json_path):
+        entries.append((collection_json_path, f"{collection_name}/collection.json"))
+    
+    # Add all fragments
+    for fragment_key in FRAGMENTS.keys():
+        fragment_path = os.path.join(base_path, fragment_key)
         
-        # Add resources directory if it exists
-        resources_path = os.path.join(base_path, "resources")
-        if os.path.exists(resources_path):
-            for root, dirs, files in os.walk(resources_path):
+        if os.path.exists(fragment_path):
+            for root, dirs, files in os.walk(fragment_path):
                 for file in files:
+                    if file == BUDGET_FILE:
+                        continue
                     file_path = os.path.join(root, file)
-                    # Create archive path: collection-name/resources/filename
+                    # Create archive path: collection-name/fragment-name/filename
                     rel_path = os.path.relpath(file_path, base_path)
                     archive_path = f"{collection_name}/{rel_path}"
-                    zipf.write(file_path, archive_path)
-            print("✓ Added resources directory to collection ZIP")
+                    entries.append((file_path, archive_path))
+    
+    # Add resources directory if it exists
+    resources_path = os.path.join(base_path, "resources")
+    if os.path.exists(resources_path):
+        for root, dirs, files in os.walk(resources_path):
+            for file in files:
+                file_path = os.path.join(root, file)
+                # Create archive path: collection-name/resources/filename
+                rel_path = os.path.relpath(file_path, base_path)
+                archive_path = f"{collection_name}/{rel_path}"
+                entries.append((file_path, archive_path))
     
-    print(f"✓ Created collection ZIP: {zip_filename}")
+    return zip_filename, entries
+
+def create_individual_fragment_zips(artifacts, manifest, force=False, policy=None, stats=None, blob_store=None,
+                                    stream_chunk_size=None, verbose=True):
+    """Create individual ZIP files for each fragment, skipping unchanged ones"""
+    # Create output directory
+    os.makedirs("fragment-zips", exist_ok=True)
+    
+    for zip_filename, entries in artifacts.items():
+        with span('write zip', zip=zip_filename, entries=len(entries)):
+            result = write_zip_incremental(zip_filename, entries, manifest, force=force, verbose=False,
+                                           policy=policy, stats=stats, blob_store=blob_store,
+                                           stream_chunk_size=stream_chunk_size)
+        if not result['skipped'] and verbose:
+            print(f"✓ Created individual ZIP: {zip_filename}")
+
+def create_collection_zip(zip_filename, entries, manifest, force=False, policy=None, stats=None, blob_store=None,
+                          stream_chunk_size=None):
+    """Create complete fragment collection ZIP with proper structure"""
+    if any(archive_path.split('/')[1] == 'resources' for _, archive_path in entries):
+        print("✓ Added resources directory to collection ZIP")
+    
+    with span('write zip', zip=zip_filename, entries=len(entries)):
+        write_zip_incremental(zip_filename, entries, manifest, force=force, verbose=False,
+                              policy=policy, stats=stats, blob_store=blob_store,
+                              stream_chunk_size=stream_chunk_size)
     return zip_filename
 
-def main():
+def check_budgets(enforce=True):
+    """Check the collection's performance budgets; False if the build should stop"""
+    try:
+        violations, checked = check_collection_budgets("fragment-collection/johnson-matthey-collection")
+    except BudgetError as e:
+        print(f"❌ {e}")
+        return False
+    if violations:
+        print_budget_report(violations)
+        return not enforce
+    if checked:
+        print(f"✓ Within performance budget ({checked} budgets checked)")
+    return True
+
+def main(force=False, policy=None, report_duplicates=False, stages=None, stream_chunk_size=None,
+         enforce_budgets=True, profiler=None, verbose=True):
     """Main function to create all fragment ZIPs"""
+    activate(profiler)
     print("🚀 Creating Liferay Fragment Collection ZIPs...")
     print("=" * 50)
     
     # Step 1: Prepare all fragments
     print("\n📁 Preparing fragments...")
-    prepare_fragments()
+    with span('regenerate templates'):
+        if not generate_for_build(['jm']):
+            return False
+    with span('prepare fragments'):
+        prepare_fragments(verbose)
+    
+    print("\n📏 Checking performance budgets...")
+    with span('budgets'):
+        budgets_ok = check_budgets(enforce_budgets)
+    if not budgets_ok:
+        print("\n❌ Build stopped: fix the assets or raise the budget in performance-budget.json")
+        return False
+    
+    # Unchanged fragments are skipped using the persistent build manifest
+    manifest = BuildManifest()
+    if policy is None:
+        policy = CompressionPolicy()
+    stats = PolicyStats()
+    
+    # Every fragment file lands in both its own ZIP and the collection ZIP,
+    # so plan all entries up front and compress each unique blob once
+    with span('walk'):
+        fragment_artifacts = individual_fragment_zip_entries()
+        collection_zip, collection_entries = collection_zip_entries()
+    
+    # Optional build stages rewrite entries to cached, processed copies
+    fragment_artifacts = {zip_filename: run_stages(stages, entries)
+                          for zip_filename, entries in fragment_artifacts.items()}
+    collection_entries = run_stages(stages, collection_entries)
+    if report_duplicates:
+        dedupe_report({collection_zip: collection_entries}, manifest.hash_source, policy)
+        return True
+    
+    blob_store = BlobStore(policy, stats)
+    with span('plan blobs'):
+        for entries in list(fragment_artifacts.values()) + [collection_entries]:
+            blob_store.plan(manifest.hash_source(file_path) for file_path, _ in entries)
     
     # Step 2: Create individual fragment ZIPs
     print("\n📦 Creating individual fragment ZIPs...")
-    create_individual_fragment_zips()
+    with span('fragment zips', zips=len(fragment_artifacts)):
+        create_individual_fragment_zips(fragment_artifacts, manifest, force, policy, stats, blob_store,
+                                        stream_chunk_size, verbose)
     
     # Step 3: Create complete collection ZIP
     print("\n🗂️ Creating fragment collection ZIP...")
-    collection_zip = create_collection_zip()
+    with span('collection zip'):
+        create_collection_zip(collection_zip, collection_entries, manifest, force, policy, stats, blob_store,
+                              stream_chunk_size)
+    with span('save manifest'):
+        manifest.save()
+    if policy.reproducible:
+        print_digests({zip_path: manifest.artifacts[zip_path]['zip_hash']
+                       for zip_path in list(fragment_artifacts) + [collection_zip]})
+    stats.print_report(policy)
+    print(f"✓ Deduplication: {blob_store.summary()}")
+    for stage in stages or []:
+        stage.print_report(stage.records)
     
     print("\n" + "=" * 50)
     print("✅ All fragment ZIPs created successfully!")
@@ -205,6 +318,132 @@ def main():
     print("\n💡 Ready for Liferay deployment:")
     print("   • Individual ZIPs can be imported one by one")
     print("   • Collection ZIP imports all fragments at once")
+    return True
+
+def affected_fragments(paths):
+    """
+    Sort changed paths into (fragment keys, collection_changed, templates_changed)
+    Anything in the collection outside a fragment (collection.json, resources/) only affects the collection ZIP
+    """
+    fragments = set()
+    collection_changed = templates_changed = False
+    for path in paths:
+        relative = os.path.relpath(path)
+        if relative.split(os.sep)[0] == TEMPLATE_ROOT:
+            templates_changed = True
+        elif relative.startswith(COLLECTION_DIR + os.sep):
+            name = relative[len(COLLECTION_DIR) + 1:].split(os.sep)[0]
+            if name in FRAGMENTS:
+                fragments.add(name)
+            else:
+                collection_changed = True
+    return fragments, collection_changed, templates_changed
+
+def rebuild_changed(paths, manifest, policy, stages=None, stream_chunk_size=None, enforce_budgets=True):
+    """
+    Repackage only what a batch of changed paths affects
+
+    The ZIPs of the affected fragments are rewritten and the collection ZIP
+    recompresses just the changed entries, copying the rest raw from the
+    previous build. Returns {zip_path: write result}, or None if nothing
+    needed repackaging or the change was rejected.
+    """
+    fragments, collection_changed, templates_changed = affected_fragments(paths)
+    if templates_changed:
+        try:
+            reports = generate_fragments(['jm'])
+        except TemplateError as e:
+            print(f"❌ {e}")
+            return None
+        fragments |= {os.path.basename(os.path.dirname(r['path'])) for r in reports if r['status'] != 'unchanged'}
+    if not fragments and not collection_changed:
+        return None
+    if not check_budgets(enforce_budgets):
+        print("❌ Not repackaged: fix the assets or raise the budget in performance-budget.json")
+        return None
+    
+    for stage in stages or []:
+        stage.records = []
+    stats = PolicyStats()
+    fragment_artifacts = {zip_filename: run_stages(stages, entries)
+                          for zip_filename, entries in individual_fragment_zip_entries(sorted(fragments)).items()}
+    collection_zip, collection_entries = collection_zip_entries()
+    collection_entries = run_stages(stages, collection_entries)
+    
+    blob_store = BlobStore(policy, stats)
+    for entries in list(fragment_artifacts.values()) + [collection_entries]:
+        blob_store.plan(manifest.hash_source(file_path) for file_path, _ in entries)
+    
+    results = {}
+    for zip_filename, entries in list(fragment_artifacts.items()) + [(collection_zip, collection_entries)]:
+        results[zip_filename] = write_zip_incremental(zip_filename, entries, manifest, verbose=False, policy=policy,
+                                                      stats=stats, blob_store=blob_store,
+                                                      stream_chunk_size=stream_chunk_size)
+    manifest.save()
+    return results
+
+def watch(policy=None, stages=None, stream_chunk_size=None, enforce_budgets=True, debounce=DEFAULT_DEBOUNCE,
+          polling=False):
+    """Build once, then repackage affected ZIPs on every change until interrupted"""
+    if not main(policy=policy, stages=stages, stream_chunk_size=stream_chunk_size, enforce_budgets=enforce_budgets):
+        print("⚠️ Initial build failed; watching for fixes")
+    
+    # One manifest for the whole session: sources are re-hashed only when their mtime or size changes
+    manifest = BuildManifest()
+    if policy is None:
+        policy = CompressionPolicy()
+    roots = [COLLECTION_DIR] + ([TEMPLATE_ROOT] if os.path.isdir(TEMPLATE_ROOT) else [])
+    watcher = create_watcher(roots, polling)
+    mode = 'inotify' if isinstance(watcher, InotifyWatcher) else 'polling'
+    print(f"\n👀 Watching {', '.join(roots)} ({mode}, {debounce * 1000:.0f} ms debounce). Press Ctrl+C to stop.")
+    
+    try:
+        for changed, first_event in watch_batches(watcher, debounce):
+            started = time.perf_counter()
+            names = sorted(os.path.relpath(path) for path in changed)
+            print(f"\n🔄 {len(names)} changed: {', '.join(names[:3])}{', …' if len(names) > 3 else ''}")
+            results = rebuild_changed(changed, manifest, policy, stages, stream_chunk_size, enforce_budgets)
+            finished = time.perf_counter()
+            if results is None:
+                continue
+            if all(r['skipped'] for r in results.values()):
+                print("✓ Nothing to repackage (content unchanged)")
+                continue
+            rewritten = sum(r['written'] for r in results.values())
+            print(f"⚡ Rebuilt in {(finished - started) * 1000:.0f} ms "
+                  f"({(finished - first_event) * 1000:.0f} ms after the first change), "
+                  f"{rewritten} entr{'y' if rewritten == 1 else 'ies'} recompressed")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    finally:
+        watcher.close()
+    return True
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # The shared builder options, minus brand selection and worker count (one
+    # collection, built in-process) and asset fingerprinting (no client extension)
+    parser = build_parser(__doc__.strip().splitlines()[0], exclude=('only', 'jobs', 'fingerprint_assets'))
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and repackage only the affected ZIPs whenever a source changes')
+    parser.add_argument('--debounce', type=int, default=int(DEFAULT_DEBOUNCE * 1000),
+                        help=f'With --watch, milliseconds of quiet before rebuilding (default: {int(DEFAULT_DEBOUNCE * 1000)})')
+    parser.add_argument('--poll', action='store_true',
+                        help='With --watch, poll file stats instead of using inotify')
+    args = parser.parse_args()
+    stages = stages_from_args(args)
+    policy = policy_from_args(args)
+    profiler = profiler_from_args(args)
+    if args.watch:
+        success = watch(policy=policy, stages=stages, stream_chunk_size=args.chunk_size if args.stream else None,
+                        enforce_budgets=not args.ignore_budgets, debounce=args.debounce / 1000, polling=args.poll)
+        sys.exit(0 if success else 1)
+    success = main(force=args.force,
+                   policy=policy,
+                   report_duplicates=args.dedupe_report,
+                   stages=stages,
+                   stream_chunk_size=args.chunk_size if args.stream else None,
+                   enforce_budgets=not args.ignore_budgets,
+                   profiler=profiler,
+                   verbose=not args.quiet)
+    finish(profiler, args.profile_json, args.trace)
+    sys.exit(0 if success else 1)
\ No newline at end of file
@@ -0,0 +1,585 @@
+#!/usr/bin/env python3
+"""
+Critical CSS extraction and inlining for hero fragments
+Parses each hero fragment's index.html, finds the CSS rules that style what is
+visible on first paint, inlines them in a <style> block and leaves the rest in
+index.css, so hand-maintained inline copies can no longer drift
+
+Usage:
+    python3 critical_css.py fragment-collection/ybs-collection/ybs-hero
+"""
+
+import os
+import re
+import sys
+import argparse
+from html.parser import HTMLParser
+
+from build_stages import BuildStage, origin
+from minify import minify_css
+
+# Interaction states never apply on first paint
+DEFERRED_PSEUDO_CLASSES = frozenset({
+    'hover', 'focus', 'active', 'focus-visible', 'focus-within', 'visited', 'target',
+})
+
+# Selectors for page context outside the fragment markup
+PAGE_CONTEXT_TAGS = frozenset({'html', 'body', ':root'})
+
+HIDDEN_TAGS = frozenset({'template', 'dialog', 'noscript', 'script', 'style'})
+
+VOID_TAGS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'source', 'track', 'wbr',
+})
+
+# Stand-in for a FreeMarker ${...} expression whose value is unknown at build time
+DYNAMIC = '\x00'
+
+_STYLE_BLOCK = re.compile(r'<style\b[^>]*>(.*?)</style>\s*', re.IGNORECASE | re.DOTALL)
+# [#if ...]style="display: none;"[/#if] inside a tag: the condition is unknown, so drop it
+_INLINE_CONDITIONAL = re.compile(r'\[#if[^\]]*\][^<>\[]*\[/#if\]')
+_FREEMARKER_DIRECTIVE = re.compile(r'\[/?[#@][^\]]*\]|</?#[^>]*>')
+_FREEMARKER_EXPRESSION = re.compile(r'\$\{[^}]*\}')
+_DISPLAY_NONE = re.compile(r'(?:^|;)\s*display\s*:\s*none', re.IGNORECASE)
+
+
+class Element:
+    """A parsed HTML element with the bits selector matching needs"""
+
+    __slots__ = ('tag', 'attrs', 'classes', 'parent', 'children')
+
+    def __init__(self, tag, attrs, parent):
+        self.tag = tag
+        self.attrs = attrs
+        self.classes = (attrs.get('class') or '').split()
+        self.parent = parent
+        self.children = []
+
+    def has_class(self, name):
+        for value in self.classes:
+            if value == name:
+                return True
+            if DYNAMIC in value:
+                prefix, _, suffix = value.partition(DYNAMIC)
+                if name.startswith(prefix) and name.endswith(suffix.replace(DYNAMIC, '')):
+                    return True
+        return False
+
+    def ancestors(self):
+        node = self.parent
+        while node is not None:
+            yield node
+            node = node.parent
+
+    def previous_siblings(self):
+        if self.parent is None:
+            return []
+        siblings = self.parent.children
+        return list(reversed(siblings[:siblings.index(self)]))
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element('#fragment', {}, None)
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        element = Element(tag, {name: value or '' for name, value in attrs}, self.current)
+        self.current.children.append(element)
+        if tag not in VOID_TAGS:
+            self.current = element
+
+    def handle_startendtag(self, tag, attrs):
+        element = Element(tag, {name: value or '' for name, value in attrs}, self.current)
+        self.current.children.append(element)
+
+    def handle_endtag(self, tag):
+        node = self.current
+        while node is not None and node.tag != tag:
+            node = node.parent
+        if node is not None and node.parent is not None:
+            self.current = node.parent
+
+
+def split_inline_styles(html):
+    """Return (html_without_style_blocks, [css, ...]) for a fragment template"""
+    styles = [match.group(1) for match in _STYLE_BLOCK.finditer(html)]
+    return _STYLE_BLOCK.sub('', html), styles
+
+
+def parse_fragment_html(html):
+    """Parse a FreeMarker fragment template into an Element tree"""
+    html = _INLINE_CONDITIONAL.sub('', html)
+    html = _FREEMARKER_DIRECTIVE.sub('', html)
+    html = _FREEMARKER_EXPRESSION.sub(DYNAMIC, html)
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+# --- CSS parsing ---------------------------------------------------------
+
+class CSSNode:
+    """A top-level or nested CSS item: a rule, an at-rule block or an at-rule statement"""
+
+    __slots__ = ('kind', 'prelude', 'body', 'children')
+
+    def __init__(self, kind, prelude, body=None, children=None):
+        self.kind = kind  # 'rule', 'block' (e.g. @media) or 'statement' (e.g. @import)
+        self.prelude = prelude.strip()
+        self.body = body
+        self.children = children
+
+    def to_css(self, indent=''):
+        if self.kind == 'statement':
+            return f"{indent}{self.prelude};\n"
+        if self.kind == 'block' and self.children is not None:
+            inner = ''.join(child.to_css(indent + '  ') for child in self.children)
+            return f"{indent}{self.prelude} {{\n{inner}{indent}}}\n"
+        return f"{indent}{self.prelude} {{{self.body}}}\n"
+
+
+def _strip_comments(css):
+    return re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+
+
+def _find_block_end(css, start):
+    """Index just past the '}' matching the '{' at css[start]"""
+    depth = 0
+    i = start
+    while i < len(css):
+        char = css[i]
+        if char in '"\'':
+            end = css.find(char, i + 1)
+            i = len(css) if end == -1 else end + 1
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(css)
+
+
+# At-rules whose body is a list of rules rather than declarations
+NESTED_AT_RULES = ('@media', '@supports', '@layer', '@container', '@document')
+
+
+def parse_css(css):
+    """Parse a stylesheet into CSSNodes (comments dropped)"""
+    css = _strip_comments(css)
+    nodes = []
+    i = 0
+    while i < len(css):
+        while i < len(css) and css[i].isspace():
+            i += 1
+        if i >= len(css):
+            break
+        brace = css.find('{', i)
+        semicolon = css.find(';', i)
+        if css[i] == '@' and semicolon != -1 and (brace == -1 or semicolon < brace):
+            nodes.append(CSSNode('statement', css[i:semicolon]))
+            i = semicolon + 1
+            continue
+        if brace == -1:
+            break
+        prelude = css[i:brace]
+        end = _find_block_end(css, brace)
+        body = css[brace + 1:end - 1]
+        if prelude.strip().lower().startswith(NESTED_AT_RULES):
+            nodes.append(CSSNode('block', prelude, children=parse_css(body)))
+        elif prelude.strip().startswith('@'):
+            nodes.append(CSSNode('block', prelude, body=body))
+        else:
+            nodes.append(CSSNode('rule', prelude, body=body))
+        i = end
+    return nodes
+
+
+# --- Selector matching ---------------------------------------------------
+
+def _split_top_level(text, separator):
+    parts = []
+    depth = 0
+    current = ''
+    quote = None
+    for char in text:
+        if quote:
+            current += char
+            if char == quote:
+                quote = None
+            continue
+        if char in '"\'':
+            quote = char
+        elif char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(current)
+            current = ''
+            continue
+        current += char
+    parts.append(current)
+    return [part.strip() for part in parts if part.strip()]
+
+
+_COMPOUND_PART = re.compile(r'''
+    (?P<universal>\*)
+  | (?P<tag>[a-zA-Z][\w-]*)
+  | \#(?P<id>[\w-]+)
+  | \.(?P<cls>[\w-]+)
+  | \[\s*(?P<attr>[\w:-]+)\s*(?:(?P<op>[~|^$*]?=)\s*(?P<value>"[^"]*"|'[^']*'|[^\]\s]+)\s*(?:[is]\s*)?)?\]
+  | ::?(?P<pseudo>[\w-]+)(?P<args>\((?:[^()]|\([^()]*\))*\))?
+''', re.VERBOSE)
+
+
+def _split_complex(selector):
+    """Split 'a > b c' into (compounds, combinators)"""
+    compounds = []
+    combinators = []
+    current = ''
+    depth = 0
+    pending = None
+    for char in selector:
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        if depth == 0 and (char.isspace() or char in '>+~'):
+            if current:
+                compounds.append(current)
+                current = ''
+                pending = ' '
+            if char in '>+~':
+                pending = char
+            continue
+        if pending and not current and compounds:
+            combinators.append(pending)
+            pending = None
+        current += char
+    if current:
+        compounds.append(current)
+    return compounds, combinators
+
+
+class SelectorMatcher:
+    """Matches CSS selectors against a parsed fragment tree"""
+
+    def __init__(self, root):
+        self.root = root
+        self.elements = [e for e in root.walk() if e is not root]
+        self.fragment_classes = {c for e in self.elements for c in e.classes if DYNAMIC not in c}
+        self.fragment_ids = {e.attrs['id'] for e in self.elements if e.attrs.get('id')}
+
+    def _is_page_context(self, compound):
+        """A compound that refers to markup outside the fragment, e.g. #wrapper or body"""
+        for part in _COMPOUND_PART.finditer(compound):
+            if part.group('cls') and part.group('cls') in self.fragment_classes:
+                return False
+            if part.group('id') and part.group('id') in self.fragment_ids:
+                return False
+            tag = part.group('tag')
+            if tag and tag.lower() not in PAGE_CONTEXT_TAGS:
+                return False
+        return True
+
+    def _match_compound(self, compound, element):
+        position = 0
+        for part in _COMPOUND_PART.finditer(compound):
+            if part.start() != position:
+                return True  # Unparsed syntax: match conservatively
+            position = part.end()
+            if part.group('tag') and part.group('tag').lower() != element.tag:
+                return False
+            if part.group('id'):
+                value = element.attrs.get('id', '')
+                if value != part.group('id') and DYNAMIC not in value:
+                    return False
+            if part.group('cls') and not element.has_class(part.group('cls')):
+                return False
+            if part.group('attr') and not self._match_attribute(part, element):
+                return False
+            pseudo = part.group('pseudo')
+            if pseudo:
+                pseudo = pseudo.lower()
+                if pseudo in DEFERRED_PSEUDO_CLASSES:
+                    return False
+                if pseudo == 'not' and part.group('args'):
+                    inner = part.group('args')[1:-1]
+                    if all(self._simple(s) for s in _split_top_level(inner, ',')):
+                        if any(self._match_compound(s, element) for s in _split_top_level(inner, ',')):
+                            return False
+                elif pseudo in ('is', 'where', 'matches') and part.group('args'):
+                    inner = part.group('args')[1:-1]
+                    if not any(self._match_compound(s, element) if self._simple(s) else True
+                               for s in _split_top_level(inner, ',')):
+                        return False
+        return True
+
+    @staticmethod
+    def _simple(selector):
+        compounds, _ = _split_complex(selector)
+        return len(compounds) == 1
+
+    @staticmethod
+    def _match_attribute(part, element):
+        name = part.group('attr')
+        if name not in element.attrs:
+            return False
+        if not part.group('op'):
+            return True
+        actual = element.attrs[name]
+        if DYNAMIC in actual:
+            return True
+        expected = part.group('value').strip('"\'')
+        op = part.group('op')
+        if op == '=':
+            return actual == expected
+        if op == '~=':
+            return expected in actual.split()
+        if op == '|=':
+            return actual == expected or actual.startswith(f"{expected}-")
+        if op == '^=':
+            return actual.startswith(expected)
+        if op == '$=':
+            return actual.endswith(expected)
+        return expected in actual
+
+    def _match_from(self, compounds, combinators, index, element):
+        if not self._match_compound(compounds[index], element):
+            return False
+        if index == 0:
+            return True
+        combinator = combinators[index - 1]
+        if combinator == ' ':
+            candidates = [a for a in element.ancestors() if a is not self.root]
+        elif combinator == '>':
+            candidates = [element.parent] if element.parent is not self.root else []
+        elif combinator == '+':
+            candidates = element.previous_siblings()[:1]
+        else:
+            candidates = element.previous_siblings()
+        if any(self._match_from(compounds, combinators, index - 1, c) for c in candidates):
+            return True
+        # Ran out of fragment markup: the rest must describe the surrounding page
+        return combinator in (' ', '>') and all(self._is_page_context(c) for c in compounds[:index])
+
+    def matches_any(self, selector, elements):
+        compounds, combinators = _split_complex(selector)
+        if not compounds:
+            return False
+        if len(combinators) != len(compounds) - 1:
+            return True
+        if all(self._is_page_context(c) for c in compounds):
+            # :root custom properties, body or #wrapper rules apply to the whole page
+            return not any(p.group('pseudo') and p.group('pseudo').lower() in DEFERRED_PSEUDO_CLASSES
+                           for c in compounds for p in _COMPOUND_PART.finditer(c))
+        return any(self._match_from(compounds, combinators, len(compounds) - 1, e) for e in elements)
+
+
+def visible_elements(root, nodes, matcher):
+    """
+    Elements rendered on first paint
+
+    Skips hidden subtrees: template/dialog/script tags, the hidden attribute,
+    inline display:none, and classes whose base rule is display:none (modals).
+    """
+    hidden_classes = set()
+    for node in _flatten_rules(nodes, top_level_only=True):
+        if _DISPLAY_NONE.search(node.body or ''):
+            for selector in _split_top_level(node.prelude, ','):
+                if re.fullmatch(r'(?:\.[\w-]+)+', selector):
+                    hidden_classes.update(selector[1:].split('.'))
+
+    visible = []
+
+    def visit(element):
+        if element is not root:
+            if (element.tag in HIDDEN_TAGS or 'hidden' in element.attrs
+                    or _DISPLAY_NONE.search(element.attrs.get('style', ''))
+                    or any(c in hidden_classes for c in element.classes)):
+                return
+            visible.append(element)
+        for child in element.children:
+            visit(child)
+
+    visit(root)
+    return visible
+
+
+def _flatten_rules(nodes, top_level_only=False):
+    for node in nodes:
+        if node.kind == 'rule':
+            yield node
+        elif node.children is not None and not top_level_only:
+            yield from _flatten_rules(node.children)
+
+
+def _referenced_keyframes(css_text):
+    return set(re.findall(r'animation(?:-name)?\s*:\s*([^;}]+)', css_text))
+
+
+def split_critical(nodes, matcher, elements):
+    """
+    Partition CSS nodes into (critical, deferred) node lists
+
+    A rule is critical if any selector in it matches a visible element, or
+    if it hides an element in the markup (otherwise that element would flash
+    until the deferred CSS arrives); @media/@supports blocks are split rule
+    by rule; @keyframes follow the critical rules that animate with them.
+    """
+    critical = []
+    deferred = []
+    keyframes = []
+    for node in nodes:
+        if node.kind == 'rule':
+            targets = matcher.elements if _DISPLAY_NONE.search(node.body) else elements
+            if any(matcher.matches_any(s, targets) for s in _split_top_level(node.prelude, ',')):
+                critical.append(node)
+            else:
+                deferred.append(node)
+        elif node.kind == 'block' and node.children is not None:
+            inner_critical, inner_deferred = split_critical(node.children, matcher, elements)
+            if inner_critical:
+                critical.append(CSSNode('block', node.prelude, children=inner_critical))
+            if inner_deferred:
+                deferred.append(CSSNode('block', node.prelude, children=inner_deferred))
+        elif node.prelude.lower().startswith(('@keyframes', '@-webkit-keyframes')):
+            keyframes.append(node)
+        elif node.kind == 'statement' and node.prelude.lower().startswith(('@charset', '@import')):
+            deferred.insert(0, node)
+        else:
+            deferred.append(node)
+
+    animations = ' '.join(_referenced_keyframes(''.join(n.to_css() for n in critical)))
+    for node in keyframes:
+        name = node.prelude.split(None, 1)[-1].strip()
+        (critical if re.search(rf'(?<![\w-]){re.escape(name)}(?![\w-])', animations) else deferred).append(node)
+    return critical, deferred
+
+
+def extract_critical_css(html, css):
+    """
+    Split a fragment's styles into inline critical CSS and deferred CSS
+
+    css is the fragment's index.css; <style> blocks already in the HTML are
+    merged in first. Returns (html_with_inline_style, deferred_css, stats).
+    """
+    markup, inline_styles = split_inline_styles(html)
+    nodes = parse_css('\n'.join(inline_styles + [css]))
+    root = parse_fragment_html(markup)
+    matcher = SelectorMatcher(root)
+    elements = visible_elements(root, nodes, matcher)
+    critical, deferred = split_critical(nodes, matcher, elements)
+
+    critical_css = minify_css(''.join(node.to_css() for node in critical))
+    deferred_css = ''.join(node.to_css() for node in deferred)
+    if critical_css:
+        markup = f"<style data-critical-css>{critical_css}</style>\n{markup}"
+    stats = {
+        'elements': len(elements),
+        'critical_rules': sum(1 for _ in _flatten_rules(critical)),
+        'deferred_rules': sum(1 for _ in _flatten_rules(deferred)),
+        'critical_bytes': len(critical_css.encode('utf-8')),
+    }
+    return markup, deferred_css, stats
+
+
+def is_hero_fragment(directory):
+    return os.path.basename(directory.rstrip('/')).endswith('-hero')
+
+
+class CriticalCSSStage(BuildStage):
+    """
+    Build stage that inlines each hero fragment's critical CSS
+
+    Rewrites index.html (critical rules in a leading <style> block) and
+    index.css (everything else) for fragments whose directory name ends in
+    -hero, or for the fragment directory names passed in.
+    """
+
+    name = 'critical-css'
+    version = 1
+
+    def __init__(self, fragments=None, **kwargs):
+        super().__init__(**kwargs)
+        self.fragments = set(fragments) if fragments else None
+        self._seen = set()
+
+    def options(self):
+        return {'fragments': sorted(self.fragments) if self.fragments else None}
+
+    def _selected(self, fragment_dir):
+        name = os.path.basename(fragment_dir)
+        return name in self.fragments if self.fragments else is_hero_fragment(fragment_dir)
+
+    def _produce(self, inputs):
+        html, css = (data.decode('utf-8') for data in inputs)
+        markup, deferred_css, _ = extract_critical_css(html, css)
+        return [markup.encode('utf-8'), deferred_css.encode('utf-8')]
+
+    def process(self, entries):
+        by_directory = {}
+        for index, (file_path, archive_path) in enumerate(entries):
+            directory, name = os.path.split(archive_path)
+            if name in ('index.html', 'index.css'):
+                by_directory.setdefault(directory, {})[name] = index
+
+        output = list(entries)
+        for directory, files in by_directory.items():
+            if len(files) != 2 or not self._selected(directory):
+                continue
+            html_index, css_index = files['index.html'], files['index.css']
+            html_path, css_path = entries[html_index][0], entries[css_index][0]
+            (new_html, new_css), hit = self.cached_outputs(
+                [html_path, css_path], ['-index.html', '-index.css'], self._produce)
+            output[html_index] = (new_html, entries[html_index][1])
+            output[css_index] = (new_css, entries[css_index][1])
+
+            key = (origin(html_path), origin(css_path))
+            if key not in self._seen:
+                self._seen.add(key)
+                before = os.path.getsize(html_path) + os.path.getsize(css_path)
+                after = os.path.getsize(new_html) + os.path.getsize(new_css)
+                inline = os.path.getsize(new_html) - os.path.getsize(html_path)
+                self.record(html_path, before, after,
+                            f"{'+' if inline >= 0 else ''}{inline:,} bytes inline" + (', cached' if hit else ''))
+        return output
+
+
+def main(argv=None):
+    """Print the critical/deferred split for fragment directories"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('fragments', nargs='*', help='Fragment directories (default: every *-hero fragment)')
+    parser.add_argument('--print', action='store_true', help='Print the inline critical CSS')
+    args = parser.parse_args(argv)
+
+    directories = args.fragments or sorted(
+        d for d in (os.path.join(root, name) for root, dirs, _ in os.walk('fragment-collection') for name in dirs)
+        if is_hero_fragment(d))
+    for directory in directories:
+        with open(os.path.join(directory, 'index.html'), encoding='utf-8') as f:
+            html = f.read()
+        css_path = os.path.join(directory, 'index.css')
+        css = open(css_path, encoding='utf-8').read() if os.path.exists(css_path) else ''
+        markup, deferred_css, stats = extract_critical_css(html, css)
+        print(f"📄 {directory}: {stats['elements']} visible elements, {stats['critical_rules']} critical rules "
+              f"inlined ({stats['critical_bytes']:,} bytes), {stats['deferred_rules']} deferred")
+        if args.print:
+            print(_STYLE_BLOCK.search(markup).group(1) if _STYLE_BLOCK.search(markup) else '')
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
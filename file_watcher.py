@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Filesystem change watching for watch-mode builds
+Uses Linux inotify (through ctypes, no extra packages) and falls back to
+polling file stats elsewhere; bursts of events are debounced into batches
+"""
+
+import os
+import time
+import errno
+import struct
+import select
+import ctypes
+import ctypes.util
+
+DEFAULT_DEBOUNCE = 0.15
+DEFAULT_POLL_INTERVAL = 0.25
+
+# Editor swap/backup files and build outputs never trigger a rebuild
+IGNORED_SUFFIXES = ('.swp', '.swx', '~', '.tmp', '.pyc')
+IGNORED_DIRS = ('.git', '__pycache__', 'node_modules', '.build-cache')
+
+# inotify(7) constants
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ATTRIB
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def ignored(path):
+    """Whether a path is editor noise or build output rather than a source change"""
+    parts = path.split(os.sep)
+    return path.endswith(IGNORED_SUFFIXES) or any(part in IGNORED_DIRS for part in parts) or \
+        os.path.basename(path).startswith('.#')
+
+
+def _walk_dirs(roots):
+    for root in roots:
+        for directory, dirs, _ in os.walk(root):
+            dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
+            yield directory
+
+
+class InotifyWatcher:
+    """Recursive directory watcher on Linux inotify"""
+
+    def __init__(self, roots):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}
+        for directory in _walk_dirs(roots):
+            self._add(directory)
+
+    def _add(self, directory):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(error, f"inotify_add_watch failed for {directory}")
+        self._dirs[wd] = directory
+
+    def read(self, timeout):
+        """Changed paths seen within timeout seconds (empty if none)"""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'surrogateescape')
+            offset += length
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_DELETE_SELF:
+                self._dirs.pop(wd, None)
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # New directories are watched too, and anything already inside them counts as changed
+                    for new_dir in _walk_dirs([path]):
+                        self._add(new_dir)
+                        try:
+                            names = os.listdir(new_dir)
+                        except (FileNotFoundError, NotADirectoryError):
+                            # Created and removed within one batch (checkouts, editor temp dirs)
+                            continue
+                        changed.update(os.path.join(new_dir, f) for f in names
+                                       if os.path.isfile(os.path.join(new_dir, f)))
+                continue
+            if mask & IN_CREATE:
+                # Content arrives with IN_CLOSE_WRITE; creating an empty file is not a change yet
+                continue
+            changed.add(path)
+        return {path for path in changed if not ignored(path)}
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Portable watcher comparing (mtime, size) snapshots"""
+
+    def __init__(self, roots, interval=DEFAULT_POLL_INTERVAL):
+        self.roots = roots
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for directory in _walk_dirs(self.roots):
+            try:
+                names = os.listdir(directory)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if not os.path.isdir(path) and not ignored(path):
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def read(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        current = self._scan()
+        changed = {path for path in current.keys() | self._snapshot.keys()
+                   if current.get(path) != self._snapshot.get(path)}
+        self._snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+
+def create_watcher(roots, polling=False):
+    """An inotify watcher where available, otherwise a polling one"""
+    if not polling:
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(roots)
+
+
+def watch_batches(watcher, debounce=DEFAULT_DEBOUNCE, idle=1.0):
+    """
+    Yield (changed_paths, first_event_time) batches forever
+
+    A batch closes once no new event has arrived for debounce seconds, so an
+    editor's save-rename-chmod sequence or a git checkout becomes one rebuild.
+    """
+    while True:
+        changed = watcher.read(idle)
+        if not changed:
+            continue
+        first_event = time.perf_counter()
+        while True:
+            more = watcher.read(debounce)
+            if not more:
+                break
+            changed |= more
+        yield changed, first_event
@@ -9,6 +9,8 @@
     }
     
     let priceUpdateInterval = null;
+    let priceStream = null;
+    let priceConfig = null;
     let currentTimeframe = '1D';
     
     // Initialize on DOM ready and SPA navigation events
@@ -40,13 +42,13 @@
         // Initialize share price fragment
         
         // Apply configuration settings
-        applyConfiguration();
+        priceConfig = applyConfiguration();
         
         // Initialize chart controls
         initializeChartControls();
         
         // Initialize price updates
-        initializePriceUpdates();
+        initializePriceUpdates(priceConfig);
         
         // Initialize accessibility
         initializeAccessibility();
@@ -67,7 +69,9 @@
             stockSymbol: configuration.stockSymbol || 'JMAT',
             exchangeName: configuration.exchangeName || 'LON',
             compactMode: configuration.compactMode === true,
-            widgetTheme: configuration.widgetTheme || 'standard'
+            widgetTheme: configuration.widgetTheme || 'standard',
+            updateMode: configuration.updateMode || 'poll',
+            feedUrl: (configuration.feedUrl || '').replace(/\/+$/, '')
         };
         
         // Configuration applied
@@ -94,21 +98,7 @@
             statsContainer.style.display = config.showStatistics ? 'block' : 'none';
         }
         
-        // Update price update interval
-        if (priceUpdateInterval) {
-            clearInterval(priceUpdateInterval);
-            priceUpdateInterval = null;
-        }
-        
-        if (config.autoUpdate) {
-            // Convert seconds to milliseconds - optimize for performance
-            const intervalMs = Math.max(config.updateInterval * 1000, 15000); // Minimum 15 seconds
-            priceUpdateInterval = setInterval(() => {
-                if (document.visibilityState === 'visible') {
-                    loadPriceData();
-                }
-            }, intervalMs);
-        }
+        return config;
     }
     
     function initializeChartControls() {
@@ -143,14 +133,8 @@
         });
     }
     
-    function initializePriceUpdates() {
-        // Simulate real-time price updates every 30 seconds
-        // In real implementation, this would connect to actual market data feed
-        priceUpdateInterval = setInterval(() => {
-            if (document.visibilityState === 'visible') {
-                loadPriceData();
-            }
-        }, 30000);
+    function initializePriceUpdates(config) {
+        startPriceUpdates(config);
         
         // Retry button functionality
         const retryBtn = fragmentElement.querySelector('#jm-retry-price');
@@ -161,6 +145,56 @@
         }
     }
     
+    /**
+     * Push mode subscribes to the share price feed (share_price_feed.py) over
+     * Server-Sent Events, so one cached quote reaches every open tab; polling
+     * is used when push is off, there is no feed URL or EventSource is missing
+     */
+    function startPriceUpdates(config) {
+        stopPriceUpdates();
+        if (!config.autoUpdate) {
+            return;
+        }
+        
+        if (config.updateMode === 'push' && config.feedUrl && window.EventSource) {
+            priceStream = new EventSource(`${config.feedUrl}/quotes/${encodeURIComponent(config.stockSymbol)}/stream`);
+            priceStream.addEventListener('quote', (event) => {
+                try {
+                    updatePriceDisplay(JSON.parse(event.data));
+                    hideLoadingState();
+                } catch (error) {
+                    // Malformed quote - keep the last one on screen
+                }
+            });
+            priceStream.onerror = () => {
+                // EventSource reconnects by itself unless the feed refused the stream
+                if (priceStream && priceStream.readyState === EventSource.CLOSED) {
+                    startPriceUpdates(Object.assign({}, config, { updateMode: 'poll' }));
+                }
+            };
+            return;
+        }
+        
+        // Convert seconds to milliseconds - optimize for performance
+        const intervalMs = Math.max(config.updateInterval * 1000, 15000); // Minimum 15 seconds
+        priceUpdateInterval = setInterval(() => {
+            if (document.visibilityState === 'visible') {
+                loadPriceData();
+            }
+        }, intervalMs);
+    }
+    
+    function stopPriceUpdates() {
+        if (priceUpdateInterval) {
+            clearInterval(priceUpdateInterval);
+            priceUpdateInterval = null;
+        }
+        if (priceStream) {
+            priceStream.close();
+            priceStream = null;
+        }
+    }
+    
     function initializeAccessibility() {
         const widget = fragmentElement.querySelector('.jm-share-price-widget');
         if (widget) {
@@ -179,6 +213,25 @@
     function loadPriceData() {
         showLoadingState();
         
+        if (priceConfig && priceConfig.feedUrl) {
+            // no-cache revalidates with the feed's ETag, so an unchanged quote is a 304
+            fetch(`${priceConfig.feedUrl}/quotes/${encodeURIComponent(priceConfig.stockSymbol)}`, { cache: 'no-cache' })
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error(`HTTP error! status: ${response.status}`);
+                    }
+                    return response.json();
+                })
+                .then(data => {
+                    updatePriceDisplay(data);
+                    hideLoadingState();
+                })
+                .catch(() => {
+                    showErrorState();
+                });
+            return;
+        }
+        
         // Simulate API call - in real implementation, this would fetch from actual market data API
         // Using setTimeout to simulate network delay
         setTimeout(() => {
@@ -325,18 +378,16 @@
     }
     
     // Cleanup on page unload
-    window.addEventListener('beforeunload', () => {
-        if (priceUpdateInterval) {
-            clearInterval(priceUpdateInterval);
-        }
-    });
+    window.addEventListener('beforeunload', stopPriceUpdates);
     
     // Pause updates when tab is not visible
     document.addEventListener('visibilitychange', () => {
-        if (document.visibilityState === 'hidden' && priceUpdateInterval) {
-            clearInterval(priceUpdateInterval);
-        } else if (document.visibilityState === 'visible' && !priceUpdateInterval) {
-            initializePriceUpdates();
+        if (document.visibilityState === 'hidden') {
+            stopPriceUpdates();
+        } else if (priceConfig && !priceUpdateInterval && !priceStream) {
+            // Catch up on what was missed, then resume
+            loadPriceData();
+            startPriceUpdates(priceConfig);
         }
     });
     
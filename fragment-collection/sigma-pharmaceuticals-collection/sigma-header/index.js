@@ -258,15 +258,26 @@
         const config = getFragmentConfiguration();
         const menuId = config.navigationMenuId;
         
+        // A fresh build-time snapshot is already rendered: no API call needed.
+        // A stale one stays on screen until the live menu arrives.
+        const snapshot = getNavigationSnapshot(menuId);
+        if (snapshot) {
+            hydrateSnapshotNavigation(config.sitePrefix);
+            if (!snapshot.stale) {
+                return;
+            }
+        }
+        const fallback = snapshot ? function() {} : loadFallbackNavigation;
+        
         // Skip API call if no valid menu ID is provided
         if (!menuId || menuId === 'primary-menu' || menuId === 'undefined' || menuId === undefined || typeof menuId !== 'string') {
-            loadFallbackNavigation();
+            fallback();
             return;
         }
         
         // Check if authentication token is available
         if (typeof Liferay === 'undefined' || !Liferay.authToken) {
-            loadFallbackNavigation();
+            fallback();
             return;
         }
         
@@ -284,10 +295,46 @@
             })
             .catch(error => {
                 // Error loading navigation menu
-                loadFallbackNavigation();
+                fallback();
             });
     }
 
+    /**
+     * Read the navigation snapshot embedded at build time (nav_snapshot.py)
+     * Returns null when there is none or it is for another menu
+     */
+    function getNavigationSnapshot(menuId) {
+        const element = fragmentElement.querySelector('#sigma-nav-snapshot');
+        if (!element) {
+            return null;
+        }
+        
+        let snapshot;
+        try {
+            snapshot = JSON.parse(element.textContent);
+        } catch (error) {
+            return null;
+        }
+        
+        const configuredMenu = menuId && menuId !== 'primary-menu' && menuId !== 'undefined';
+        if (configuredMenu && snapshot.menuId !== String(menuId)) {
+            return null;
+        }
+        
+        snapshot.stale = Date.now() - snapshot.takenAt > snapshot.maxAge * 1000;
+        return snapshot;
+    }
+
+    /**
+     * Finish the pre-rendered snapshot markup: site-prefixed links and dropdowns
+     */
+    function hydrateSnapshotNavigation(sitePrefix) {
+        fragmentElement.querySelectorAll('[data-nav-link]').forEach(link => {
+            link.href = addSitePrefix(link.getAttribute('data-nav-link'), sitePrefix);
+        });
+        initializeDropdowns();
+    }
+
     /**
      * Load fallback navigation when API is unavailable
      */
@@ -14,6 +14,17 @@
     let searchQuery = '';
     let filteredData = [];
 
+    // With an orders service (orders_service.py) pages are fetched by cursor
+    // and sorted and searched on the server; otherwise the sample data below is used
+    const serviceUrl = (configuration.ordersServiceUrl || '').replace(/\/+$/, '');
+    const MIN_SEARCH_LENGTH = 3;
+    const SEARCH_DEBOUNCE_MS = 250;
+    let pageCursors = [null];
+    let totalOrders = 0;
+    let totalExact = true;
+    let pageRequest = null;
+    let searchTimer = null;
+
     /**
      * Order datasets using actual Sigma pharmaceutical products
      */
@@ -162,7 +173,7 @@
                 
                 // Update dataset and reset pagination
                 currentDataset = datasetKey;
-                currentPage = 1;
+                resetPaging();
                 updateTable();
             });
         });
@@ -183,6 +194,21 @@
         if (!searchInput) return;
 
         searchInput.addEventListener('input', function() {
+            if (serviceUrl) {
+                // Query the service once typing pauses, from three characters
+                const value = this.value.trim().toLowerCase();
+                clearTimeout(searchTimer);
+                searchTimer = setTimeout(() => {
+                    const query = value.length >= MIN_SEARCH_LENGTH ? value : '';
+                    if (query !== searchQuery) {
+                        searchQuery = query;
+                        resetPaging();
+                        updateTable();
+                    }
+                }, SEARCH_DEBOUNCE_MS);
+                return;
+            }
+
             searchQuery = this.value.toLowerCase();
             currentPage = 1;
             updateTable();
@@ -207,7 +233,7 @@
                 }
                 
                 updateSortIcons();
-                currentPage = 1;
+                resetPaging();
                 updateTable();
             });
         });
@@ -249,8 +275,7 @@
         
         if (nextButton) {
             nextButton.addEventListener('click', () => {
-                const totalPages = Math.ceil(filteredData.length / rowsPerPage);
-                if (currentPage < totalPages) {
+                if (currentPage < getPageCount()) {
                     currentPage++;
                     updateTable();
                 }
@@ -258,6 +283,22 @@
         }
     }
 
+    /**
+     * Start again from the first page after the dataset, sort or search changes
+     */
+    function resetPaging() {
+        currentPage = 1;
+        pageCursors = [null];
+    }
+
+    /**
+     * Pages that can be shown: all of them for the sample data, those reached
+     * so far (plus the next one) when paging through the service by cursor
+     */
+    function getPageCount() {
+        return serviceUrl ? pageCursors.length : Math.ceil(filteredData.length / rowsPerPage);
+    }
+
     /**
      * Filter and sort data
      */
@@ -308,22 +349,82 @@
      * Update the table display
      */
     function updateTable() {
+        if (serviceUrl) {
+            loadServicePage();
+            return;
+        }
+
         filteredData = getFilteredData();
-        renderTable();
+        totalOrders = filteredData.length;
+        const startIndex = (currentPage - 1) * rowsPerPage;
+        const pageData = filteredData.slice(startIndex, startIndex + rowsPerPage);
+        renderTable(pageData);
         updatePagination();
-        updateTableInfo();
+        updateTableInfo(pageData.length);
     }
 
     /**
-     * Render table rows
+     * Fetch the current page from the orders service
      */
-    function renderTable() {
+    function loadServicePage() {
+        const params = new URLSearchParams({
+            dataset: currentDataset,
+            sort: sortField,
+            direction: sortDirection,
+            limit: rowsPerPage
+        });
+        if (searchQuery) params.set('q', searchQuery);
+        const cursor = pageCursors[currentPage - 1];
+        if (cursor) params.set('after', cursor);
+
+        // Only the latest request renders; a newer search or page aborts the one in flight
+        if (pageRequest) pageRequest.abort();
+        const request = pageRequest = new AbortController();
+
+        fetch(`${serviceUrl}/orders?${params}`, { signal: request.signal })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP error! status: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(page => {
+                pageCursors.length = currentPage;
+                if (page.next) pageCursors.push(page.next);
+                totalOrders = page.total;
+                totalExact = page.totalExact;
+                renderTable(page.orders);
+                updatePagination();
+                updateTableInfo(page.orders.length);
+            })
+            .catch(error => {
+                if (error.name === 'AbortError') return;
+                renderMessage('Orders could not be loaded. Please try again later.');
+                updatePagination();
+            });
+    }
+
+    function escapeHtml(value) {
+        return String(value).replace(/[&<>"']/g, char => ({
+            '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+        })[char]);
+    }
+
+    /**
+     * Replace the rows with a single message row
+     */
+    function renderMessage(message) {
         const tbody = fragmentElement.querySelector('.sigma-table-body');
         if (!tbody) return;
+        tbody.innerHTML = `<tr class="sigma-table-row"><td class="sigma-td" colspan="5">${escapeHtml(message)}</td></tr>`;
+    }
 
-        const startIndex = (currentPage - 1) * rowsPerPage;
-        const endIndex = Math.min(startIndex + rowsPerPage, filteredData.length);
-        const pageData = filteredData.slice(startIndex, endIndex);
+    /**
+     * Render table rows
+     */
+    function renderTable(pageData) {
+        const tbody = fragmentElement.querySelector('.sigma-table-body');
+        if (!tbody) return;
 
         tbody.innerHTML = '';
 
@@ -341,26 +442,27 @@
             // Build products list
             const productsList = order.products.map(product => `
                 <div class="sigma-product-item">
-                    <span class="sigma-product-name">${product.name}</span>
-                    <span class="sigma-product-sku">${product.sku}</span> x${product.quantity}
+                    <span class="sigma-product-name">${escapeHtml(product.name)}</span>
+                    <span class="sigma-product-sku">${escapeHtml(product.sku)}</span> x${escapeHtml(product.quantity)}
                 </div>
             `).join('');
 
             // Format total as currency
-            const formattedTotal = '£' + order.total.toFixed(2);
+            const formattedTotal = '£' + Number(order.total).toFixed(2);
 
             // Status badge
-            const statusClass = `sigma-status-${order.status}`;
+            const status = escapeHtml(order.status);
+            const statusClass = `sigma-status-${status}`;
 
             row.innerHTML = `
                 <td class="sigma-td">${formattedDate}</td>
                 <td class="sigma-td">
                     <div class="sigma-product-list">${productsList}</div>
                 </td>
-                <td class="sigma-td">${order.quantity.toLocaleString()}</td>
+                <td class="sigma-td">${Number(order.quantity).toLocaleString()}</td>
                 <td class="sigma-td">${formattedTotal}</td>
                 <td class="sigma-td">
-                    <span class="sigma-status-badge ${statusClass}">${order.status.toUpperCase()}</span>
+                    <span class="sigma-status-badge ${statusClass}">${status.toUpperCase()}</span>
                 </td>
             `;
 
@@ -372,7 +474,7 @@
      * Update pagination controls
      */
     function updatePagination() {
-        const totalPages = Math.ceil(filteredData.length / rowsPerPage);
+        const totalPages = getPageCount();
         const prevButton = fragmentElement.querySelector('[data-action="prev-page"]');
         const nextButton = fragmentElement.querySelector('[data-action="next-page"]');
         const pageNumbers = fragmentElement.querySelector('[data-container="page-numbers"]');
@@ -413,9 +515,9 @@
     /**
      * Update table info
      */
-    function updateTableInfo() {
-        const startIndex = (currentPage - 1) * rowsPerPage + 1;
-        const endIndex = Math.min(currentPage * rowsPerPage, filteredData.length);
+    function updateTableInfo(rowCount) {
+        const startIndex = rowCount ? (currentPage - 1) * rowsPerPage + 1 : 0;
+        const endIndex = rowCount ? startIndex + rowCount - 1 : 0;
         
         const startElement = fragmentElement.querySelector('[data-info="showing-start"]');
         const endElement = fragmentElement.querySelector('[data-info="showing-end"]');
@@ -423,7 +525,7 @@
         
         if (startElement) startElement.textContent = startIndex;
         if (endElement) endElement.textContent = endIndex;
-        if (totalElement) totalElement.textContent = filteredData.length;
+        if (totalElement) totalElement.textContent = totalOrders.toLocaleString() + (totalExact ? '' : '+');
     }
 
     /**
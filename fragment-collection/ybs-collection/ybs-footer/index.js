@@ -307,7 +307,7 @@
         }
         
         // Custom event for other tracking systems
-        document.dispatchEvent(new CustomEvent('jm:newsletter:signup', {
+        document.dispatchEvent(new CustomEvent('ybs:newsletter:signup', {
             detail: { email: email, source: 'footer' }
         }));
     }
@@ -376,7 +376,7 @@
         }
         
         // Custom event
-        document.dispatchEvent(new CustomEvent('jm:social:click', {
+        document.dispatchEvent(new CustomEvent('ybs:social:click', {
             detail: { platform: platform, location: 'footer' }
         }));
     }
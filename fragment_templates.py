@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Generate per-brand fragments from shared templates
+Each directory under fragment-templates/ is one fragment template; each
+fragment-templates/brands/<brand>.json names the collection it builds into,
+the templates it uses and the token map they are rendered with
+
+Templates use a small Mustache subset:
+    {{name}}                 token value
+    {{#name}}...{{/name}}    rendered once if name is true, once per item if it is a list
+    {{^name}}...{{/name}}    rendered if name is false or empty
+
+Every template file is compiled once and rendered for every brand; rendered
+outputs are cached by input hash under .build-cache/templates/. The fragments
+in fragment-collection/ are generated files: edit the template instead.
+
+Usage:
+    python3 fragment_templates.py            # regenerate every templated fragment
+    python3 fragment_templates.py --check    # exit 1 if any fragment is out of date
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+
+from build_stages import CACHE_DIR
+
+TEMPLATE_ROOT = "fragment-templates"
+BRANDS_DIR = "brands"
+COLLECTION_ROOT = "fragment-collection"
+
+# Bump when rendering changes so cached outputs are not reused
+GENERATOR_VERSION = 2
+
+_TAG = re.compile(r'\{\{\s*([#^/]?)\s*([\w.-]+)\s*\}\}')
+
+
+class TemplateError(ValueError):
+    """Raised for malformed templates, brand files or missing tokens"""
+
+
+def compile_template(text, name='<template>'):
+    """
+    Parse template text into a node list: strings, ('token', name) and
+    ('section', name, inverted, children)
+
+    Section tags alone on their line take the whole line with them, so
+    templates can be laid out like the files they produce.
+    """
+    root = []
+    stack = [(None, root)]
+    cursor = 0
+    for match in _TAG.finditer(text):
+        kind, token = match.groups()
+        start, end = match.span()
+        if kind:
+            line_start = text.rfind('\n', 0, start) + 1
+            line_end = text.find('\n', end)
+            line_end = len(text) if line_end == -1 else line_end + 1
+            if not text[line_start:start].strip() and not text[end:line_end].strip():
+                start, end = max(line_start, cursor), line_end
+        if start > cursor:
+            stack[-1][1].append(text[cursor:start])
+        cursor = end
+
+        if kind in ('#', '^'):
+            children = []
+            stack[-1][1].append(('section', token, kind == '^', children))
+            stack.append((token, children))
+        elif kind == '/':
+            if stack[-1][0] != token:
+                line = text.count('\n', 0, match.start()) + 1
+                raise TemplateError(f"{name}:{line}: unexpected {{{{/{token}}}}}")
+            stack.pop()
+        else:
+            stack[-1][1].append(('token', token))
+    if len(stack) > 1:
+        raise TemplateError(f"{name}: unclosed section {{{{#{stack[-1][0]}}}}}")
+    if cursor < len(text):
+        root.append(text[cursor:])
+    return root
+
+
+def _lookup(contexts, token, name):
+    for context in reversed(contexts):
+        if isinstance(context, dict) and token in context:
+            return context[token]
+    raise TemplateError(f"{name}: no value for token '{token}'")
+
+
+def render(nodes, contexts, name='<template>'):
+    """Render compiled nodes against a stack of token maps (innermost last)"""
+    output = []
+    for node in nodes:
+        if isinstance(node, str):
+            output.append(node)
+            continue
+        if node[0] == 'token':
+            value = _lookup(contexts, node[1], name)
+            if isinstance(value, (dict, list)):
+                raise TemplateError(f"{name}: token '{node[1]}' is a {type(value).__name__}, not a value")
+            output.append(str(value))
+            continue
+        _, token, inverted, children = node
+        value = _lookup(contexts, token, name)
+        if inverted:
+            if not value:
+                output.append(render(children, contexts, name))
+        elif isinstance(value, list):
+            for item in value:
+                output.append(render(children, contexts + [item], name))
+        elif value:
+            output.append(render(children, contexts + [value] if isinstance(value, dict) else contexts, name))
+    return ''.join(output)
+
+
+def load_brands(template_root=TEMPLATE_ROOT):
+    """Brand definitions keyed by brand prefix"""
+    brands = {}
+    brands_dir = os.path.join(template_root, BRANDS_DIR)
+    for file_name in sorted(os.listdir(brands_dir)) if os.path.isdir(brands_dir) else []:
+        if not file_name.endswith('.json'):
+            continue
+        path = os.path.join(brands_dir, file_name)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                brand = json.load(f)
+        except json.JSONDecodeError as e:
+            raise TemplateError(f"{path}: invalid JSON: {e}")
+        for key in ('collection', 'templates', 'tokens'):
+            if key not in brand:
+                raise TemplateError(f"{path}: missing '{key}'")
+        if 'prefix' not in brand['tokens']:
+            raise TemplateError(f"{path}: tokens must define 'prefix' (the fragment key prefix)")
+        brand['name'] = file_name[:-len('.json')]
+        brand['path'] = path
+        brands[brand['name']] = brand
+    return brands
+
+
+def template_files(template_dir):
+    """Template file names in a template directory, in name order"""
+    return sorted(name for name in os.listdir(template_dir)
+                  if os.path.isfile(os.path.join(template_dir, name)) and not name.startswith('.'))
+
+
+def _cache_path(cache_dir, template_data, tokens):
+    fingerprint = hashlib.sha256()
+    fingerprint.update(json.dumps([GENERATOR_VERSION, tokens], sort_keys=True).encode('utf-8'))
+    fingerprint.update(template_data)
+    return os.path.join(cache_dir, 'templates', fingerprint.hexdigest())
+
+
+def templated_fragment_dirs(brands=None, base_dir="."):
+    """Fragment directories generated from a template (every file in them is owned by this module)"""
+    template_root = os.path.join(base_dir, TEMPLATE_ROOT)
+    return {os.path.normpath(os.path.join(base_dir, COLLECTION_ROOT, brand['collection'],
+                                          f"{brand['tokens']['prefix']}-{template}"))
+            for name, brand in load_brands(template_root).items() if brands is None or name in brands
+            for template in brand['templates']}
+
+
+def generate_fragments(brands=None, write=True, base_dir=".", cache_dir=CACHE_DIR):
+    """
+    Render every template for every brand that uses it
+
+    Returns one report per generated file: {'template', 'brand', 'path',
+    'status'} where status is 'unchanged', 'updated' or 'created' ('stale'
+    or 'missing' when not writing). Raises TemplateError for broken templates.
+    """
+    template_root = os.path.join(base_dir, TEMPLATE_ROOT)
+    all_brands = load_brands(template_root)
+    selected = [b for name, b in all_brands.items() if brands is None or name in brands]
+
+    reports = []
+    used = sorted({template for brand in selected for template in brand['templates']})
+    for template in used:
+        template_dir = os.path.join(template_root, template)
+        if not os.path.isdir(template_dir):
+            raise TemplateError(f"Unknown template '{template}' (no {template_dir}/)")
+        users = [brand for brand in selected if template in brand['templates']]
+        for file_name in template_files(template_dir):
+            with open(os.path.join(template_dir, file_name), 'rb') as f:
+                data = f.read()
+            nodes = None  # compiled on the first cache miss, then shared by every brand
+
+            for brand in users:
+                fragment_dir = os.path.join(base_dir, COLLECTION_ROOT, brand['collection'],
+                                            f"{brand['tokens']['prefix']}-{template}")
+                target = os.path.join(fragment_dir, file_name)
+                cache_path = _cache_path(cache_dir, data, brand['tokens'])
+                if os.path.exists(cache_path):
+                    with open(cache_path, 'rb') as f:
+                        output = f.read()
+                else:
+                    if nodes is None:
+                        nodes = compile_template(data.decode('utf-8'), f"{template}/{file_name}")
+                    output = render(nodes, [brand['tokens']], f"{template}/{file_name} ({brand['name']})")
+                    # Generated files always end with a newline, whatever the template does
+                    if output and not output.endswith('\n'):
+                        output += '\n'
+                    output = output.encode('utf-8')
+                    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                    with open(tmp_path, 'wb') as f:
+                        f.write(output)
+                    os.replace(tmp_path, cache_path)
+
+                if os.path.exists(target):
+                    with open(target, 'rb') as f:
+                        status = 'unchanged' if f.read() == output else 'updated' if write else 'stale'
+                else:
+                    status = 'created' if write else 'missing'
+                if write and status in ('updated', 'created'):
+                    os.makedirs(fragment_dir, exist_ok=True)
+                    with open(target, 'wb') as f:
+                        f.write(output)
+                reports.append({'template': template, 'brand': brand['name'],
+                                'path': os.path.relpath(target, base_dir), 'status': status})
+    return reports
+
+
+def print_generation_report(reports):
+    """One line per fragment, listing the files that changed"""
+    fragments = {}
+    for report in reports:
+        fragments.setdefault(os.path.dirname(report['path']), []).append(report)
+    for fragment_dir, files in fragments.items():
+        changed = [f"{os.path.basename(r['path'])} ({r['status']})" for r in files if r['status'] != 'unchanged']
+        if not changed:
+            print(f"  ✓ {fragment_dir}: up to date")
+        elif any(r['status'] in ('stale', 'missing') for r in files):
+            print(f"  ❌ {fragment_dir}: {', '.join(changed)}")
+        else:
+            print(f"  ✓ {fragment_dir}: regenerated {', '.join(changed)}")
+
+
+def generate_for_build(brands=None):
+    """Regenerate templated fragments before a build; False if templates are broken"""
+    try:
+        reports = generate_fragments(brands)
+    except TemplateError as e:
+        print(f"❌ {e}")
+        return False
+    if reports:
+        changed = sum(r['status'] != 'unchanged' for r in reports)
+        fragments = len({os.path.dirname(r['path']) for r in reports})
+        print(f"🧩 Generated {fragments} fragments from {TEMPLATE_ROOT}/ ({changed} files updated)")
+    return True
+
+
+def main(argv=None):
+    """Regenerate templated fragments, or check that they are up to date"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--check', action='store_true',
+                        help='Only report fragments that differ from their templates; exit 1 if any do')
+    parser.add_argument('--only', nargs='+', metavar='BRAND', help='Only these brands (e.g. jm ybs)')
+    args = parser.parse_args(argv)
+
+    try:
+        reports = generate_fragments(args.only, write=not args.check)
+    except TemplateError as e:
+        print(f"❌ {e}")
+        return False
+    print_generation_report(reports)
+
+    stale = [r for r in reports if r['status'] in ('stale', 'missing')]
+    if stale:
+        print(f"❌ {len(stale)} generated files are out of date (run python3 fragment_templates.py)")
+        return False
+    print(f"✅ {len(reports)} generated files {'up to date' if args.check else 'written'}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
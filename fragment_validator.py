@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Parallel validator for fragment collections and client extensions
+Parses and schema-checks collection.json, every fragment's fragment.json and
+configuration.json and each client-extension.yaml, and resolves the
+[resources:...] and configuration.<field> references in index.html
+
+Fragments are validated concurrently and every check is timed; --json writes
+the results for CI. Errors always fail; warnings fail with --strict.
+
+Usage:
+    python3 fragment_validator.py                       # every collection and client extension
+    python3 fragment_validator.py --strict --json -     # CI gate, JSON on stdout
+    python3 fragment_validator.py fragment-collection/ybs-collection
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+RESOURCES_DIR = "resources"
+
+FRAGMENT_TYPES = frozenset({'component', 'section', 'input', 'react'})
+FRAGMENT_PATHS = {
+    'htmlPath': 'index.html',
+    'cssPath': 'index.css',
+    'jsPath': 'index.js',
+    'configurationPath': 'configuration.json',
+    'thumbnailPath': 'thumbnail.png',
+}
+FIELD_TYPES = frozenset({
+    'checkbox', 'collectionSelector', 'colorPalette', 'colorPicker', 'itemSelector', 'length',
+    'navigationMenuSelector', 'select', 'text', 'url', 'videoSelector',
+})
+FRAGMENT_KEY = re.compile(r'^[a-z0-9][a-z0-9-]*$')
+
+# Client extension types whose url/urls/cssURLs name files built from assemble sources
+ASSET_EXTENSION_TYPES = frozenset({'globalCSS', 'globalJS', 'themeCSS', 'themeJS', 'themeFavicon', 'customElement'})
+EXTENSION_TYPES = ASSET_EXTENSION_TYPES | frozenset({
+    'batch', 'editorConfigContributor', 'fdsCellRenderer', 'fdsFilter', 'iframe', 'jsImportMapsEntry',
+    'oAuthApplicationHeadlessServer', 'oAuthApplicationUserAgent', 'staticContent', 'themeSpritemap',
+})
+
+_RESOURCE_REFERENCE = re.compile(r'\[resources:([^\]]+)\]')
+_FREEMARKER = re.compile(r'\$\{[^}]*\}|\[#[^\]]*\]|<#[^>]*>')
+_CONFIGURATION_REFERENCE = re.compile(r'\bconfiguration\.([A-Za-z_]\w*)')
+
+
+class CheckResult:
+    """
+    Issues found by one check on one file, and how long the check took
+
+    Used as a context manager: the check is timed, and an unexpected
+    exception is recorded as an error instead of aborting the run.
+    """
+
+    def __init__(self, check, path):
+        self.check = check
+        self.path = path
+        self.issues = []
+        self.seconds = 0.0
+        self._started = None
+
+    def error(self, message):
+        self.issues.append({'severity': 'error', 'message': message})
+
+    def warning(self, message):
+        self.issues.append({'severity': 'warning', 'message': message})
+
+    def count(self, severity):
+        return sum(issue['severity'] == severity for issue in self.issues)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.seconds = time.perf_counter() - self._started
+        if isinstance(exc, Exception):
+            self.error(f"check failed: {exc}")
+            return True
+        return False
+
+    def to_dict(self):
+        return {'check': self.check, 'path': self.path, 'ok': not self.count('error'),
+                'seconds': round(self.seconds, 6), 'issues': self.issues}
+
+
+def _load_json(path, result):
+    """Parse a JSON file, recording a missing or invalid file as an error"""
+    if not os.path.exists(path):
+        result.error("file not found")
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except json.JSONDecodeError as e:
+        result.error(f"invalid JSON: {e}")
+        return None
+
+
+def _require_strings(data, fields, result):
+    for field in fields:
+        if not isinstance(data.get(field), str) or not data[field].strip():
+            result.error(f"'{field}' must be a non-empty string")
+
+
+def check_collection_json(collection_dir):
+    """collection.json: fragmentCollectionKey and name are required strings"""
+    path = os.path.join(collection_dir, 'collection.json')
+    with CheckResult('collection.json', path) as result:
+        data = _load_json(path, result)
+        if data is not None:
+            if isinstance(data, dict):
+                _require_strings(data, ('fragmentCollectionKey', 'name'), result)
+            else:
+                result.error("must be a JSON object")
+    return result, data if isinstance(data, dict) else {}
+
+
+def check_fragment_json(fragment_dir):
+    """fragment.json: required fields, a known type and files that exist; returns (result, data)"""
+    path = os.path.join(fragment_dir, 'fragment.json')
+    data = {}
+    with CheckResult('fragment.json', path) as result:
+        parsed = _load_json(path, result)
+        if parsed is not None and not isinstance(parsed, dict):
+            result.error("must be a JSON object")
+        elif parsed is not None:
+            data = parsed
+            _require_strings(data, ('fragmentEntryKey', 'name'), result)
+            key = data.get('fragmentEntryKey')
+            if isinstance(key, str) and not FRAGMENT_KEY.match(key):
+                result.warning(f"fragmentEntryKey '{key}' should be lowercase letters, digits and hyphens")
+            if data.get('type', 'component') not in FRAGMENT_TYPES:
+                result.error(f"unknown type '{data['type']}' (expected one of {', '.join(sorted(FRAGMENT_TYPES))})")
+            for field, default in FRAGMENT_PATHS.items():
+                file_name = data.get(field, default)
+                if not isinstance(file_name, str):
+                    result.error(f"'{field}' must be a string")
+                elif not os.path.isfile(os.path.join(fragment_dir, file_name)):
+                    if field == 'htmlPath' or field in data:
+                        result.error(f"{field} '{file_name}' not found")
+                    else:
+                        result.warning(f"missing {file_name}")
+    return result, data
+
+
+def _check_field(field, location, result):
+    name = field.get('name')
+    field_type = field.get('type')
+    if field_type not in FIELD_TYPES:
+        result.error(f"{location}: unknown field type '{field_type}'")
+        return
+    type_options = field.get('typeOptions', {})
+    if not isinstance(type_options, dict):
+        result.error(f"{location}: typeOptions must be an object")
+        return
+    default = field.get('defaultValue')
+    if field_type == 'select':
+        valid_values = type_options.get('validValues')
+        if not isinstance(valid_values, list) or not valid_values:
+            result.error(f"{location}: select field '{name}' needs a non-empty typeOptions.validValues")
+            return
+        values = [v.get('value') for v in valid_values if isinstance(v, dict)]
+        if len(values) != len(valid_values) or None in values:
+            result.error(f"{location}: every validValues entry of '{name}' needs a 'value'")
+        elif 'defaultValue' in field and default not in values:
+            result.error(f"{location}: defaultValue '{default}' of '{name}' is not one of its validValues")
+    elif field_type == 'checkbox' and 'defaultValue' in field and default not in (True, False, 'true', 'false'):
+        result.error(f"{location}: checkbox '{name}' has non-boolean defaultValue {default!r}")
+
+
+def check_configuration(fragment_dir, fragment_data):
+    """configuration.json: fieldSets of uniquely named fields of known types; returns (result, field names)"""
+    path = os.path.join(fragment_dir, fragment_data.get('configurationPath', 'configuration.json'))
+    names = set()
+    with CheckResult('configuration.json', path) as result:
+        if not os.path.exists(path):
+            # Reported by the fragment.json check; a fragment without configuration has no fields
+            return result, names
+        data = _load_json(path, result)
+        if data is None:
+            return result, None
+        field_sets = data.get('fieldSets') if isinstance(data, dict) else None
+        if not isinstance(field_sets, list):
+            result.error("must be an object with a 'fieldSets' list")
+            return result, None
+        for set_index, field_set in enumerate(field_sets):
+            fields = field_set.get('fields') if isinstance(field_set, dict) else None
+            if not isinstance(fields, list):
+                result.error(f"fieldSets[{set_index}] must have a 'fields' list")
+                continue
+            for field_index, field in enumerate(fields):
+                location = f"fieldSets[{set_index}].fields[{field_index}]"
+                if not isinstance(field, dict) or not isinstance(field.get('name'), str) or not field['name']:
+                    result.error(f"{location} must be an object with a 'name'")
+                    continue
+                if field['name'] in names:
+                    result.error(f"{location}: duplicate field name '{field['name']}'")
+                names.add(field['name'])
+                _check_field(field, location, result)
+    return result, names
+
+
+def check_html_references(fragment_dir, fragment_data, resources, field_names):
+    """
+    index.html: every [resources:...] file exists in the collection, and
+    every configuration.<field> used in FreeMarker is defined
+
+    Unresolved resources are warnings (the fragment imports, the asset 404s);
+    undefined configuration fields are errors, since FreeMarker fails on them.
+    """
+    path = os.path.join(fragment_dir, fragment_data.get('htmlPath', 'index.html'))
+    with CheckResult('index.html', path) as result:
+        if not os.path.isfile(path):
+            return result
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        for name in sorted(set(_RESOURCE_REFERENCE.findall(html))):
+            if name.strip() not in resources:
+                result.warning(f"[resources:{name}] does not resolve (no {RESOURCES_DIR}/{name.strip()} in the collection)")
+        if field_names is not None:
+            used = {name for block in _FREEMARKER.findall(html) for name in _CONFIGURATION_REFERENCE.findall(block)}
+            for name in sorted(used - field_names):
+                result.error(f"configuration.{name} is not defined in configuration.json")
+    return result
+
+
+def collection_resources(collection_dir):
+    """Every file under the collection's resources/, as paths relative to it"""
+    resources_dir = os.path.join(collection_dir, RESOURCES_DIR)
+    resources = set()
+    for root, _, files in os.walk(resources_dir):
+        for name in files:
+            resources.add(os.path.relpath(os.path.join(root, name), resources_dir).replace(os.sep, '/'))
+    return resources
+
+
+def validate_fragment(fragment_dir, resources):
+    """Run every fragment check; returns (check results, fragmentEntryKey)"""
+    fragment_result, data = check_fragment_json(fragment_dir)
+    configuration_result, field_names = check_configuration(fragment_dir, data)
+    html_result = check_html_references(fragment_dir, data, resources, field_names)
+    return [fragment_result, configuration_result, html_result], data.get('fragmentEntryKey')
+
+
+def fragment_directories(collection_dir):
+    """Fragment directories of a collection (those with a fragment.json), in name order"""
+    return [os.path.join(collection_dir, item) for item in sorted(os.listdir(collection_dir))
+            if os.path.isfile(os.path.join(collection_dir, item, 'fragment.json'))]
+
+
+def _collection_result(collection_dir, collection_check, collection_data, fragment_results):
+    checks = [collection_check]
+    keys = {}
+    for fragment_dir, (results, key) in fragment_results:
+        checks += results
+        if key:
+            keys.setdefault(key, []).append(os.path.basename(fragment_dir))
+    with CheckResult('fragments', collection_dir) as fragments_check:
+        if not fragment_results:
+            fragments_check.error("no fragments found")
+        for key, directories in sorted(keys.items()):
+            if len(directories) > 1:
+                fragments_check.error(f"fragmentEntryKey '{key}' is used by {', '.join(directories)}")
+    checks.append(fragments_check)
+    return {'kind': 'collection', 'path': collection_dir, 'name': collection_data.get('name'),
+            'key': collection_data.get('fragmentCollectionKey'),
+            'fragments': [os.path.basename(d) for d, _ in fragment_results], 'checks': checks}
+
+
+def _assemble_sources(extension_dir, config, result):
+    sources = []
+    assemble = config.get('assemble', [])
+    if not isinstance(assemble, list):
+        result.error("'assemble' must be a list")
+        return sources
+    for index, step in enumerate(assemble):
+        if not isinstance(step, dict) or 'from' not in step:
+            result.error(f"assemble[{index}] must have a 'from' directory")
+            continue
+        source = os.path.join(extension_dir, step['from'])
+        if not os.path.isdir(source):
+            result.error(f"assemble[{index}]: '{step['from']}' does not exist")
+        sources.append(source)
+    return sources
+
+
+def check_client_extension(extension_dir):
+    """client-extension.yaml: every extension has a known type and its url files are assembled"""
+    path = os.path.join(extension_dir, 'client-extension.yaml')
+    with CheckResult('client-extension.yaml', path) as result:
+        if not os.path.exists(path):
+            result.error("file not found")
+            return result
+        if yaml is None:
+            result.warning("PyYAML is not installed; client-extension.yaml was not parsed")
+            return result
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            result.error(f"invalid YAML: {e}")
+            return result
+        if not isinstance(config, dict):
+            result.error("must be a YAML mapping")
+            return result
+
+        sources = _assemble_sources(extension_dir, config, result)
+        extensions = {key: value for key, value in config.items() if key != 'assemble'}
+        if not extensions:
+            result.error("defines no client extensions")
+        for key, extension in extensions.items():
+            if not isinstance(extension, dict):
+                result.error(f"{key}: must be a mapping")
+                continue
+            extension_type = extension.get('type')
+            if not extension_type:
+                result.error(f"{key}: missing 'type'")
+                continue
+            if extension_type not in EXTENSION_TYPES:
+                result.warning(f"{key}: unrecognised type '{extension_type}'")
+            if not extension.get('name'):
+                result.warning(f"{key}: missing 'name'")
+            if extension_type not in ASSET_EXTENSION_TYPES:
+                continue
+            if extension_type == 'customElement':
+                if not extension.get('htmlElementName'):
+                    result.error(f"{key}: customElement needs 'htmlElementName'")
+                urls = list(extension.get('urls') or []) + list(extension.get('cssURLs') or [])
+                if not extension.get('urls'):
+                    result.error(f"{key}: customElement needs 'urls'")
+            else:
+                urls = [extension['url']] if extension.get('url') else []
+                if not urls:
+                    result.error(f"{key}: {extension_type} needs 'url'")
+            for url in urls:
+                if '://' in url:
+                    continue
+                if not any(os.path.isfile(os.path.join(source, url)) for source in sources):
+                    result.error(f"{key}: '{url}' is not in any assemble source")
+    return result
+
+
+def validate_targets(targets, jobs=None):
+    """
+    Validate (kind, path) targets, fragments and extensions concurrently
+
+    kind is 'collection' or 'client-extension'. Returns one result per target,
+    in order: {'kind', 'path', 'checks': [CheckResult, ...]} plus the name,
+    key and fragment list for collections.
+    """
+    with ThreadPoolExecutor(max_workers=jobs or min(32, (os.cpu_count() or 1) + 4)) as pool:
+        pending = []
+        for kind, path in targets:
+            if kind == 'collection':
+                collection_check, collection_data = check_collection_json(path)
+                resources = collection_resources(path) if os.path.isdir(path) else set()
+                fragments = fragment_directories(path) if os.path.isdir(path) else []
+                futures = [(d, pool.submit(validate_fragment, d, resources)) for d in fragments]
+                pending.append((kind, path, collection_check, collection_data, futures))
+            else:
+                pending.append((kind, path, None, None, pool.submit(check_client_extension, path)))
+
+        results = []
+        for kind, path, collection_check, collection_data, futures in pending:
+            if kind == 'collection':
+                fragment_results = [(d, future.result()) for d, future in futures]
+                results.append(_collection_result(path, collection_check, collection_data, fragment_results))
+            else:
+                results.append({'kind': kind, 'path': path, 'checks': [futures.result()]})
+    return results
+
+
+def validate_collection(collection_dir, jobs=None):
+    """Validate a single fragment collection"""
+    return validate_targets([('collection', collection_dir)], jobs)[0]
+
+
+def validate_extension(extension_dir):
+    """Validate a single client extension"""
+    return validate_targets([('client-extension', extension_dir)], jobs=1)[0]
+
+
+def issue_counts(target_results):
+    """(errors, warnings) across target results"""
+    checks = [check for target in target_results for check in target['checks']]
+    return sum(c.count('error') for c in checks), sum(c.count('warning') for c in checks)
+
+
+def print_target_report(target, verbose=False):
+    """Print a target's issues (every check with verbose), errors first"""
+    for check in target['checks']:
+        if verbose and not check.issues:
+            print(f"  ✓ {check.path} ({check.check}, {check.seconds * 1000:.1f} ms)")
+        for issue in sorted(check.issues, key=lambda i: i['severity'] != 'error'):
+            icon = "❌" if issue['severity'] == 'error' else "⚠️"
+            print(f"  {icon} {check.path}: {issue['message']}")
+
+
+def results_to_dict(target_results, seconds, strict=False):
+    """JSON-ready report: totals, then every check of every target with its timing"""
+    errors, warnings = issue_counts(target_results)
+    targets = []
+    for target in target_results:
+        entry = {key: value for key, value in target.items() if key != 'checks'}
+        entry['ok'] = not any(check.count('error') for check in target['checks'])
+        entry['checks'] = [check.to_dict() for check in target['checks']]
+        targets.append(entry)
+    return {
+        'ok': not errors and not (strict and warnings),
+        'strict': strict,
+        'errors': errors,
+        'warnings': warnings,
+        'checks': sum(len(target['checks']) for target in target_results),
+        'seconds': round(seconds, 6),
+        'targets': targets,
+    }
+
+
+def main(argv=None):
+    """Validate every collection and client extension (or the directories given)"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('paths', nargs='*',
+                        help='Collection or client extension directories (default: all discovered)')
+    parser.add_argument('--json', metavar='PATH', help="Write JSON results to PATH, or '-' for stdout")
+    parser.add_argument('--strict', action='store_true', help='Fail on warnings too (e.g. unresolved resources)')
+    parser.add_argument('--jobs', type=int, default=None, help='Worker threads (default: cores + 4)')
+    parser.add_argument('--verbose', action='store_true', help='List passing checks with their timings')
+    args = parser.parse_args(argv)
+
+    if args.paths:
+        targets = [('collection' if os.path.exists(os.path.join(path, 'collection.json')) else 'client-extension',
+                    os.path.normpath(path)) for path in args.paths]
+    else:
+        # Imported here: build_collections imports this module for its own validation
+        from build_collections import discover_targets
+        targets = [(target['kind'], target['source']) for target in discover_targets()]
+
+    started = time.perf_counter()
+    target_results = validate_targets(targets, args.jobs)
+    report = results_to_dict(target_results, time.perf_counter() - started, args.strict)
+
+    if args.json:
+        text = json.dumps(report, indent=2)
+        if args.json == '-':
+            print(text)
+            return report['ok']
+        with open(args.json, 'w') as f:
+            f.write(text + '\n')
+
+    for target in target_results:
+        failed = any(check.count('error') for check in target['checks'])
+        count = len(target['checks'])
+        print(f"{'❌' if failed else '✓'} {target['path']} ({count} check{'s' if count != 1 else ''})")
+        print_target_report(target, args.verbose)
+    print(f"\n{'✅' if report['ok'] else '❌'} {report['checks']} checks: {report['errors']} errors, "
+          f"{report['warnings']} warnings in {report['seconds'] * 1000:.0f} ms")
+    return report['ok']
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
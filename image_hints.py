@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Image loading hints and inline-SVG extraction for fragment markup
+Gives every <img> in a fragment's index.html loading, decoding and (where the
+image size can be read) width/height attributes: the first image of a *-hero
+fragment is the LCP candidate and loads eagerly at high priority, header and
+hero images load eagerly, everything else lazily. Inline data:image/svg+xml
+placeholders of lazy images move to shared files under the collection's
+resources/ (identical SVGs become one file), so the markup every page parses
+shrinks and the placeholders load only when scrolled into view.
+
+Usage:
+    python3 image_hints.py
+    python3 image_hints.py fragment-collection/johnson-matthey-collection --print jm-news-carousel
+"""
+
+import os
+import re
+import sys
+import html
+import base64
+import hashlib
+import argparse
+import urllib.parse
+
+from build_stages import BuildStage, origin
+from image_optimizer import iter_png_chunks
+
+# Fragments rendered at the top of the page
+ABOVE_THE_FOLD_SUFFIXES = ('-header', '-hero')
+
+# Smaller inline SVGs cost less than the request that would replace them
+MIN_EXTRACT_BYTES = 256
+
+HASH_LENGTH = 10
+RESOURCE_PREFIX = 'svg-'
+
+_IMG_TAG = re.compile(r'<img\b((?:"[^"]*"|\'[^\']*\'|[^\'">])*)>', re.IGNORECASE)
+_ATTRIBUTE = re.compile(r'([^\s"\'=<>/]+)(?:\s*=\s*("[^"]*"|\'[^\']*\'|[^\s"\'>]+))?')
+_SVG_ROOT = re.compile(rb'<svg\b[^>]*>', re.IGNORECASE)
+_SVG_LENGTH = re.compile(r'^\s*([0-9.]+)\s*(?:px)?\s*$')
+_RESOURCE_SRC = re.compile(r'^\[resources:([^\]]+)\]$')
+
+
+def parse_attributes(text):
+    """
+    Attributes of a tag body: lower-cased name -> (value, start, end)
+    start:end spans the value in text, or the whole attribute when it has no value
+    """
+    attributes = {}
+    for match in _ATTRIBUTE.finditer(text):
+        name, raw = match.group(1).lower(), match.group(2)
+        if raw is None:
+            attributes.setdefault(name, ('', match.start(1), match.end(1)))
+            continue
+        quoted = raw[0] in '"\''
+        start = match.start(2) + quoted
+        attributes.setdefault(name, (raw[1:-1] if quoted else raw, start, match.end(2) - quoted))
+    return attributes
+
+
+def decode_svg_data_uri(uri):
+    """The SVG document in a data:image/svg+xml URI (base64 or percent-encoded), or None"""
+    header, separator, payload = html.unescape(uri).partition(',')
+    if not separator or not header.lower().startswith('data:image/svg+xml'):
+        return None
+    if ';base64' in header.lower():
+        try:
+            return base64.b64decode(payload, validate=False)
+        except ValueError:
+            return None
+    return urllib.parse.unquote(payload).encode('utf-8')
+
+
+def svg_size(data):
+    """(width, height) from the root <svg> width/height, else its viewBox; None if unsized"""
+    root = _SVG_ROOT.search(data)
+    if not root:
+        return None
+    attributes = parse_attributes(root.group(0)[4:-1].decode('utf-8', 'replace'))
+    width, height = (_SVG_LENGTH.match(attributes.get(name, ('',))[0]) for name in ('width', 'height'))
+    if width and height:
+        return round(float(width.group(1))), round(float(height.group(1)))
+    view_box = attributes.get('viewbox', ('',))[0].replace(',', ' ').split()
+    if len(view_box) == 4:
+        try:
+            return round(float(view_box[2])), round(float(view_box[3]))
+        except ValueError:
+            return None
+    return None
+
+
+def raster_size(data):
+    """(width, height) of PNG or JPEG bytes, read from the headers; None for anything else"""
+    try:
+        for chunk_type, body in iter_png_chunks(data):
+            if chunk_type == b'IHDR':
+                return int.from_bytes(body[0:4], 'big'), int.from_bytes(body[4:8], 'big')
+            return None
+    except ValueError:
+        pass
+    if not data.startswith(b'\xff\xd8'):
+        return None
+    offset = 2
+    while offset + 9 < len(data) and data[offset] == 0xFF:
+        marker = data[offset + 1]
+        length = int.from_bytes(data[offset + 2:offset + 4], 'big')
+        # SOF0-15, except DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            return int.from_bytes(data[offset + 7:offset + 9], 'big'), int.from_bytes(data[offset + 5:offset + 7], 'big')
+        offset += 2 + length
+    return None
+
+
+def image_role(fragment, index):
+    """'lcp' for the first image of a hero, 'eager' for other above-the-fold images, else 'lazy'"""
+    if fragment.endswith('-hero') and index == 0:
+        return 'lcp'
+    return 'eager' if fragment.endswith(ABOVE_THE_FOLD_SUFFIXES) else 'lazy'
+
+
+def svg_resource_name(data):
+    """Content-addressed resources/ name for an extracted SVG"""
+    return f"{RESOURCE_PREFIX}{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}.svg"
+
+
+def _rewrite_tag(body, attributes, changes):
+    """Tag body with changed attribute values replaced in place and new ones appended in the tag's layout"""
+    edits = []
+    for name, value in changes.items():
+        if name in attributes:
+            _, start, end = attributes[name]
+            bare = body[start:end].lower() == name
+            edits.append((start, end, f'{name}="{value}"' if bare else value))
+    edits.sort(reverse=True)
+    for start, end, value in edits:
+        body = body[:start] + value + body[end:]
+    added = [f'{name}="{value}"' for name, value in changes.items() if name not in attributes]
+    if added:
+        head, tail = re.match(r'(.*?)(\s*/?\s*)$', body, re.DOTALL).groups()
+        # Multi-line tags keep one attribute per line
+        separator = re.findall(r'\n[ \t]*(?=\S)', head)[-1] if '\n' in head.strip() else ' '
+        body = head + ''.join(separator + attribute for attribute in added) + tail
+    return body
+
+
+def rewrite_images(markup, fragment, extract=True, resource_size=None, min_extract_bytes=MIN_EXTRACT_BYTES):
+    """
+    Add loading hints to every <img> in a fragment's markup and extract its inline SVGs
+
+    resource_size(name) returns the (width, height) of a [resources:name]
+    image or None. Returns (markup, svgs, hinted) where svgs maps the
+    resources/ names now referenced to their SVG bytes and hinted counts the
+    images that changed. Tags containing FreeMarker directives are left alone.
+    """
+    svgs = {}
+    hinted = 0
+    index = 0
+
+    def rewrite(match):
+        nonlocal hinted, index
+        body = match.group(1)
+        if '[#' in body or '[@' in body:
+            return match.group(0)
+        role = image_role(fragment, index)
+        index += 1
+        attributes = parse_attributes(body)
+        src = attributes.get('src', ('',))[0]
+        changes = {}
+
+        # Images the fragment lazy-loads itself (data-src) keep their own handling
+        if 'data-src' not in attributes:
+            loading = 'lazy' if role == 'lazy' else 'eager'
+            if attributes.get('loading', ('',))[0].lower() != loading:
+                changes['loading'] = loading
+        if role == 'lcp':
+            if attributes.get('fetchpriority', ('',))[0].lower() != 'high':
+                changes['fetchpriority'] = 'high'
+        elif 'decoding' not in attributes:
+            changes['decoding'] = 'async'
+
+        svg = decode_svg_data_uri(src) if src.lower().startswith('data:') else None
+        if 'width' not in attributes and 'height' not in attributes:
+            resource = _RESOURCE_SRC.match(src)
+            size = svg_size(svg) if svg else (resource_size(resource.group(1)) if resource and resource_size else None)
+            if size:
+                changes['width'], changes['height'] = str(size[0]), str(size[1])
+
+        if extract and svg and role == 'lazy' and len(src) >= min_extract_bytes:
+            name = svg_resource_name(svg)
+            svgs[name] = svg
+            changes['src'] = f"[resources:{name}]"
+        if changes:
+            hinted += 1
+            return f"<img{_rewrite_tag(body, attributes, changes)}>"
+        return match.group(0)
+
+    return _IMG_TAG.sub(rewrite, markup), svgs, hinted
+
+
+def read_resource_size(path):
+    """Image size of a resource file, or None if it is missing or unreadable"""
+    if not os.path.isfile(path):
+        return None
+    with open(path, 'rb') as f:
+        data = f.read()
+    return svg_size(data) if path.lower().endswith('.svg') else raster_size(data)
+
+
+class ImageHintsStage(BuildStage):
+    """
+    Build stage that adds image loading hints to fragment index.html files
+
+    SVGs are only extracted where the entries are a whole collection (they
+    include <collection>/collection.json), since only a collection ZIP can
+    carry resources/; individual fragment ZIPs get the hints alone. One
+    record per fragment reports the markup bytes saved.
+    """
+
+    name = 'image-hints'
+    version = 1
+
+    def __init__(self, min_extract_bytes=MIN_EXTRACT_BYTES, **kwargs):
+        super().__init__(**kwargs)
+        self.min_extract_bytes = min_extract_bytes
+        self._sizes = None
+        self._seen = set()
+
+    def options(self):
+        # Sizes read from resources/ are part of the key, so a resized resource is a cache miss
+        return {'min_extract_bytes': self.min_extract_bytes, 'sizes': self._sizes}
+
+    def store_svg(self, data):
+        """Write an extracted SVG to the stage cache and return its path"""
+        path = os.path.join(self.cache_dir, self.name, svg_resource_name(data))
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return path
+
+    def process(self, entries):
+        files = {archive_path: file_path for file_path, archive_path in entries}
+        roots = {archive_path.split('/', 1)[0] for archive_path in files
+                 if archive_path.count('/') == 1 and archive_path.endswith('/collection.json')}
+
+        output = []
+        extracted = {}
+        for file_path, archive_path in entries:
+            parts = archive_path.split('/')
+            if parts[-1] != 'index.html' or len(parts) < 2:
+                output.append((file_path, archive_path))
+                continue
+            root = parts[0] if len(parts) == 3 and parts[0] in roots else None
+            fragment = parts[-2]
+            collection_dir = os.path.dirname(os.path.dirname(origin(file_path)))
+
+            def resource_size(name):
+                path = files.get(f"{root}/resources/{name}") if root else None
+                return read_resource_size(path or os.path.join(collection_dir, 'resources', name))
+
+            with open(file_path, 'r', encoding='utf-8') as f:
+                original = f.read()
+            sizes = {}
+            markup, svgs, hinted = rewrite_images(original, fragment, extract=root is not None,
+                                                  resource_size=lambda name: sizes.setdefault(name, resource_size(name)),
+                                                  min_extract_bytes=self.min_extract_bytes)
+            if markup == original:
+                output.append((file_path, archive_path))
+                continue
+
+            self._sizes = sorted(sizes.items())
+            suffix = '-extracted-index.html' if root else '-index.html'
+            new_path, hit = self.cached(file_path, suffix, lambda data: markup.encode('utf-8'))
+            output.append((new_path, archive_path))
+            shared = 0
+            for name, svg in svgs.items():
+                resource_path = f"{root}/resources/{name}"
+                shared += resource_path in extracted
+                extracted.setdefault(resource_path, self.store_svg(svg))
+
+            if root and origin(file_path) not in self._seen:
+                self._seen.add(origin(file_path))
+                note = f"{hinted} images hinted"
+                if svgs:
+                    note += f", {len(svgs)} SVGs → resources/" + (f" ({shared} shared)" if shared else '')
+                self.record(file_path, os.path.getsize(file_path), os.path.getsize(new_path),
+                            note + (', cached' if hit else ''))
+
+        output.extend((path, resource_path) for resource_path, path in sorted(extracted.items())
+                      if resource_path not in files)
+        return output
+
+
+def collection_directories(base_dir='.'):
+    """Every fragment collection under fragment-collection/"""
+    root = os.path.join(base_dir, 'fragment-collection')
+    return sorted(os.path.join(root, name) for name in (os.listdir(root) if os.path.isdir(root) else [])
+                  if os.path.isfile(os.path.join(root, name, 'collection.json')))
+
+
+def main(argv=None):
+    """Show what the image hints stage would change in each fragment"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('collections', nargs='*', help='Collection directories (default: every collection)')
+    parser.add_argument('--no-extract', action='store_true', help='Only add hints, keep inline SVGs')
+    parser.add_argument('--print', metavar='FRAGMENT', help='Print the rewritten index.html of this fragment')
+    args = parser.parse_args(argv)
+
+    total_saved = 0
+    for collection_dir in args.collections or collection_directories():
+        resources = os.path.join(collection_dir, 'resources')
+        extracted = {}
+        for fragment in sorted(os.listdir(collection_dir)):
+            index_path = os.path.join(collection_dir, fragment, 'index.html')
+            if not os.path.isfile(index_path):
+                continue
+            with open(index_path, 'r', encoding='utf-8') as f:
+                original = f.read()
+            markup, svgs, hinted = rewrite_images(
+                original, fragment, extract=not args.no_extract,
+                resource_size=lambda name: read_resource_size(os.path.join(resources, name)))
+            if args.print == fragment:
+                print(markup)
+            if not hinted:
+                continue
+            before, after = len(original.encode('utf-8')), len(markup.encode('utf-8'))
+            shared = sum(name in extracted for name in svgs)
+            extracted.update(svgs)
+            total_saved += before - after
+            note = f", {len(svgs)} SVGs → resources/" + (f" ({shared} shared)" if shared else '') if svgs else ''
+            print(f"🖼️ {fragment}: {hinted} images hinted{note}, markup {before:,} → {after:,} bytes")
+        if extracted:
+            print(f"   {os.path.basename(collection_dir)}: {len(extracted)} resources, "
+                  f"{sum(len(svg) for svg in extracted.values()):,} bytes")
+    print(f"✓ Markup saved: {total_saved:,} bytes")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
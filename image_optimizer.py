@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Image optimization build stage for fragment thumbnails and collection resources
+Downscales thumbnails to Liferay's display size, losslessly recompresses PNGs
+and emits WebP variants for resources/, entirely offline
+
+Lossless PNG recompression is pure Python (zlib). Downscaling and WebP output
+use Pillow when it is installed and are skipped with a warning otherwise.
+"""
+
+import io
+import os
+import zlib
+
+from build_stages import BuildStage
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+    features = None
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Ancillary chunks with no effect on rendering
+DROPPABLE_CHUNKS = frozenset({b'tEXt', b'zTXt', b'iTXt', b'tIME'})
+
+# Fragment cards in the page editor sidebar are ~240px wide; 2x covers high-DPI screens
+THUMBNAIL_SIZE = (480, 360)
+
+WEBP_QUALITY = 85
+
+
+def iter_png_chunks(data):
+    """Yield (chunk_type, chunk_body) pairs from PNG bytes"""
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("Not a PNG file")
+    offset = len(PNG_SIGNATURE)
+    while offset + 8 <= len(data):
+        length = int.from_bytes(data[offset:offset + 4], 'big')
+        chunk_type = data[offset + 4:offset + 8]
+        body = data[offset + 8:offset + 8 + length]
+        yield chunk_type, body
+        offset += 12 + length
+        if chunk_type == b'IEND':
+            break
+
+
+def _png_chunk(chunk_type, body):
+    crc = zlib.crc32(chunk_type + body) & 0xffffffff
+    return len(body).to_bytes(4, 'big') + chunk_type + body + crc.to_bytes(4, 'big')
+
+
+def recompress_png(data):
+    """
+    Losslessly shrink a PNG by re-deflating its image data at maximum effort
+    and dropping text/time chunks. Returns None if nothing was saved.
+    """
+    try:
+        chunks = list(iter_png_chunks(data))
+    except ValueError:
+        return None
+    chunk_types = {chunk_type for chunk_type, _ in chunks}
+    if b'acTL' in chunk_types or b'IDAT' not in chunk_types:
+        # Animated PNGs carry frame data outside IDAT; leave them alone
+        return None
+
+    pixels = zlib.decompress(b''.join(body for chunk_type, body in chunks if chunk_type == b'IDAT'))
+    # Filtered scanlines compress best with Z_FILTERED at maximum level/memory
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, zlib.Z_FILTERED)
+    idat = compressor.compress(pixels) + compressor.flush()
+
+    output = [PNG_SIGNATURE]
+    idat_written = False
+    for chunk_type, body in chunks:
+        if chunk_type in DROPPABLE_CHUNKS:
+            continue
+        if chunk_type == b'IDAT':
+            if not idat_written:
+                output.append(_png_chunk(b'IDAT', idat))
+                idat_written = True
+            continue
+        output.append(_png_chunk(chunk_type, body))
+
+    result = b''.join(output)
+    return result if len(result) < len(data) else None
+
+
+def downscale_png(data, size=THUMBNAIL_SIZE):
+    """Shrink a PNG to fit within size using Pillow; returns None if not needed"""
+    if Image is None:
+        return None
+    with Image.open(io.BytesIO(data)) as img:
+        if img.width <= size[0] and img.height <= size[1]:
+            return None
+        img.thumbnail(size, Image.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def webp_available():
+    """Check whether Pillow is installed with WebP support"""
+    return Image is not None and features.check('webp')
+
+
+def png_to_webp(data, quality=WEBP_QUALITY):
+    """Encode PNG bytes as WebP using Pillow"""
+    with Image.open(io.BytesIO(data)) as img:
+        buffer = io.BytesIO()
+        img.save(buffer, 'WEBP', quality=quality, method=6)
+    return buffer.getvalue()
+
+
+class ImageOptimizationStage(BuildStage):
+    """
+    Optimize thumbnail.png files and PNGs under resources/
+
+    Thumbnails are downscaled to thumbnail_size, every PNG is losslessly
+    recompressed, and resources/*.png gain a .webp sibling unless one exists.
+    """
+
+    name = 'images'
+    version = 1
+
+    def __init__(self, thumbnail_size=THUMBNAIL_SIZE, webp=True, **kwargs):
+        super().__init__(**kwargs)
+        self.thumbnail_size = tuple(thumbnail_size)
+        self.webp = webp and webp_available()
+        self._seen = set()
+        self._warned = False
+
+    def options(self):
+        return {
+            'thumbnail_size': list(self.thumbnail_size),
+            'pillow': Image is not None,
+            'webp': self.webp,
+            'webp_quality': WEBP_QUALITY,
+        }
+
+    def optimize_png(self, data, is_thumbnail):
+        """Downscale (thumbnails only) then losslessly recompress"""
+        optimized = None
+        if is_thumbnail:
+            optimized = downscale_png(data, self.thumbnail_size)
+        recompressed = recompress_png(optimized or data)
+        return recompressed or optimized
+
+    def _record_once(self, key, *args):
+        if key not in self._seen:
+            self._seen.add(key)
+            self.record(*args)
+
+    def process(self, entries):
+        if Image is None and not self._warned:
+            print("⚠️ Pillow not installed: thumbnails are recompressed losslessly but not downscaled, "
+                  "and no WebP variants are emitted")
+            self._warned = True
+
+        archive_paths = {archive_path for _, archive_path in entries}
+        output = []
+        for file_path, archive_path in entries:
+            lower = archive_path.lower()
+            is_thumbnail = os.path.basename(lower) == 'thumbnail.png'
+            is_resource = '/resources/' in f"/{lower}"
+            if not lower.endswith('.png') or not (is_thumbnail or is_resource):
+                output.append((file_path, archive_path))
+                continue
+
+            before = os.path.getsize(file_path)
+            suffix = '.thumb.png' if is_thumbnail else '.png'
+            optimized_path, hit = self.cached(file_path, suffix, lambda data: self.optimize_png(data, is_thumbnail))
+            self._record_once((file_path, suffix), file_path, before, os.path.getsize(optimized_path),
+                              'cached' if hit else '')
+            output.append((optimized_path, archive_path))
+
+            webp_archive_path = f"{os.path.splitext(archive_path)[0]}.webp"
+            if is_resource and self.webp and webp_archive_path not in archive_paths:
+                webp_path, hit = self.cached(file_path, '.webp', png_to_webp)
+                self._record_once((file_path, '.webp'), f"{os.path.splitext(file_path)[0]}.webp", before,
+                                  os.path.getsize(webp_path), 'webp variant' + (', cached' if hit else ''))
+                output.append((webp_path, webp_archive_path))
+
+        return output
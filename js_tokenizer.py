@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Minimal JavaScript tokenizer for build-time source transforms
+Understands strings, template literals (with nested ${...}), comments and
+regex literals well enough that transforms never edit inside them
+"""
+
+import re
+
+# Keywords after which a '/' starts a regex literal rather than a division
+REGEX_PREFIX_KEYWORDS = frozenset({
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await',
+})
+
+PUNCTUATORS = sorted([
+    '>>>=', '...', '===', '!==', '**=', '<<=', '>>=', '>>>', '&&=', '||=', '??=',
+    '=>', '==', '!=', '<=', '>=', '&&', '||', '??', '?.', '++', '--', '+=', '-=',
+    '*=', '/=', '%=', '&=', '|=', '^=', '<<', '>>', '**',
+    '{', '}', '(', ')', '[', ']', ';', ',', '<', '>', '+', '-', '*', '/', '%',
+    '&', '|', '^', '!', '~', '?', ':', '=', '.', '@', '#',
+], key=len, reverse=True)
+
+_NAME = re.compile(r'[A-Za-z_$\u0080-\uffff][\w$\u0080-\uffff]*')
+_NUMBER = re.compile(r'(?:0[xXoObB][\da-fA-F_]+n?|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d+)?n?)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class Token:
+    """A slice of the source: kind is ws, comment, string, template, regex, name, number or punct"""
+
+    __slots__ = ('kind', 'value', 'start', 'end')
+
+    def __init__(self, kind, value, start, end):
+        self.kind = kind
+        self.value = value
+        self.start = start
+        self.end = end
+
+    @property
+    def significant(self):
+        return self.kind not in ('ws', 'comment')
+
+    def __repr__(self):
+        return f"Token({self.kind}, {self.value!r})"
+
+
+def _regex_allowed(previous):
+    if previous is None:
+        return True
+    if previous.kind == 'name':
+        return previous.value in REGEX_PREFIX_KEYWORDS
+    if previous.kind == 'punct':
+        return previous.value not in (')', ']')
+    # After a '}' that closes a block, or a ${...} that continues a template
+    return previous.kind == 'template' and previous.value.endswith('${')
+
+
+def _scan_quoted(source, i, quote):
+    i += 1
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == quote or char == '\n':
+            return i + 1
+        i += 1
+    return i
+
+
+def _scan_template(source, i):
+    """Scan from just after a backtick or '}' to the closing backtick or '${'"""
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '`':
+            return i + 1, False
+        if char == '$' and source.startswith('${', i):
+            return i + 2, True
+        i += 1
+    return i, False
+
+
+def _scan_regex(source, i):
+    i += 1
+    in_class = False
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '\n':
+            return i
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            i += 1
+            break
+        i += 1
+    while i < len(source) and (source[i].isalnum() or source[i] == '_'):
+        i += 1
+    return i
+
+
+def tokenize(source):
+    """
+    Split JavaScript source into a list of Tokens covering every character
+
+    Joining token values reproduces the source exactly. Template literals are
+    emitted as 'template' tokens split around their ${...} expressions, whose
+    contents are tokenized normally.
+    """
+    tokens = []
+    braces = []  # True for a '{' opened by a template ${, False otherwise
+    previous = None
+    i = 0
+    length = len(source)
+
+    while i < length:
+        char = source[i]
+        start = i
+
+        if char.isspace():
+            i = _WHITESPACE.match(source, i).end()
+            kind = 'ws'
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = length if end == -1 else end
+            kind = 'comment'
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = length if end == -1 else end + 2
+            kind = 'comment'
+        elif char in ('"', "'"):
+            i = _scan_quoted(source, i, char)
+            kind = 'string'
+        elif char == '`':
+            i, opens = _scan_template(source, i + 1)
+            if opens:
+                braces.append(True)
+            kind = 'template'
+        elif char == '}' and braces and braces[-1]:
+            braces.pop()
+            i, opens = _scan_template(source, i + 1)
+            if opens:
+                braces.append(True)
+            kind = 'template'
+        elif char == '/' and _regex_allowed(previous):
+            i = _scan_regex(source, i)
+            kind = 'regex'
+        elif _NAME.match(source, i):
+            i = _NAME.match(source, i).end()
+            kind = 'name'
+        elif char.isdigit() or (char == '.' and i + 1 < length and source[i + 1].isdigit()):
+            i = _NUMBER.match(source, i).end()
+            kind = 'number'
+        else:
+            value = next((p for p in PUNCTUATORS if source.startswith(p, i)), char)
+            i += len(value)
+            kind = 'punct'
+            if value == '{':
+                braces.append(False)
+            elif value == '}' and braces:
+                braces.pop()
+
+        token = Token(kind, source[start:i], start, i)
+        tokens.append(token)
+        if token.significant:
+            previous = token
+
+    return tokens
+
+
+def matching_paren(tokens, index):
+    """Index of the ')' closing the '(' at tokens[index], or None if unbalanced"""
+    depth = 0
+    for position in range(index, len(tokens)):
+        token = tokens[position]
+        if token.kind != 'punct':
+            continue
+        if token.value in ('(', '[', '{'):
+            depth += 1
+        elif token.value in (')', ']', '}'):
+            depth -= 1
+            if depth == 0:
+                return position if token.value == ')' else None
+    return None
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Streaming JSON reader for large build and audit documents
+Emits ijson-style (prefix, event, value) tuples while reading the file in
+chunks, and skips unwanted subtrees without decoding them, so only the parts
+a caller asks for are ever turned into Python objects
+"""
+
+import re
+from json import JSONDecodeError
+from json.decoder import scanstring
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?')
+_NUMBER_CHARS = re.compile(r'[-+.\deE]*')
+_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.S)
+_STRUCTURE = re.compile(r'[^"\[\]{}]*')
+_LITERALS = {'t': ('true', True), 'f': ('false', False), 'n': ('null', None)}
+
+
+class _Reader:
+    """A growable window over a text stream, compacted as values are consumed"""
+
+    def __init__(self, stream, chunk_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, at_least=0):
+        """Drop consumed text and read at least one more chunk; False at EOF"""
+        if self.eof:
+            return False
+        chunk = self.stream.read(max(self.chunk_size, at_least))
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode('utf-8')
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        if not chunk:
+            self.eof = True
+        return bool(chunk)
+
+    def error(self, message):
+        return JSONDecodeError(message, self.buffer, self.pos)
+
+    def peek(self):
+        """Next non-whitespace character without consuming it, '' at EOF"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self.error(f"Expecting '{char}'")
+        self.pos += 1
+
+    def read_string(self):
+        while True:
+            try:
+                value, end = scanstring(self.buffer, self.pos + 1, True)
+            except JSONDecodeError:
+                # Unterminated in this window: grow it geometrically and retry
+                if not self.fill(len(self.buffer)):
+                    raise
+                continue
+            self.pos = end
+            return value
+
+    def read_scalar(self):
+        char = self.peek()
+        if char in _LITERALS:
+            word, value = _LITERALS[char]
+            while len(self.buffer) - self.pos < len(word) and self.fill():
+                pass
+            if not self.buffer.startswith(word, self.pos):
+                raise self.error("Expecting value")
+            self.pos += len(word)
+            return value
+        # Find the extent of the number first, since a chunk can end inside it
+        while True:
+            end = _NUMBER_CHARS.match(self.buffer, self.pos).end()
+            if end < len(self.buffer) or self.eof:
+                break
+            self.fill()
+        match = _NUMBER.fullmatch(self.buffer, self.pos, end)
+        if end == self.pos or not match:
+            raise self.error("Expecting value")
+        self.pos = match.end()
+        if match.group(1) or match.group(2):
+            return float(match.group())
+        return int(match.group())
+
+    def skip_string(self):
+        self.pos += 1
+        while True:
+            self.pos = _STRING_BODY.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) and self.buffer[self.pos] == '"':
+                self.pos += 1
+                return
+            if not self.fill(2):
+                raise self.error("Unterminated string")
+
+    def skip_value(self):
+        """Consume one value without decoding it; memory stays at one chunk"""
+        char = self.peek()
+        if char == '"':
+            self.skip_string()
+            return
+        if char not in '[{' or not char:
+            self.read_scalar()
+            return
+        depth = 0
+        while True:
+            self.pos = _STRUCTURE.match(self.buffer, self.pos).end()
+            if self.pos == len(self.buffer):
+                if not self.fill():
+                    raise self.error("Unterminated container")
+                continue
+            char = self.buffer[self.pos]
+            if char == '"':
+                self.skip_string()
+                continue
+            self.pos += 1
+            depth += 1 if char in '[{' else -1
+            if depth == 0:
+                return
+
+
+def _join(prefix, key):
+    return f"{prefix}.{key}" if prefix else key
+
+
+def parse_events(stream, skip=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield (prefix, event, value) for a JSON document read from stream
+
+    Events are start_map, map_key, end_map, start_array, end_array, string,
+    number, boolean and null; prefixes are dotted keys with 'item' for array
+    elements, as in ijson. skip(prefix) returning True drops that value and
+    everything under it without decoding.
+    """
+    reader = _Reader(stream, chunk_size)
+    containers = []  # (is_map, prefix) for every open container
+    prefix = ''
+    expecting_value = True
+
+    while True:
+        if expecting_value:
+            char = reader.peek()
+            if skip is not None and skip(prefix):
+                reader.skip_value()
+            elif char == '{':
+                reader.pos += 1
+                yield prefix, 'start_map', None
+                if reader.peek() == '}':
+                    reader.pos += 1
+                    yield prefix, 'end_map', None
+                else:
+                    containers.append((True, prefix))
+                    reader.expect('"')
+                    reader.pos -= 1
+                    key = reader.read_string()
+                    yield prefix, 'map_key', key
+                    reader.expect(':')
+                    prefix = _join(prefix, key)
+                    continue
+            elif char == '[':
+                reader.pos += 1
+                yield prefix, 'start_array', None
+                if reader.peek() == ']':
+                    reader.pos += 1
+                    yield prefix, 'end_array', None
+                else:
+                    containers.append((False, prefix))
+                    prefix = _join(prefix, 'item')
+                    continue
+            elif char == '"':
+                yield prefix, 'string', reader.read_string()
+            elif not char:
+                raise reader.error("Expecting value")
+            else:
+                value = reader.read_scalar()
+                event = 'null' if value is None else 'boolean' if isinstance(value, bool) else 'number'
+                yield prefix, event, value
+
+        # After a value: a separator, the end of its container, or the end of the document
+        if not containers:
+            if reader.peek():
+                raise reader.error("Extra data")
+            return
+        is_map, parent = containers[-1]
+        char = reader.peek()
+        reader.pos += 1
+        if char == ',':
+            expecting_value = True
+            if is_map:
+                reader.expect('"')
+                reader.pos -= 1
+                key = reader.read_string()
+                yield parent, 'map_key', key
+                reader.expect(':')
+                prefix = _join(parent, key)
+            else:
+                prefix = _join(parent, 'item')
+        elif char == ('}' if is_map else ']'):
+            containers.pop()
+            expecting_value = False
+            yield parent, 'end_map' if is_map else 'end_array', None
+        else:
+            reader.pos -= 1
+            raise reader.error("Expecting ',' delimiter")
+
+
+def build_value(events, event, value):
+    """Materialise the value whose first event was (event, value) from the rest of events"""
+    if event == 'start_map':
+        root = {}
+    elif event == 'start_array':
+        root = []
+    else:
+        return value
+
+    stack = [root]
+    keys = [None]
+    for _, event, value in events:
+        if event == 'map_key':
+            keys[-1] = value
+            continue
+        if event in ('end_map', 'end_array'):
+            stack.pop()
+            keys.pop()
+            if not stack:
+                return root
+            continue
+        item = {} if event == 'start_map' else [] if event == 'start_array' else value
+        container = stack[-1]
+        if isinstance(container, list):
+            container.append(item)
+        else:
+            container[keys[-1]] = item
+        if event in ('start_map', 'start_array'):
+            stack.append(item)
+            keys.append(None)
+    raise ValueError("Event stream ended inside a value")
+
+
+def extract(stream, prefixes, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Decode only the values at the given dotted prefixes
+
+    Returns {prefix: value} for the prefixes present in the document; every
+    other subtree is skipped unparsed.
+    """
+    wanted = set(prefixes)
+    ancestors = {prefix.rsplit('.', i)[0] for prefix in wanted for i in range(1, prefix.count('.') + 1)}
+    ancestors.add('')
+
+    def skip(prefix):
+        if prefix in wanted or prefix in ancestors:
+            return False
+        # Inside a wanted value everything is kept
+        head = prefix
+        while '.' in head:
+            head = head.rsplit('.', 1)[0]
+            if head in wanted:
+                return False
+        return True
+
+    found = {}
+    events = parse_events(stream, skip, chunk_size)
+    for prefix, event, value in events:
+        if prefix in wanted and event != 'map_key' and not event.startswith('end_'):
+            found[prefix] = build_value(events, event, value)
+    return found
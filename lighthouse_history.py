@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Lighthouse report history and regression tracking
+Streams stored Lighthouse JSON reports into a local SQLite time series,
+prints per-metric trends per page and attributes each metric to the
+fragment, client extension or platform asset that caused it
+
+Usage:
+    python3 lighthouse_history.py ingest                 # every report in attached_assets/
+    python3 lighthouse_history.py ingest report.json
+    python3 lighthouse_history.py trends [--url URL] [--fail-on-regression]
+    python3 lighthouse_history.py attribute [--url URL]
+"""
+
+import os
+import re
+import sys
+import glob
+import sqlite3
+import argparse
+from collections import defaultdict
+from urllib.parse import urlparse
+
+from build_manifest import hash_file
+from json_stream import extract
+
+DEFAULT_DB = ".lighthouse-history.db"
+DEFAULT_REPORTS = os.path.join("attached_assets", "*lighthouseVersion*")
+
+# Metric column -> (audit id, label)
+METRICS = {
+    'lcp': ('largest-contentful-paint', 'LCP'),
+    'cls': ('cumulative-layout-shift', 'CLS'),
+    'tbt': ('total-blocking-time', 'TBT'),
+    'fcp': ('first-contentful-paint', 'FCP'),
+    'si': ('speed-index', 'SI'),
+}
+
+# Change from the previous run that counts as a regression (score drops, the rest grow)
+REGRESSION_THRESHOLDS = {'score': 0.05, 'lcp': 250, 'cls': 0.02, 'tbt': 50, 'fcp': 250, 'si': 250}
+
+# Resource tables: kind -> (audit id, bytes key, wasted bytes key, milliseconds key)
+RESOURCE_AUDITS = {
+    'render-blocking': ('render-blocking-resources', 'totalBytes', None, 'wastedMs'),
+    'unused-css': ('unused-css-rules', 'totalBytes', 'wastedBytes', None),
+    'unused-js': ('unused-javascript', 'totalBytes', 'wastedBytes', None),
+    'main-thread': ('bootup-time', None, None, 'total'),
+}
+
+REPORT_FIELDS = ['lighthouseVersion', 'requestedUrl', 'finalDisplayedUrl', 'fetchTime',
+                 'configSettings.formFactor', 'categories.performance.score',
+                 'audits.largest-contentful-paint-element', 'audits.layout-shifts']
+REPORT_FIELDS += [f"audits.{audit}" for audit, _ in METRICS.values()]
+REPORT_FIELDS += [f"audits.{audit}" for audit, _, _, _ in RESOURCE_AUDITS.values()]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    sha256 TEXT UNIQUE NOT NULL,
+    source TEXT NOT NULL,
+    url TEXT NOT NULL,
+    fetch_time TEXT NOT NULL,
+    form_factor TEXT,
+    lighthouse_version TEXT,
+    score REAL, lcp REAL, cls REAL, tbt REAL, fcp REAL, si REAL
+);
+CREATE INDEX IF NOT EXISTS runs_by_url ON runs (url, form_factor, fetch_time);
+CREATE TABLE IF NOT EXISTS resources (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    kind TEXT NOT NULL,
+    url TEXT NOT NULL,
+    total_bytes INTEGER, wasted_bytes INTEGER, ms REAL
+);
+CREATE TABLE IF NOT EXISTS elements (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    metric TEXT NOT NULL,
+    selector TEXT,
+    snippet TEXT,
+    score REAL
+);
+"""
+
+
+def _items(audit):
+    return ((audit or {}).get('details') or {}).get('items') or []
+
+
+def _nodes(items):
+    """Element nodes of a details table, looking inside nested list/table items"""
+    for item in items:
+        if item.get('type') in ('table', 'list'):
+            yield from _nodes(item.get('items') or [])
+        elif isinstance(item.get('node'), dict) and item['node'].get('type') == 'node':
+            yield item
+
+
+def read_report(path):
+    """
+    Stream one Lighthouse JSON report into a flat run record
+
+    Only the handful of audits used here are decoded; screenshots, the i18n
+    table and the other audits are skipped unparsed.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        fields = extract(f, REPORT_FIELDS)
+    if 'fetchTime' not in fields or 'lighthouseVersion' not in fields:
+        raise ValueError(f"{path}: not a Lighthouse report")
+
+    run = {
+        'sha256': hash_file(path),
+        'source': os.path.basename(path),
+        'url': fields.get('finalDisplayedUrl') or fields.get('requestedUrl'),
+        'fetch_time': fields['fetchTime'],
+        'form_factor': fields.get('configSettings.formFactor'),
+        'lighthouse_version': fields['lighthouseVersion'],
+        'score': fields.get('categories.performance.score'),
+        'resources': [],
+        'elements': [],
+    }
+    for column, (audit, _) in METRICS.items():
+        run[column] = (fields.get(f"audits.{audit}") or {}).get('numericValue')
+
+    for kind, (audit, bytes_key, wasted_key, ms_key) in RESOURCE_AUDITS.items():
+        for item in _items(fields.get(f"audits.{audit}")):
+            if not isinstance(item.get('url'), str):
+                continue
+            run['resources'].append({
+                'kind': kind,
+                'url': item['url'],
+                'total_bytes': item.get(bytes_key) if bytes_key else None,
+                'wasted_bytes': item.get(wasted_key) if wasted_key else None,
+                'ms': item.get(ms_key) if ms_key else None,
+            })
+
+    for item in _nodes(_items(fields.get('audits.largest-contentful-paint-element'))):
+        run['elements'].append({'metric': 'lcp', 'selector': item['node'].get('selector'),
+                                'snippet': item['node'].get('snippet'), 'score': run['lcp']})
+    for item in _nodes(_items(fields.get('audits.layout-shifts'))):
+        run['elements'].append({'metric': 'cls', 'selector': item['node'].get('selector'),
+                                'snippet': item['node'].get('snippet'), 'score': item.get('score')})
+    return run
+
+
+def connect(db_path=DEFAULT_DB):
+    connection = sqlite3.connect(db_path)
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def store_run(connection, run):
+    """Insert a run and its resources; returns False if the report was already stored"""
+    if connection.execute("SELECT 1 FROM runs WHERE sha256 = ?", (run['sha256'],)).fetchone():
+        return False
+    columns = ['sha256', 'source', 'url', 'fetch_time', 'form_factor', 'lighthouse_version', 'score', *METRICS]
+    cursor = connection.execute(
+        f"INSERT INTO runs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        [run[column] for column in columns])
+    run_id = cursor.lastrowid
+    connection.executemany(
+        "INSERT INTO resources (run_id, kind, url, total_bytes, wasted_bytes, ms) VALUES (?, ?, ?, ?, ?, ?)",
+        [(run_id, r['kind'], r['url'], r['total_bytes'], r['wasted_bytes'], r['ms']) for r in run['resources']])
+    connection.executemany(
+        "INSERT INTO elements (run_id, metric, selector, snippet, score) VALUES (?, ?, ?, ?, ?)",
+        [(run_id, e['metric'], e['selector'], e['snippet'], e['score']) for e in run['elements']])
+    connection.commit()
+    return True
+
+
+def page_runs(connection, url=None):
+    """Runs grouped by (url, form factor), oldest first"""
+    query = "SELECT * FROM runs"
+    params = []
+    if url:
+        query += " WHERE url = ?"
+        params.append(url)
+    groups = defaultdict(list)
+    for row in connection.execute(query + " ORDER BY url, form_factor, fetch_time", params):
+        groups[(row['url'], row['form_factor'])].append(row)
+    return groups
+
+
+class AssetOwners:
+    """
+    Map Lighthouse resource URLs and element selectors back to the source tree
+
+    Selectors are matched on the CSS classes each fragment's markup declares;
+    inline styles and scripts on the first line of a fragment's CSS or JS;
+    URLs on client-extension names, otherwise on the Liferay module serving them.
+    """
+
+    def __init__(self, base_dir="."):
+        self.class_owners = defaultdict(set)
+        self.fragment_names = []
+        self.first_lines = {}
+        self.extensions = {}
+
+        for fragment_json in glob.glob(os.path.join(base_dir, 'fragment-collection', '*', '*', 'fragment.json')):
+            fragment_dir = os.path.dirname(fragment_json)
+            name = os.path.basename(fragment_dir)
+            self.fragment_names.append(name)
+            for file_name in os.listdir(fragment_dir):
+                path = os.path.join(fragment_dir, file_name)
+                if file_name.endswith('.html'):
+                    with open(path, 'r', encoding='utf-8') as f:
+                        markup = re.sub(r'\$\{[^}]*\}', ' ', f.read())
+                    for classes in re.findall(r'class="([^"]*)"', markup):
+                        for class_name in classes.split():
+                            self.class_owners[class_name].add(name)
+                elif file_name.endswith(('.css', '.js')):
+                    with open(path, 'r', encoding='utf-8') as f:
+                        first = next((line.strip() for line in f if line.strip()), '')
+                    if first:
+                        self.first_lines[first] = name
+        # Longest names first so jm-hero-* never resolves to a shorter jm-* fragment
+        self.fragment_names.sort(key=len, reverse=True)
+
+        for extension_dir in glob.glob(os.path.join(base_dir, '*-client-extension')):
+            name = os.path.basename(extension_dir)
+            brand = name.split('-')[0]
+            for alias in (name, f"{brand}global", f"{brand}-global"):
+                self.extensions[re.sub(r'[^a-z0-9]', '', alias.lower())] = name
+
+    def for_selector(self, selector):
+        """Fragment owning an element selector, or None"""
+        classes = re.findall(r'\.([\w-]+)', selector or '')
+        # The element's own classes are the most specific, so look right to left
+        for class_name in reversed(classes):
+            owners = self.class_owners.get(class_name, set())
+            if len(owners) == 1:
+                return f"fragment {next(iter(owners))}"
+        for class_name in reversed(classes):
+            for name in self.fragment_names:
+                if class_name == name or class_name.startswith(name + '-'):
+                    return f"fragment {name}"
+        return None
+
+    def for_url(self, url, page_url=None):
+        """Owner of a resource URL (or of the inline code Lighthouse reports in its place)"""
+        if url == 'Unattributable':
+            return "unattributable"
+        if not re.match(r'^[a-z-]+://', url):
+            first = next((line.strip() for line in url.splitlines() if line.strip()), '')
+            name = self.first_lines.get(first)
+            return f"fragment {name}" if name else "inline code"
+        parsed = urlparse(url)
+        if parsed.scheme == 'chrome-extension':
+            return "browser extension"
+        if page_url and url.split('#')[0].rstrip('/') == page_url.split('#')[0].rstrip('/'):
+            return "page HTML"
+
+        flat = re.sub(r'[^a-z0-9]', '', (parsed.netloc.split('.')[0] + parsed.path).lower())
+        for alias, name in self.extensions.items():
+            if alias in flat:
+                return f"client extension {name}"
+        segments = [s for s in parsed.path.split('/') if s]
+        if len(segments) >= 2 and segments[0] == 'o':
+            return f"liferay {segments[1]}"
+        if segments and segments[0] == 'combo':
+            return "liferay combo"
+        return parsed.netloc or url
+
+
+def _format(column, value):
+    if value is None:
+        return '-'
+    if column == 'score':
+        return f"{value * 100:.0f}"
+    if column == 'cls':
+        return f"{value:.3f}"
+    return f"{value:,.0f}"
+
+
+def _regressions(previous, latest):
+    found = []
+    for column, threshold in REGRESSION_THRESHOLDS.items():
+        if previous[column] is None or latest[column] is None:
+            continue
+        change = latest[column] - previous[column]
+        if column == 'score':
+            change = -change
+        if change > threshold:
+            found.append(column)
+    return found
+
+
+def print_trends(connection, url=None):
+    """Print every page's metric history; returns the pages whose latest run regressed"""
+    regressed = []
+    columns = ['score', *METRICS]
+    labels = ['Score'] + [label for _, label in METRICS.values()]
+    for (page, form_factor), runs in page_runs(connection, url).items():
+        print(f"\n📈 {page} ({form_factor or 'unknown'}, {len(runs)} run{'s' if len(runs) != 1 else ''})")
+        print(f"  {'Fetched':<20} " + ' '.join(f"{label:>8}" for label in labels))
+        for row in runs:
+            print(f"  {row['fetch_time'][:19].replace('T', ' '):<20} "
+                  + ' '.join(f"{_format(column, row[column]):>8}" for column in columns))
+        if len(runs) < 2:
+            continue
+
+        first, previous, latest = runs[0], runs[-2], runs[-1]
+        changes = []
+        for column, label in zip(columns, labels):
+            if first[column] is None or latest[column] is None:
+                continue
+            delta = latest[column] - first[column]
+            arrow = '▲' if delta > 0 else '▼' if delta < 0 else '='
+            changes.append(f"{label} {arrow}{_format(column, abs(delta))}")
+        print(f"  {'First → latest':<20} " + ', '.join(changes))
+
+        worse = _regressions(previous, latest)
+        if worse:
+            regressed.append(page)
+            print(f"  ⚠️ Regression since previous run: "
+                  f"{', '.join(labels[columns.index(column)] for column in worse)}")
+        else:
+            print("  ✓ No regression since previous run")
+    return regressed
+
+
+def _attribution(owners, rows, page_url):
+    """Totals per owner for one run's resource rows"""
+    totals = defaultdict(lambda: {'ms': 0.0, 'wasted_bytes': 0, 'total_bytes': 0})
+    for row in rows:
+        owner = owners.for_url(row['url'], page_url)
+        for key in ('ms', 'wasted_bytes', 'total_bytes'):
+            totals[owner][key] += row[key] or 0
+    return totals
+
+
+def print_attribution(connection, owners, url=None):
+    """Attribute the latest run of each page to fragments and assets"""
+    sections = [
+        ('TBT: main-thread time', 'main-thread', 'ms'),
+        ('LCP/FCP: render-blocking time', 'render-blocking', 'ms'),
+        ('Unused CSS bytes', 'unused-css', 'wasted_bytes'),
+        ('Unused JavaScript bytes', 'unused-js', 'wasted_bytes'),
+    ]
+    for (page, form_factor), runs in page_runs(connection, url).items():
+        run = runs[-1]
+        print(f"\n🔎 {page} ({form_factor or 'unknown'}) — {run['fetch_time'][:19].replace('T', ' ')}")
+
+        for row in connection.execute("SELECT * FROM elements WHERE run_id = ? ORDER BY metric, score DESC",
+                                      (run['id'],)):
+            label = 'LCP element' if row['metric'] == 'lcp' else f"CLS shift {row['score']:.3f}"
+            owner = owners.for_selector(row['selector']) or 'unknown'
+            print(f"  {label:<18} {owner:<36} {row['selector']}")
+
+        for title, kind, key in sections:
+            rows = connection.execute("SELECT * FROM resources WHERE run_id = ? AND kind = ?",
+                                      (run['id'], kind)).fetchall()
+            totals = _attribution(owners, rows, page)
+            if not totals:
+                continue
+            unit = 'ms' if key == 'ms' else 'bytes'
+            print(f"  {title}:")
+            for owner, values in sorted(totals.items(), key=lambda item: item[1][key], reverse=True):
+                print(f"    {owner:<52} {values[key]:>10,.0f} {unit}")
+
+
+def ingest(connection, paths):
+    """Stream reports into the store; returns (stored, skipped, failed) counts"""
+    stored = skipped = failed = 0
+    for path in paths:
+        try:
+            run = read_report(path)
+        except ValueError as e:
+            print(f"❌ {path}: {e}")
+            failed += 1
+            continue
+        if not store_run(connection, run):
+            skipped += 1
+            continue
+        stored += 1
+        print(f"✓ {run['fetch_time'][:19].replace('T', ' ')}  {run['url']}  score {_format('score', run['score'])}  "
+              f"LCP {_format('lcp', run['lcp'])}ms  CLS {_format('cls', run['cls'])}  "
+              f"TBT {_format('tbt', run['tbt'])}ms")
+    return stored, skipped, failed
+
+
+def main(argv=None):
+    """Ingest reports, print trends or attribute the latest runs"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', default=DEFAULT_DB, help=f'SQLite history file (default: {DEFAULT_DB})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = commands.add_parser('ingest', help='Store Lighthouse JSON reports')
+    ingest_parser.add_argument('reports', nargs='*', help=f'Report files (default: {DEFAULT_REPORTS})')
+
+    trends_parser = commands.add_parser('trends', help='Print per-metric history per page')
+    trends_parser.add_argument('--url', help='Only this page URL')
+    trends_parser.add_argument('--fail-on-regression', action='store_true',
+                               help='Exit 1 if any page regressed since its previous run')
+
+    attribute_parser = commands.add_parser('attribute', help='Attribute the latest run of each page to its assets')
+    attribute_parser.add_argument('--url', help='Only this page URL')
+    args = parser.parse_args(argv)
+
+    connection = connect(args.db)
+    try:
+        if args.command == 'ingest':
+            paths = args.reports or sorted(glob.glob(DEFAULT_REPORTS))
+            stored, skipped, failed = ingest(connection, paths)
+            print(f"\n📦 {stored} report{'s' if stored != 1 else ''} stored, {skipped} already in {args.db}"
+                  + (f", {failed} failed" if failed else ""))
+            return not failed
+        if args.command == 'trends':
+            regressed = print_trends(connection, args.url)
+            return not (regressed and args.fail_on_regression)
+        print_attribution(connection, AssetOwners(), args.url)
+        return True
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
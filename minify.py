@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Offline JavaScript and CSS minification for fragments and client extensions
+Strips comments and whitespace without renaming anything, optionally writing
+v3 source maps, and runs as a cached build stage inside the ZIP builders
+
+Usage:
+    python3 minify.py                 # report raw/minified/gzip sizes for every asset
+    python3 minify.py path/to/index.js --source-map
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import argparse
+
+from build_stages import BuildStage, origin
+from js_tokenizer import tokenize
+
+BASE64_DIGITS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+# A line break before one of these can be dropped without changing how ASI applies
+_NEWLINE_FREE_BEFORE = frozenset({')', ']', '}', ',', ';', '.', '?.'})
+# ...and after any punctuator except these, which can end a statement
+_STATEMENT_ENDING_PUNCT = frozenset({')', ']', '}', '++', '--'})
+
+_CSS_TOKEN = re.compile(r'''
+    (?P<comment>/\*.*?(?:\*/|\Z))
+  | (?P<string>"(?:\\.|[^"\\\n])*"?|'(?:\\.|[^'\\\n])*'?)
+  | (?P<ws>\s+)
+  | (?P<punct>[{};:,>])
+  | (?P<other>[^\s{};:,>"'/]+|/)
+''', re.VERBOSE | re.DOTALL)
+
+# Spaces around these are never significant in CSS (':' only loses the space after it)
+_CSS_TIGHT_BEFORE = frozenset('{};,>')
+_CSS_TIGHT_AFTER = frozenset('{};,>:')
+
+
+def _vlq(value):
+    value = (-value << 1) | 1 if value < 0 else value << 1
+    encoded = ''
+    while True:
+        digit = value & 31
+        value >>= 5
+        if value:
+            digit |= 32
+        encoded += BASE64_DIGITS[digit]
+        if not value:
+            return encoded
+
+
+class SourceMap:
+    """Accumulates generated-to-original positions and serializes a v3 source map"""
+
+    def __init__(self, source_name, source_content):
+        self.source_name = source_name
+        self.source_content = source_content
+        self.lines = [[]]
+        self._line_starts = [0] + [m.end() for m in re.finditer('\n', source_content)]
+
+    def _original_position(self, offset):
+        low, high = 0, len(self._line_starts) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._line_starts[middle] <= offset:
+                low = middle
+            else:
+                high = middle - 1
+        return low, offset - self._line_starts[low]
+
+    def add(self, generated_column, original_offset):
+        self.lines[-1].append((generated_column, *self._original_position(original_offset)))
+
+    def newline(self):
+        self.lines.append([])
+
+    def to_json(self, file_name):
+        mappings = []
+        previous_source_line = previous_source_column = 0
+        for segments in self.lines:
+            previous_column = 0
+            encoded = []
+            for column, source_line, source_column in segments:
+                encoded.append(_vlq(column - previous_column) + _vlq(0)
+                               + _vlq(source_line - previous_source_line)
+                               + _vlq(source_column - previous_source_column))
+                previous_column = column
+                previous_source_line = source_line
+                previous_source_column = source_column
+            mappings.append(','.join(encoded))
+        return json.dumps({
+            'version': 3,
+            'file': file_name,
+            'sources': [self.source_name],
+            'sourcesContent': [self.source_content],
+            'names': [],
+            'mappings': ';'.join(mappings),
+        }, separators=(',', ':'))
+
+
+class _Output:
+    """Generated text plus an optional source map kept in step with it"""
+
+    def __init__(self, source_map=None):
+        self.parts = []
+        self.column = 0
+        self.last = ''
+        self.source_map = source_map
+
+    def write(self, text, original_offset=None):
+        if self.source_map is not None and original_offset is not None:
+            self.source_map.add(self.column, original_offset)
+        self.parts.append(text)
+        if '\n' in text:
+            for _ in range(text.count('\n')):
+                if self.source_map is not None:
+                    self.source_map.newline()
+            self.column = len(text) - text.rfind('\n') - 1
+        else:
+            self.column += len(text)
+        self.last = text
+
+    def text(self):
+        return ''.join(self.parts)
+
+
+def _word_char(char):
+    return char.isalnum() or char in '_$' or ord(char) > 127
+
+
+def _needs_space(previous, following):
+    """Whether two JS tokens would merge into something else if written adjacently"""
+    a, b = previous.value[-1], following.value[0]
+    if _word_char(a) and _word_char(b):
+        return True
+    if previous.kind == 'number' and b == '.':
+        return True
+    if (a, b) in (('+', '+'), ('-', '-'), ('+', '++'), ('-', '--'), ('/', '/')):
+        return True
+    # Keep '<!--' and '-->' from forming HTML-like comments
+    return (a == '<' and following.value.startswith('!')) or (a == '-' and b == '>')
+
+
+def minify_js(source, source_map=None):
+    """
+    Remove comments and redundant whitespace from JavaScript
+
+    Identifiers are never renamed, so Liferay's fragmentElement and
+    configuration globals keep working. Line breaks are kept wherever
+    automatic semicolon insertion could depend on them. /*! comments are
+    preserved for licenses. Returns None if the result fails its self-check.
+    """
+    tokens = tokenize(source)
+    output = _Output(source_map)
+    previous = None
+    pending_newline = False
+    pending_space = False
+
+    for token in tokens:
+        if token.kind == 'ws':
+            pending_newline = pending_newline or '\n' in token.value
+            pending_space = True
+            continue
+        if token.kind == 'comment':
+            if token.value.startswith('/*!'):
+                if output.parts:
+                    output.write('\n')
+                output.write(token.value, token.start)
+                output.write('\n')
+                previous = None
+            else:
+                pending_newline = pending_newline or '\n' in token.value or token.value.startswith('//')
+                pending_space = True
+            continue
+
+        if previous is not None:
+            drop_newline = (token.value in _NEWLINE_FREE_BEFORE and token.kind == 'punct') or (
+                previous.kind == 'punct' and previous.value not in _STATEMENT_ENDING_PUNCT)
+            if pending_newline and not drop_newline:
+                output.write('\n')
+            elif pending_space and _needs_space(previous, token):
+                output.write(' ')
+        output.write(token.value, token.start)
+        previous = token
+        pending_newline = pending_space = False
+
+    minified = output.text()
+    original = [t.value for t in tokens if t.significant]
+    if [t.value for t in tokenize(minified) if t.significant] != original:
+        return None
+    return minified
+
+
+def minify_css(source, source_map=None):
+    """
+    Remove comments and redundant whitespace from CSS
+
+    Whitespace is only dropped around braces, semicolons, commas, '>' and
+    after ':', so descendant selectors like 'a :hover' and calc() operators
+    keep their meaning. The last ';' in each block is removed.
+    """
+    output = _Output(source_map)
+    pending_space = False
+    pending_semicolon = None
+
+    for match in _CSS_TOKEN.finditer(source):
+        kind = match.lastgroup
+        value = match.group()
+        if kind == 'ws':
+            pending_space = True
+            continue
+        if kind == 'comment':
+            if value.startswith('/*!'):
+                output.write(value, match.start())
+            else:
+                pending_space = True
+            continue
+
+        if pending_semicolon is not None:
+            if value != '}':
+                output.write(';', pending_semicolon)
+            pending_semicolon = None
+        if value == ';' and kind == 'punct':
+            pending_semicolon = match.start()
+            pending_space = False
+            continue
+
+        if (pending_space and output.last and output.last[-1] not in _CSS_TIGHT_AFTER
+                and not (kind == 'punct' and value in _CSS_TIGHT_BEFORE)):
+            output.write(' ')
+        output.write(value, match.start())
+        pending_space = False
+
+    if pending_semicolon is not None:
+        output.write(';', pending_semicolon)
+    return output.text()
+
+
+def minify(source, kind, source_name=None):
+    """
+    Minify JS or CSS source ('js' or 'css')
+
+    Returns (minified, source_map_json) where the map is None unless
+    source_name is given; minified is None if JS could not be minified safely.
+    """
+    source_map = SourceMap(source_name, source) if source_name else None
+    minified = minify_js(source, source_map) if kind == 'js' else minify_css(source, source_map)
+    if minified is None or source_map is None:
+        return minified, None
+    return minified, source_map.to_json(source_name)
+
+
+def gzip_size(data):
+    """Size of data after gzip at the level most servers use"""
+    return len(gzip.compress(data, compresslevel=6, mtime=0))
+
+
+def asset_kind(path):
+    """'js' or 'css' for minifiable assets, None otherwise"""
+    lower = path.lower()
+    if lower.endswith(('.min.js', '.min.css')):
+        return None
+    if lower.endswith('.js'):
+        return 'js'
+    if lower.endswith('.css'):
+        return 'css'
+    return None
+
+
+class MinifyStage(BuildStage):
+    """
+    Build stage that minifies .js and .css entries
+
+    With source_maps=True every minified asset gains a '<name>.map' sibling
+    and a sourceMappingURL comment pointing at it.
+    """
+
+    name = 'minify'
+    version = 1
+
+    def __init__(self, source_maps=False, **kwargs):
+        super().__init__(**kwargs)
+        self.source_maps = source_maps
+        self._seen = set()
+
+    def options(self):
+        return {'source_maps': self.source_maps}
+
+    def _minified(self, data, kind, map_name):
+        source = data.decode('utf-8')
+        minified, _ = minify(source, kind)
+        if minified is None or len(minified.encode('utf-8')) >= len(data):
+            return None
+        if self.source_maps:
+            comment = f"//# sourceMappingURL={map_name}" if kind == 'js' else f"/*# sourceMappingURL={map_name} */"
+            minified = f"{minified}\n{comment}\n"
+        return minified.encode('utf-8')
+
+    def _source_map(self, data, kind, source_name):
+        _, source_map = minify(data.decode('utf-8'), kind, source_name)
+        return source_map.encode('utf-8') if source_map else None
+
+    def process(self, entries):
+        archive_paths = {archive_path for _, archive_path in entries}
+        output = []
+        for file_path, archive_path in entries:
+            kind = asset_kind(archive_path)
+            if kind is None:
+                output.append((file_path, archive_path))
+                continue
+
+            base_name = os.path.basename(archive_path)
+            map_name = f"{base_name}.map"
+            minified_path, hit = self.cached(
+                file_path, f"-{base_name}", lambda data: self._minified(data, kind, map_name))
+            output.append((minified_path, archive_path))
+            if minified_path == file_path:
+                continue
+
+            if file_path not in self._seen:
+                self._seen.add(file_path)
+                with open(file_path, 'rb') as f:
+                    raw = f.read()
+                with open(minified_path, 'rb') as f:
+                    minified = f.read()
+                self.records.append({
+                    'path': origin(file_path), 'before': len(raw), 'after': len(minified),
+                    'gzip_before': gzip_size(raw), 'gzip_after': gzip_size(minified),
+                    'note': 'cached' if hit else '',
+                })
+
+            map_archive_path = f"{archive_path}.map"
+            if self.source_maps and map_archive_path not in archive_paths:
+                map_path, _ = self.cached(file_path, f"-{map_name}",
+                                          lambda data: self._source_map(data, kind, base_name))
+                if map_path != file_path:
+                    output.append((map_path, map_archive_path))
+        return output
+
+    @classmethod
+    def print_report(cls, records):
+        """Print raw, minified and gzipped sizes per asset"""
+        if not records:
+            return
+        print(f"\n{cls.name} stage: {len(records)} assets")
+        print(f"  {'Asset':<80} {'Raw':>9} {'Minified':>9} {'Gzip raw':>9} {'Gzip min':>9}")
+        for r in sorted(records, key=lambda r: r['gzip_before'] - r['gzip_after'], reverse=True):
+            print(f"  {r['path']:<80} {r['before']:>9,} {r['after']:>9,} "
+                  f"{r['gzip_before']:>9,} {r['gzip_after']:>9,}")
+        totals = [sum(r[key] for r in records) for key in ('before', 'after', 'gzip_before', 'gzip_after')]
+        print(f"  {'Total':<80} {totals[0]:>9,} {totals[1]:>9,} {totals[2]:>9,} {totals[3]:>9,}")
+        print(f"  Saved {totals[0] - totals[1]:,} bytes raw, {totals[2] - totals[3]:,} bytes over the wire (gzip)")
+
+
+def main(argv=None):
+    """Report minification savings, or write minified copies of the given files"""
+    from clean_debug import find_js_files
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('paths', nargs='*', help='Files to minify (default: report on every fragment and client-extension asset)')
+    parser.add_argument('--output-dir', help='Write minified files here instead of only reporting')
+    parser.add_argument('--source-map', action='store_true', help='Also write a .map file next to each output')
+    args = parser.parse_args(argv)
+
+    paths = args.paths or sorted(set(find_js_files()) | {
+        os.path.join(root, name)
+        for base in ['fragment-collection'] + [d for d in os.listdir('.') if d.endswith('-client-extension')]
+        for root, _, files in os.walk(base) for name in files if name.endswith('.css')
+    })
+
+    records = []
+    for path in paths:
+        kind = asset_kind(path)
+        if kind is None:
+            continue
+        with open(path, 'rb') as f:
+            raw = f.read()
+        name = os.path.basename(path)
+        minified, source_map = minify(raw.decode('utf-8'), kind, name if args.source_map else None)
+        if minified is None:
+            print(f"⚠️ Could not minify {path} safely; left as is")
+            continue
+        data = minified.encode('utf-8')
+        records.append({'path': path, 'before': len(raw), 'after': len(data),
+                        'gzip_before': gzip_size(raw), 'gzip_after': gzip_size(data), 'note': ''})
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+            output_path = os.path.join(args.output_dir, name)
+            if source_map:
+                comment = f"//# sourceMappingURL={name}.map" if kind == 'js' else f"/*# sourceMappingURL={name}.map */"
+                data += f"\n{comment}\n".encode('utf-8')
+                with open(f"{output_path}.map", 'w', encoding='utf-8') as f:
+                    f.write(source_map)
+            with open(output_path, 'wb') as f:
+                f.write(data)
+    MinifyStage.print_report(records)
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Build-time navigation menu snapshots for header fragments
+Reads an exported headless-delivery navigation menu (a JSON file, or a URL
+such as the preview_server.py stand-in), pre-renders the menu markup into each
+*-header fragment's index.html and embeds a versioned JSON snapshot next to
+it. The header script only calls the navigation-menus API once the snapshot
+is older than its max age, so first render no longer waits on a round trip.
+
+SOURCE may contain {brand} (e.g. navigation-menus/{brand}.json). A file may
+hold one menu, a bare item list, or {brand or 'default': menu}.
+
+Usage:
+    python3 nav_snapshot.py 'navigation-menus/{brand}.json'
+    python3 nav_snapshot.py http://127.0.0.1:8080/o/headless-delivery/v1.0/navigation-menus/main --only jm
+"""
+
+import os
+import re
+import sys
+import json
+import html
+import time
+import hashlib
+import argparse
+import urllib.request
+
+from build_stages import BuildStage, origin
+
+DEFAULT_MAX_AGE_HOURS = 1
+FETCH_TIMEOUT = 10
+
+# The Sigma header predates fragment-templates/header and renders its own
+# markup; every other brand uses the template's
+SIGMA_LAYOUT_BRANDS = frozenset({'sigma'})
+
+_ARROW = ('<svg width="12" height="12" viewBox="0 0 24 24" fill="none">'
+          '<path d="M6 9l6 6 6-6" stroke="currentColor" stroke-width="2"/></svg>')
+
+
+class NavigationError(ValueError):
+    """Raised when a navigation menu cannot be read"""
+
+
+class StaleMenuError(NavigationError):
+    """Raised when an exported menu file is older than the snapshot max age"""
+
+
+def load_menu(source, brand, max_age=None):
+    """
+    Read the navigation menu for a brand from a file or URL
+
+    Returns (menu, taken_at) where taken_at is when the menu was fetched, in
+    epoch seconds. A file exported more than max_age seconds ago raises
+    StaleMenuError rather than being snapshotted as if it were current.
+    """
+    location = source.replace('{brand}', brand)
+    try:
+        if re.match(r'https?://', location):
+            request = urllib.request.Request(location, headers={'Accept': 'application/json'})
+            with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+                data = json.load(response)
+        else:
+            exported_age = time.time() - os.path.getmtime(location)
+            if max_age is not None and exported_age > max_age:
+                raise StaleMenuError(f"{location}: exported {exported_age / 3600:.1f}h ago, "
+                                     f"older than the {max_age / 3600:g}h max age; export the menu again")
+            with open(location, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        taken_at = time.time()
+    except StaleMenuError:
+        raise
+    except (OSError, ValueError) as e:
+        raise NavigationError(f"{location}: {e}")
+
+    if isinstance(data, dict) and 'navigationMenuItems' not in data:
+        data = data.get(brand, data.get('default'))
+    if isinstance(data, list):
+        data = {'navigationMenuItems': data}
+    if not isinstance(data, dict) or not isinstance(data.get('navigationMenuItems'), list):
+        raise NavigationError(f"{location}: no navigationMenuItems for '{brand}'")
+    return data, taken_at
+
+
+def menu_items(items):
+    """Normalize API (navigationMenuItems/link) and fallback (children/url) items"""
+    normalized = []
+    for item in items:
+        children = item.get('navigationMenuItems') or item.get('children') or []
+        normalized.append({
+            'name': item.get('name') or item.get('title') or 'Unnamed',
+            'link': item.get('link') or item.get('url') or '#',
+            'external': bool(item.get('external')),
+            'children': menu_items(children),
+        })
+    return normalized
+
+
+def _text(value):
+    """HTML-escape, and keep FreeMarker from reading ${ or [# in menu text"""
+    return html.escape(value).replace('$', '&#36;').replace('[', '&#91;')
+
+
+def _link(classes, item, extra=''):
+    target = ' target="_blank" rel="noopener"' if item['external'] else ''
+    link = _text(item['link'])
+    # href is rewritten with the site prefix at runtime; data-nav-link keeps the menu's own link
+    return f'<a href="{link}" data-nav-link="{link}" class="{classes}"{target}{extra}>'
+
+
+def render_template_nav(items, prefix):
+    """Desktop and mobile markup as fragment-templates/header's createNavItemFromAPI() builds it"""
+    desktop, mobile = [], []
+    mega_index = 1
+    for item in items:
+        children = item['children']
+        classes = f"{prefix}-nav-item" + (f" has-dropdown {prefix}-has-dropdown" if children else '')
+        extra = ' aria-expanded="false" aria-haspopup="true"' if children else ''
+        arrow = f'<span class="{prefix}-nav-arrow">{_ARROW}</span>' if children else ''
+        markup = f'<li class="{classes}">{_link(f"{prefix}-nav-link", item, extra)}{_text(item["name"])}{arrow}</a>'
+        if children:
+            links = ''.join(f'<li>{_link(f"{prefix}-dropdown-item", child)}{_text(child["name"])}</a></li>'
+                            for child in children)
+            markup += (f'<div class="{prefix}-dropdown-menu">'
+                       f'<div class="{prefix}-mega-content" data-mega-index="{mega_index}" '
+                       f'data-mega-menu-id="mega-{mega_index}"></div>'
+                       f'<div class="{prefix}-dropdown-links"><ul>{links}</ul></div></div>')
+            mega_index += 1
+        desktop.append(markup + '</li>')
+
+        markup = (f'<li class="{prefix}-mobile-nav-item{" has-dropdown" if children else ""}">'
+                  f'{_link(f"{prefix}-mobile-nav-link", item)}{_text(item["name"])}</a>')
+        if children:
+            links = ''.join(f'{_link(f"{prefix}-mobile-dropdown-item", child)}{_text(child["name"])}</a>'
+                            for child in children)
+            markup += f'<div class="{prefix}-mobile-dropdown-menu">{links}</div>'
+        mobile.append(markup + '</li>')
+    return '\n'.join(desktop), '\n'.join(mobile)
+
+
+def _sigma_mobile_item(item, style=''):
+    markup = f'<li class="sigma-mobile-nav-item"{style}>{_link("sigma-mobile-nav-link", item)}{_text(item["name"])}</a>'
+    if item['children']:
+        children = ''.join(_sigma_mobile_item(child, ' style="padding-left: 2rem;"') for child in item['children'])
+        markup += f'<ul class="sigma-mobile-nav-children">{children}</ul>'
+    return markup + '</li>'
+
+
+def render_sigma_nav(items, prefix='sigma'):
+    """Desktop and mobile markup as the Sigma header's createNavItem()/createMobileNavItem() build it"""
+    desktop = []
+    for index, item in enumerate(items):
+        markup = f'{_link("sigma-nav-link", item)}{_text(item["name"])}</a>'
+        if item['children']:
+            links = ''.join(f'{_link("sigma-dropdown-item", child)}{_text(child["name"])}</a>'
+                            for child in item['children'])
+            desktop.append(f'<li class="sigma-nav-item has-dropdown" data-mega-menu-id="{index + 1}">'
+                           f'{markup}<div class="sigma-dropdown-menu">{links}</div></li>')
+        else:
+            desktop.append(f'<li class="sigma-nav-item">{markup}</li>')
+    return '\n'.join(desktop), '\n'.join(_sigma_mobile_item(item) for item in items)
+
+
+def snapshot_document(menu, items, taken_at, max_age):
+    """The embedded snapshot: menu id, content version, when it was taken and for how long it is fresh"""
+    version = hashlib.sha256(json.dumps([menu.get('id'), items], sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    return {
+        'version': version,
+        'menuId': None if menu.get('id') is None else str(menu['id']),
+        'name': menu.get('name'),
+        'takenAt': int(taken_at * 1000),
+        'maxAge': int(max_age),
+        'items': items,
+    }
+
+
+def _script_json(document):
+    """JSON safe inside <script> and FreeMarker: <, $ and # only occur in strings, so escape them"""
+    return (json.dumps(document, ensure_ascii=False, separators=(',', ':'))
+            .replace('<', '\\u003c').replace('$', '\\u0024').replace('#', '\\u0023'))
+
+
+def inject_snapshot(markup, prefix, menu, taken_at, max_age):
+    """
+    Pre-render the menu into a header's index.html and embed its snapshot
+
+    Returns (new markup, snapshot), or (markup, None) when the header has no
+    #<prefix>-main-nav list to fill.
+    """
+    items = menu_items(menu['navigationMenuItems'])
+    render = render_sigma_nav if prefix in SIGMA_LAYOUT_BRANDS else render_template_nav
+    desktop, mobile = render(items, prefix)
+    snapshot = snapshot_document(menu, items, taken_at, max_age)
+
+    main_nav = re.compile(r'(<ul\b[^>]*\bid="' + re.escape(f"{prefix}-main-nav") + r'"[^>]*>).*?(</ul>)', re.DOTALL)
+    if not main_nav.search(markup):
+        return markup, None
+    script = (f'\n<script type="application/json" id="{prefix}-nav-snapshot" '
+              f'data-version="{snapshot["version"]}">{_script_json(snapshot)}</script>')
+    markup = main_nav.sub(lambda m: f"{m.group(1)}\n{desktop}\n{m.group(2)}{script}", markup, count=1)
+    mobile_nav = re.compile(r'(<ul\b[^>]*\bclass="' + re.escape(f"{prefix}-mobile-nav-list") + r'"[^>]*>).*?(</ul>)',
+                            re.DOTALL)
+    markup = mobile_nav.sub(lambda m: f"{m.group(1)}\n{mobile}\n{m.group(2)}", markup, count=1)
+    return markup, snapshot
+
+
+def header_prefix(directory):
+    """Brand prefix of a header fragment directory (jm-header -> jm), else None"""
+    name = os.path.basename(directory.rstrip('/'))
+    return name[:-len('-header')] if name.endswith('-header') else None
+
+
+class NavigationSnapshotStage(BuildStage):
+    """
+    Build stage that snapshots each brand's navigation menu into its header
+
+    Rewrites the index.html of every *-header fragment. A brand whose menu
+    cannot be read is reported and packaged unchanged; its header keeps
+    fetching the menu at runtime. An export older than the max age fails
+    the build instead, since baking it in would pass it off as current.
+    """
+
+    name = 'nav-snapshot'
+    version = 1
+
+    def __init__(self, source, max_age_hours=DEFAULT_MAX_AGE_HOURS, **kwargs):
+        super().__init__(**kwargs)
+        self.source = source
+        self.max_age = max_age_hours * 3600
+        self._menus = {}
+        self._menu = None
+        self._seen = set()
+
+    def options(self):
+        # The menu being rendered is part of the key, so a new export is a cache miss
+        return {'source': self.source, 'max_age': self.max_age, 'menu': self._menu}
+
+    def menu(self, brand):
+        """(menu, taken_at) for a brand, or None when it cannot be read (reported once)"""
+        if brand not in self._menus:
+            try:
+                self._menus[brand] = load_menu(self.source, brand, self.max_age)
+            except StaleMenuError:
+                raise
+            except NavigationError as e:
+                print(f"⚠️ nav-snapshot: {e}; {brand} header left to fetch its menu at runtime")
+                self._menus[brand] = None
+        return self._menus[brand]
+
+    def process(self, entries):
+        output = []
+        for file_path, archive_path in entries:
+            directory, name = os.path.split(archive_path)
+            prefix = header_prefix(directory) if name == 'index.html' else None
+            loaded = self.menu(prefix) if prefix else None
+            if loaded is None:
+                output.append((file_path, archive_path))
+                continue
+
+            menu, taken_at = loaded
+            self._menu = [menu, taken_at]
+            snapshots = []
+
+            def produce(data):
+                markup, snapshot = inject_snapshot(data.decode('utf-8'), prefix, menu, taken_at, self.max_age)
+                snapshots.append(snapshot)
+                return markup.encode('utf-8') if snapshot else None
+
+            new_path, hit = self.cached(file_path, '-index.html', produce)
+            output.append((new_path, archive_path))
+            if new_path != file_path and origin(file_path) not in self._seen:
+                self._seen.add(origin(file_path))
+                items = len(menu['navigationMenuItems'])
+                self.record(file_path, os.path.getsize(file_path), os.path.getsize(new_path),
+                            f"{items} menu items pre-rendered" + (', cached' if hit else ''))
+        return output
+
+    @classmethod
+    def print_report(cls, records):
+        """Snapshots grow the markup, so report what each header gained instead of savings"""
+        if not records:
+            return
+        print(f"\n{cls.name} stage: {len(records)} headers")
+        for r in records:
+            print(f"  {r['path']:<70} {r['before']:>10,} → {r['after']:>10,}  {r['note']}")
+
+
+def header_directories(base_dir='.'):
+    """Every *-header fragment directory under fragment-collection/"""
+    root = os.path.join(base_dir, 'fragment-collection')
+    return sorted(os.path.join(root, collection, name)
+                  for collection in (os.listdir(root) if os.path.isdir(root) else [])
+                  if os.path.isdir(os.path.join(root, collection))
+                  for name in os.listdir(os.path.join(root, collection))
+                  if header_prefix(name) and os.path.isfile(os.path.join(root, collection, name, 'index.html')))
+
+
+def main(argv=None):
+    """Show what the snapshot stage would embed in each header"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('source', help='Menu JSON file or URL; {brand} is replaced by the brand prefix')
+    parser.add_argument('--only', nargs='+', metavar='BRAND', help='Only these brands (e.g. jm ybs)')
+    parser.add_argument('--max-age', type=float, default=DEFAULT_MAX_AGE_HOURS, metavar='HOURS',
+                        help=f'Hours the snapshot is used before the header fetches again; older export files are rejected (default: {DEFAULT_MAX_AGE_HOURS})')
+    parser.add_argument('--print', action='store_true', help='Print the rendered index.html')
+    args = parser.parse_args(argv)
+
+    success = True
+    for directory in header_directories():
+        prefix = header_prefix(directory)
+        if args.only and prefix not in args.only:
+            continue
+        try:
+            menu, taken_at = load_menu(args.source, prefix, args.max_age * 3600)
+        except NavigationError as e:
+            print(f"❌ {prefix}: {e}")
+            success = False
+            continue
+        with open(os.path.join(directory, 'index.html'), 'r', encoding='utf-8') as f:
+            original = f.read()
+        markup, snapshot = inject_snapshot(original, prefix, menu, taken_at, args.max_age * 3600)
+        if snapshot is None:
+            print(f"⚠️ {directory}: no #{prefix}-main-nav list to pre-render into")
+            continue
+        print(f"🧭 {directory}: menu {snapshot['menuId'] or '(no id)'} v{snapshot['version']}, "
+              f"{len(snapshot['items'])} items, "
+              f"+{len(markup.encode('utf-8')) - len(original.encode('utf-8')):,} bytes")
+        if args.print:
+            print(markup)
+    return success
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,621 @@
+#!/usr/bin/env python3
+"""
+Orders data service for the sigma-orders-table fragment
+Serves order pages from an indexed SQLite store, so the fragment only
+downloads the rows it shows. Sorting and search run in SQLite: each sort
+column has a (dataset, column, id) index walked with keyset cursors, and
+search uses an FTS5 trigram index over dates, products, SKUs and status.
+Page cost stays flat however deep the user pages or large the order book.
+
+Endpoints:
+    GET /orders?dataset=hospital-orders&sort=orderDate&direction=desc&limit=10&q=amox&after=CURSOR
+    GET /health
+
+Usage:
+    python3 orders_service.py seed --rows 300000          # synthetic order book in .orders.db
+    python3 orders_service.py import orders.json           # {"hospital-orders": [order, ...], ...}
+    python3 orders_service.py serve                        # http://127.0.0.1:8091/orders
+    python3 orders_service.py load --clients 20            # load-test a child server
+"""
+
+import os
+import sys
+import json
+import gzip
+import time
+import base64
+import random
+import sqlite3
+import hashlib
+import argparse
+import threading
+import subprocess
+import http.client
+from datetime import date, timedelta
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+DEFAULT_DB = ".orders.db"
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8091
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+MIN_COMPRESS_SIZE = 1024
+COUNT_CACHE_SIZE = 256
+
+# Search counts stop here and report "1,000+". Searches with fewer matches page
+# through the FTS result; denser ones filter the sort index as it is walked,
+# which finds a page within a few thousand rows
+SEARCH_COUNT_LIMIT = 1000
+
+# SQLite VM steps (about 20 ms) a dense search may spend walking the sort index
+# before paging through the FTS result instead, for terms that cluster at the
+# far end of the sort order
+WALK_STEPS = 50_000
+
+# The fragment sends searches from this length, where the trigram index applies
+MIN_SEARCH_LENGTH = 3
+
+DATASETS = ('hospital-orders', 'pharmacy-orders')
+STATUSES = ('completed', 'processing', 'pending', 'cancelled')
+
+# API sort key -> indexed column
+SORT_COLUMNS = {'orderDate': 'order_date', 'quantity': 'quantity', 'total': 'total'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY,
+    dataset TEXT NOT NULL,
+    order_date TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    total REAL NOT NULL,
+    status TEXT NOT NULL,
+    products TEXT NOT NULL,
+    search TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_by_date ON orders (dataset, order_date, id);
+CREATE INDEX IF NOT EXISTS orders_by_quantity ON orders (dataset, quantity, id);
+CREATE INDEX IF NOT EXISTS orders_by_total ON orders (dataset, total, id);
+"""
+
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS orders_search USING fts5(
+    search, content='orders', content_rowid='id', tokenize='trigram'
+);
+"""
+
+# Products the synthetic order book draws from: (name, SKU, unit price in £)
+CATALOGUE = [
+    ('Amlodipine 5mg Tablets', 'AMLO-5MG-84', 0.9), ('Lisinopril 10mg Tablets', 'LISIN-10MG-90', 1.1),
+    ('Salbutamol Inhaler 100mcg', 'SALB-100MCG-200', 24.5), ('Beclometasone Inhaler 250mcg', 'BECLO-250MCG-120', 41.0),
+    ('Amoxicillin 500mg Capsules', 'AMOXI-500MG-56', 1.6), ('Azithromycin 250mg Tablets', 'AZITH-250MG-84', 2.4),
+    ('Atorvastatin 20mg Tablets', 'ATOR-20MG-84', 1.3), ('Metoprolol 50mg Tablets', 'METO-50MG-112', 1.2),
+    ('Omeprazole 20mg Capsules', 'OMEP-20MG-28', 1.5), ('Montelukast 10mg Tablets', 'MONTE-10MG-84', 2.9),
+    ('Loratadine 10mg Tablets', 'LORAT-10MG-60', 1.0), ('Hydrocortisone 1% Cream', 'HYDRO-1PC-15G', 3.2),
+    ('Betamethasone 0.1% Ointment', 'BETA-01PC-30G', 5.8), ('Paracetamol 500mg Tablets', 'PARA-500MG-32', 0.3),
+    ('Ibuprofen 200mg Tablets', 'IBU-200MG-48', 0.5), ('Aspirin 75mg Tablets', 'ASP-75MG-100', 0.4),
+    ('Ciprofloxacin 500mg Tablets', 'CIPRO-500MG-56', 1.9), ('Budesonide Inhaler 200mcg', 'BUDE-200MCG-200', 31.0),
+    ('Domperidone 10mg Tablets', 'DOMP-10MG-30', 1.4), ('Loperamide 2mg Tablets', 'LOPER-2MG-30', 1.1),
+    ('Clotrimazole 1% Cream', 'CLOT-1PC-20G', 2.7), ('Ipratropium Inhaler 20mcg', 'IPRA-20MCG-400', 38.0),
+    ('Naproxen 250mg Tablets', 'NAPX-250MG-56', 1.2), ('Nitroglycerin Sublingual Spray', 'NITRO-SUBLIN-800MCG', 95.0),
+]
+
+# Per dataset: (product lines, units per line) ranges
+ORDER_SHAPES = {'hospital-orders': ((1, 3), (80, 1800)), 'pharmacy-orders': ((1, 2), (12, 200))}
+
+
+class OrdersError(ValueError):
+    """A request the orders service cannot answer, e.g. an unknown dataset or a bad cursor"""
+
+
+def search_text(order):
+    """Lower-cased text the fragment's search matches: date, product names and SKUs, status"""
+    parts = [order['orderDate'], order['status']]
+    for product in order['products']:
+        parts += [product['name'], product['sku']]
+    return ' '.join(parts).lower()
+
+
+def connect(db_path=DEFAULT_DB, readonly=False):
+    """Open the store; the schema is created unless readonly"""
+    if readonly:
+        connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        connection = sqlite3.connect(db_path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SCHEMA)
+        try:
+            connection.executescript(SEARCH_SCHEMA)
+        except sqlite3.OperationalError:
+            # SQLite without FTS5 or the trigram tokenizer (< 3.34): search falls back to LIKE
+            pass
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def has_search_index(connection):
+    return connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'orders_search'").fetchone() is not None
+
+
+def store_orders(connection, orders):
+    """Insert (dataset, order) pairs in one transaction and rebuild the search index; returns the count"""
+    rows = ((dataset, order['orderDate'], int(order['quantity']), float(order['total']), order['status'],
+             json.dumps(order['products'], separators=(',', ':')), search_text(order))
+            for dataset, order in orders)
+    with connection:
+        before = connection.total_changes
+        connection.executemany("INSERT INTO orders (dataset, order_date, quantity, total, status, products, search) "
+                               "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        added = connection.total_changes - before
+        if has_search_index(connection):
+            connection.execute("INSERT INTO orders_search (orders_search) VALUES ('rebuild')")
+    connection.execute("ANALYZE")
+    return added
+
+
+def synthetic_orders(rows, seed=1, newest=date(2025, 9, 25)):
+    """(dataset, order) pairs shaped like the fragment's sample data, spread over three years"""
+    rng = random.Random(seed)
+    for _ in range(rows):
+        dataset = rng.choice(DATASETS)
+        (min_lines, max_lines), (min_units, max_units) = ORDER_SHAPES[dataset]
+        products = []
+        total = 0.0
+        for name, sku, price in rng.sample(CATALOGUE, rng.randint(min_lines, max_lines)):
+            units = rng.randint(min_units, max_units)
+            products.append({'name': name, 'sku': sku, 'quantity': units})
+            total += units * price
+        order_date = newest - timedelta(days=int(rng.triangular(0, 3 * 365, 0)))
+        status = rng.choices(STATUSES, weights=(85, 7, 6, 2))[0] if (newest - order_date).days < 30 else \
+            rng.choices(STATUSES, weights=(97, 0, 0, 3))[0]
+        yield dataset, {'orderDate': order_date.isoformat(), 'products': products,
+                        'quantity': sum(p['quantity'] for p in products), 'total': round(total, 2),
+                        'status': status}
+
+
+def read_orders(path):
+    """(dataset, order) pairs from {dataset: [order, ...]} JSON in the fragment's order shape"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    for dataset, orders in data.items():
+        if dataset not in DATASETS:
+            raise OrdersError(f"{path}: unknown dataset {dataset!r} (expected one of {', '.join(DATASETS)})")
+        if isinstance(orders, dict):
+            orders = orders.get('orders', [])
+        for order in orders:
+            yield dataset, order
+
+
+def encode_cursor(sort_value, order_id):
+    return base64.urlsafe_b64encode(json.dumps([sort_value, order_id]).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        sort_value, order_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise OrdersError("invalid cursor")
+    if not isinstance(order_id, int) or not isinstance(sort_value, (str, int, float)):
+        raise OrdersError("invalid cursor")
+    return sort_value, order_id
+
+
+class OrderStore:
+    """Keyset-paginated, sorted and searched reads over the orders table"""
+
+    def __init__(self, db_path=DEFAULT_DB):
+        if not os.path.exists(db_path):
+            raise OrdersError(f"{db_path} not found; run 'orders_service.py seed' or 'import' first")
+        self.db_path = db_path
+        self._local = threading.local()
+        self._counts = {}
+        self._counts_lock = threading.Lock()
+        self.search_index = has_search_index(self.connection())
+
+    def connection(self):
+        """One read-only connection per server thread"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = connect(self.db_path, readonly=True)
+        return connection
+
+    def _version(self):
+        """Changes whenever the database or its write-ahead log is written"""
+        return tuple(os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+                     for path in (self.db_path, self.db_path + '-wal'))
+
+    @staticmethod
+    def _match_clause(q):
+        return "id IN (SELECT rowid FROM orders_search WHERE orders_search MATCH ?)", '"' + q.replace('"', '""') + '"'
+
+    @staticmethod
+    def _like_clause(q):
+        return "search LIKE ? ESCAPE '\\'", '%' + q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+    def count(self, dataset, q):
+        """
+        (matching orders, exact) for a search, cached until the database changes
+
+        Search counts stop at SEARCH_COUNT_LIMIT, so a common term costs no
+        more than a rare one. The trigram index needs three characters;
+        shorter terms (or SQLite without FTS5) scan the search column.
+        """
+        key = (self._version(), dataset, q)
+        with self._counts_lock:
+            if key in self._counts:
+                return self._counts[key]
+        connection = self.connection()
+        if not q:
+            result = connection.execute("SELECT COUNT(*) FROM orders WHERE dataset = ?", (dataset,)).fetchone()[0], True
+        else:
+            if self.search_index and len(q) >= 3:
+                # Joined rather than IN (...), so the FTS result streams and stops at the limit
+                query = ("SELECT 1 FROM orders_search JOIN orders ON orders.id = orders_search.rowid "
+                         "WHERE orders_search MATCH ? AND orders.dataset = ? LIMIT ?")
+                params = (self._match_clause(q)[1], dataset, SEARCH_COUNT_LIMIT + 1)
+            else:
+                clause, term = self._like_clause(q)
+                query = f"SELECT 1 FROM orders WHERE dataset = ? AND {clause} LIMIT ?"
+                params = (dataset, term, SEARCH_COUNT_LIMIT + 1)
+            total = connection.execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()[0]
+            result = min(total, SEARCH_COUNT_LIMIT), total <= SEARCH_COUNT_LIMIT
+        with self._counts_lock:
+            if len(self._counts) >= COUNT_CACHE_SIZE:
+                self._counts.pop(next(iter(self._counts)))
+            self._counts[key] = result
+        return result
+
+    def _select(self, sql, params, steps=None):
+        """Rows of a query, or None when it runs past steps SQLite VM instructions"""
+        connection = self.connection()
+        if steps is None:
+            return connection.execute(sql, params).fetchall()
+        connection.set_progress_handler(lambda: 1, steps)
+        try:
+            return connection.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            if 'interrupted' not in str(e):
+                raise
+            return None
+        finally:
+            connection.set_progress_handler(None, 0)
+
+    def page(self, dataset, sort='orderDate', direction='desc', limit=DEFAULT_PAGE_SIZE, q='', after=None):
+        """One page of orders and the cursor of the next, if any"""
+        if dataset not in DATASETS:
+            raise OrdersError(f"unknown dataset {dataset!r}")
+        if sort not in SORT_COLUMNS:
+            raise OrdersError(f"cannot sort by {sort!r}")
+        if direction not in ('asc', 'desc'):
+            raise OrdersError(f"direction must be asc or desc, not {direction!r}")
+        column = SORT_COLUMNS[sort]
+        q = q.strip().lower()
+        total, exact = self.count(dataset, q)
+        where, params = ["dataset = ?"], [dataset]
+        if after:
+            where.append(f"({column}, id) {'<' if direction == 'desc' else '>'} (?, ?)")
+            params += decode_cursor(after)
+        order = 'DESC' if direction == 'desc' else 'ASC'
+
+        def select(search=None, steps=None):
+            clauses, values = where, params
+            if search:
+                clauses, values = where + [search[0]], params + [search[1]]
+            return self._select(f"SELECT id, order_date, quantity, total, status, products FROM orders "
+                                f"WHERE {' AND '.join(clauses)} ORDER BY {column} {order}, id {order} LIMIT ?",
+                                values + [limit + 1], steps)
+
+        indexed = self.search_index and len(q) >= 3
+        if not q:
+            rows = select()
+        elif indexed and exact:
+            rows = select(self._match_clause(q))
+        else:
+            rows = select(self._like_clause(q), WALK_STEPS if indexed else None)
+            if rows is None:
+                rows = select(self._match_clause(q))
+        more = len(rows) > limit
+        rows = rows[:limit]
+        orders = [{'id': row['id'], 'orderDate': row['order_date'], 'products': json.loads(row['products']),
+                   'quantity': row['quantity'], 'total': row['total'], 'status': row['status']} for row in rows]
+        last = rows[-1] if rows else None
+        return {
+            'dataset': dataset, 'sort': sort, 'direction': direction, 'q': q, 'limit': limit,
+            'total': total,
+            'totalExact': exact,
+            'orders': orders,
+            'next': encode_cursor(last[column], last['id']) if more else None,
+        }
+
+    def stats(self):
+        counts = self.connection().execute("SELECT dataset, COUNT(*) FROM orders GROUP BY dataset").fetchall()
+        return {'orders': {dataset: total for dataset, total in counts}, 'searchIndex': self.search_index}
+
+
+class OrdersHandler(BaseHTTPRequestHandler):
+    """Routes: /orders (one page as JSON), /health"""
+
+    server_version = 'SigmaOrders/1.0'
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; without this Nagle holds the body for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def do_OPTIONS(self):
+        self.send_response(HTTPStatus.NO_CONTENT)
+        self.send_cors()
+        self.send_header('Access-Control-Allow-Headers', 'If-None-Match')
+        self.send_header('Access-Control-Max-Age', '86400')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip('/')
+        query = dict(parse_qsl(url.query))
+        try:
+            if path == '/orders':
+                try:
+                    limit = min(max(int(query.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+                except ValueError:
+                    raise OrdersError("limit must be a number")
+                page = self.server.store.page(query.get('dataset', DATASETS[0]), query.get('sort', 'orderDate'),
+                                              query.get('direction', 'desc'), limit, query.get('q', ''),
+                                              query.get('after'))
+                self.send_json(page)
+            elif path == '/health':
+                self.send_json(self.server.store.stats())
+            else:
+                self.send_json({'error': 'not found'}, HTTPStatus.NOT_FOUND)
+        except OrdersError as e:
+            self.send_json({'error': str(e)}, HTTPStatus.BAD_REQUEST)
+
+    def send_cors(self):
+        if self.server.allow_origin:
+            self.send_header('Access-Control-Allow-Origin', self.server.allow_origin)
+            self.send_header('Access-Control-Expose-Headers', 'ETag')
+
+    def send_json(self, data, status=HTTPStatus.OK):
+        """JSON with a content ETag (a repeated page is a 304) and gzip when accepted"""
+        body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        accepted = {part.split(';')[0].strip() for part in self.headers.get('Accept-Encoding', '').split(',')}
+        encoding = 'gzip' if 'gzip' in accepted and len(body) >= MIN_COMPRESS_SIZE else None
+        if encoding:
+            etag = f'{etag[:-1]}-gzip"'
+        not_modified = status == HTTPStatus.OK and etag in [tag.strip() for tag in
+                                                             self.headers.get('If-None-Match', '').split(',')]
+        if not_modified:
+            status, body = HTTPStatus.NOT_MODIFIED, b''
+        elif encoding:
+            body = gzip.compress(body, compresslevel=6, mtime=0)
+        self.send_response(status)
+        self.send_cors()
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding and not not_modified:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(host, port, db_path=DEFAULT_DB, allow_origin='*', quiet=False):
+    server = ThreadingHTTPServer((host, port), OrdersHandler)
+    server.daemon_threads = True
+    server.store = OrderStore(db_path)
+    server.allow_origin = allow_origin
+    server.quiet = quiet
+    return server
+
+
+def _percentile(values, fraction):
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+class LoadClient(threading.Thread):
+    """
+    One simulated user browsing the table over a keep-alive connection
+
+    Each session opens a dataset with a random sort, pages forward along the
+    cursors, then types a search term one keystroke at a time and pages
+    through the matches, as the fragment's debounced search would.
+    """
+
+    TERMS = ['amoxicillin', 'salbutamol', 'para', 'ator-20', 'pending', 'inhaler', '2025-09', 'cream']
+
+    def __init__(self, host, port, deadline, seed):
+        super().__init__(daemon=True)
+        self.host, self.port, self.deadline = host, port, deadline
+        self.rng = random.Random(seed)
+        self.latencies = {'first page': [], 'next page': [], 'search': []}
+        self.bytes = 0
+        self.errors = 0
+
+    def get(self, connection, kind, **params):
+        started = time.perf_counter()
+        connection.request('GET', '/orders?' + urlencode(params), headers={'Accept-Encoding': 'gzip'})
+        response = connection.getresponse()
+        body = response.read()
+        self.latencies[kind].append(time.perf_counter() - started)
+        self.bytes += len(body)
+        if response.status != 200:
+            self.errors += 1
+            return None
+        if response.getheader('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return json.loads(body)
+
+    def run(self):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            while time.monotonic() < self.deadline:
+                view = {'dataset': self.rng.choice(DATASETS), 'sort': self.rng.choice(list(SORT_COLUMNS)),
+                        'direction': self.rng.choice(['asc', 'desc']), 'limit': self.rng.choice([10, 25, 50])}
+                page = self.get(connection, 'first page', **view)
+                for _ in range(self.rng.randint(1, 8)):
+                    if not page or not page['next']:
+                        break
+                    page = self.get(connection, 'next page', after=page['next'], **view)
+                term = self.rng.choice(self.TERMS)
+                for length in range(MIN_SEARCH_LENGTH, len(term) + 1):
+                    page = self.get(connection, 'search', q=term[:length], **view)
+                for _ in range(self.rng.randint(0, 3)):
+                    if not page or not page['next']:
+                        break
+                    page = self.get(connection, 'next page', q=term, after=page['next'], **view)
+        except (OSError, http.client.HTTPException):
+            self.errors += 1
+        finally:
+            connection.close()
+
+
+def _process_rss_kb(pid):
+    """Current resident memory of another process (Linux), or None"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def load_test(db_path=DEFAULT_DB, clients=20, seconds=10.0, host=None, port=None):
+    """
+    Run simulated clients against a server for a number of seconds
+
+    Without host/port a server is started in a child process on db_path, so
+    the clients and the server do not share a GIL.
+    """
+    server = None
+    if port is None:
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--db', db_path, 'serve',
+                                   '--port', '0', '--quiet', '--print-port'], stdout=subprocess.PIPE, text=True)
+        port = int(server.stdout.readline().strip())
+        host = DEFAULT_HOST
+    try:
+        deadline = time.monotonic() + seconds
+        workers = [LoadClient(host, port, deadline, seed) for seed in range(clients)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        latencies = {kind: [value for worker in workers for value in worker.latencies[kind]]
+                     for kind in workers[0].latencies}
+        return {
+            'clients': clients,
+            'seconds': elapsed,
+            'requests': sum(len(values) for values in latencies.values()),
+            'errors': sum(worker.errors for worker in workers),
+            'bytes': sum(worker.bytes for worker in workers),
+            'latencies': latencies,
+            'server_rss_kb': _process_rss_kb(server.pid) if server else None,
+        }
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+def print_load_report(result):
+    requests = result['requests']
+    print(f"\n🧪 {result['clients']} clients for {result['seconds']:.1f}s: {requests:,} requests "
+          f"({requests / result['seconds']:,.0f}/s), {result['errors']} errors, "
+          f"{result['bytes'] / max(requests, 1) / 1024:.1f} KB per response")
+    print(f"  {'request':<12} {'count':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for kind, values in result['latencies'].items():
+        print(f"  {kind:<12} {len(values):>8,} {_percentile(values, 0.5) * 1000:>8.1f} "
+              f"{_percentile(values, 0.95) * 1000:>8.1f} {_percentile(values, 0.99) * 1000:>8.1f}")
+    if result['server_rss_kb']:
+        print(f"  server RSS: {result['server_rss_kb'] / 1024:.1f} MB")
+
+
+def main(argv=None):
+    """Seed or import orders, serve them, or load-test the service"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', default=DEFAULT_DB, help=f'SQLite database (default: {DEFAULT_DB})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed = commands.add_parser('seed', help='Add a synthetic order book')
+    seed.add_argument('--rows', type=int, default=300_000, help='Orders to generate (default: 300,000)')
+    seed.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    seed.add_argument('--replace', action='store_true', help='Delete existing orders first')
+
+    load_json = commands.add_parser('import', help='Add orders from JSON keyed by dataset')
+    load_json.add_argument('paths', nargs='+', help='JSON files: {"hospital-orders": [order, ...], ...}')
+    load_json.add_argument('--replace', action='store_true', help='Delete existing orders first')
+
+    serve = commands.add_parser('serve', help='Serve order pages over HTTP')
+    serve.add_argument('--host', default=DEFAULT_HOST, help=f'Address to bind (default: {DEFAULT_HOST})')
+    serve.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT}; 0 picks one)')
+    serve.add_argument('--allow-origin', default='*',
+                       help="Access-Control-Allow-Origin for the Liferay site (default: '*'; '' disables CORS)")
+    serve.add_argument('--quiet', action='store_true', help='Do not log requests')
+    serve.add_argument('--print-port', action='store_true', help=argparse.SUPPRESS)
+
+    load = commands.add_parser('load', help='Load-test the service with simulated table users')
+    load.add_argument('--clients', type=int, default=20, help='Concurrent users (default: 20)')
+    load.add_argument('--seconds', type=float, default=10.0, help='Test duration (default: 10)')
+    load.add_argument('--url', help='Test a running service (e.g. http://127.0.0.1:8091) instead of a child server')
+    args = parser.parse_args(argv)
+
+    if args.command in ('seed', 'import'):
+        connection = connect(args.db)
+        if args.replace:
+            with connection:
+                connection.execute("DELETE FROM orders")
+        started = time.perf_counter()
+        try:
+            orders = synthetic_orders(args.rows, args.seed) if args.command == 'seed' else \
+                (pair for path in args.paths for pair in read_orders(path))
+            added = store_orders(connection, orders)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"❌ {e}")
+            return False
+        finally:
+            connection.close()
+        print(f"✅ Added {added:,} orders to {args.db} in {time.perf_counter() - started:.1f}s")
+        return True
+
+    if args.command == 'load':
+        if not args.url and not os.path.exists(args.db):
+            print(f"❌ {args.db} not found; run 'orders_service.py seed' first")
+            return False
+        target = urlsplit(args.url) if args.url else None
+        result = load_test(args.db, args.clients, args.seconds,
+                           target.hostname if target else None, target.port if target else None)
+        print_load_report(result)
+        return result['errors'] == 0
+
+    try:
+        server = make_server(args.host, args.port, args.db, args.allow_origin, args.quiet)
+    except OrdersError as e:
+        print(f"❌ {e}")
+        return False
+    if args.print_port:
+        print(server.server_port, flush=True)
+    else:
+        stats = server.store.stats()
+        print(f"🗄️ Serving {sum(stats['orders'].values()):,} orders on http://{args.host}:{server.server_port}/orders "
+              f"({'FTS5 trigram' if stats['searchIndex'] else 'LIKE'} search). Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Orders service stopped")
+    finally:
+        server.server_close()
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Offline page-weight and request-waterfall analyzer for built collections
+Composes a page from chosen fragments of a collection ZIP plus the brand's
+client-extension ZIP, and reports total bytes, request count, render-blocking
+CSS/JS in the head and estimated load times under throttling profiles
+
+The page is modelled the way Liferay serves a content page: fragment HTML,
+CSS and JS are inlined into the document, client extensions add <link> and
+<script> tags (in the head when scriptLocation is head), and images are
+separate requests. Liferay's own theme CSS and JS are not included. Times are
+a phase estimate (connect, document, blocking, everything else), not a
+measurement: use them to compare builds before a deploy.
+
+Usage:
+    python3 page_weight.py ybs-builds/ybs-collection.zip --fragments ybs-header ybs-hero ybs-footer
+    python3 page_weight.py jm-builds/johnson-matthey-collection.zip --profile fast-3g --json weight.json
+"""
+
+import os
+import sys
+import glob
+import gzip
+import json
+import argparse
+from html.parser import HTMLParser
+from urllib.parse import quote, unquote
+
+from preview_server import PreviewArchive, TemplateError
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+# name: (round-trip ms, download kbps), slowest first, after Lighthouse and DevTools
+# throttling presets (the 3G ones with DevTools' latency and throughput adjustments)
+PROFILES = {
+    'slow-3g': (2000, 400),
+    'fast-3g': (562.5, 1474.56),
+    'slow-4g': (150, 1638.4),
+    'cable': (28, 5000),
+    'desktop': (40, 10240),
+}
+DEFAULT_PROFILE = 'slow-4g'
+
+# DNS + TCP + TLS before the first byte from a new origin
+CONNECT_ROUND_TRIPS = 3
+
+TEXT_EXTENSIONS = ('.html', '.css', '.js', '.json', '.svg', '.txt')
+
+PHASES = ('document', 'blocking', 'async', 'deferred')
+
+
+class _ResourceScanner(HTMLParser):
+    """Collect the sub-resources a fragment's rendered markup requests"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.found = []  # (kind, url, attributes)
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        if tag in ('img', 'source') and attributes.get('src'):
+            self.found.append(('image', attributes['src'], attributes))
+        elif tag == 'link' and 'stylesheet' in (attributes.get('rel') or '') and attributes.get('href'):
+            self.found.append(('css', attributes['href'], attributes))
+        elif tag == 'script' and attributes.get('src'):
+            self.found.append(('js', attributes['src'], attributes))
+        elif tag in ('iframe', 'video') and attributes.get('src'):
+            self.found.append(('embed', attributes['src'], attributes))
+
+
+def transfer_size(name, data):
+    """Bytes on the wire: gzip for text, as served by Liferay and the preview server"""
+    if name.lower().endswith(TEXT_EXTENSIONS):
+        return len(gzip.compress(data, compresslevel=6, mtime=0))
+    return len(data)
+
+
+def _request(url, kind, phase, size, transfer, origin='same', source=None):
+    return {'url': url, 'kind': kind, 'phase': phase, 'size': size, 'transfer': transfer,
+            'origin': origin, 'source': source}
+
+
+def extension_requests(archive):
+    """
+    Requests a client-extension ZIP adds to every page, from client-extension.yaml
+
+    globalCSS is a render-blocking <link> in the head; globalJS blocks when it
+    is in the head without async or defer, and runs after parsing otherwise.
+    """
+    config = {}
+    if yaml is not None:
+        config = yaml.safe_load(archive.read('client-extension.yaml')) or {}
+    sources = [step.get('from', '') for step in config.get('assemble', []) if isinstance(step, dict)] or ['assets']
+
+    def entry_for(url):
+        for source in sources:
+            name = f"{source.strip('/')}/{url}" if source else url
+            if name in archive.names:
+                return name
+        return None
+
+    requests = []
+    extensions = {key: value for key, value in config.items() if key != 'assemble' and isinstance(value, dict)}
+    if not extensions:
+        # Without PyYAML (or a parsable file), assume every asset is a head-blocking global
+        extensions = {name: {'type': 'globalCSS' if name.endswith('.css') else 'globalJS', 'url': name.split('/', 1)[1]}
+                      for name in sorted(archive.names) if name.endswith(('.css', '.js')) and '/' in name}
+    for key, extension in extensions.items():
+        extension_type = extension.get('type')
+        if extension_type not in ('globalCSS', 'globalJS') or not extension.get('url'):
+            continue
+        name = entry_for(extension['url'])
+        if extension_type == 'globalCSS':
+            phase = 'blocking'
+        else:
+            attributes = extension.get('scriptElementAttributes') or {}
+            deferred = any(attributes.get(flag) not in (None, False, 'false') for flag in ('async', 'defer')) or \
+                attributes.get('type') == 'module'
+            in_head = extension.get('scriptLocation', 'bottom') == 'head'
+            phase = 'blocking' if in_head and not deferred else 'deferred' if deferred else 'async'
+        kind = 'css' if extension_type == 'globalCSS' else 'js'
+        if name is None:
+            requests.append(_request(extension['url'], kind, phase, None, None, source=f"{key} (not in ZIP)"))
+            continue
+        data = archive.read(name)
+        requests.append(_request(f"{os.path.basename(archive.path)}:{name}", kind, phase, len(data),
+                                 transfer_size(name, data), source=key))
+    return requests
+
+
+def compose_page(archive, fragment_keys, extension=None):
+    """
+    Requests and document bytes for a page of the given fragments, in order
+
+    Returns (requests, warnings). The first request is the document itself,
+    with every fragment's rendered HTML, CSS and JS inlined.
+    """
+    warnings = []
+    document = bytearray()
+    sub_requests = []
+    prefix = f"/zip/{quote(archive.path)}/"
+    seen = set()
+    for key in fragment_keys:
+        fragment = archive.fragments[key]
+        warnings += [f"{key}: {issue}" for issue in fragment.errors + fragment.warnings]
+        try:
+            markup = archive.render(fragment)
+        except TemplateError as e:
+            warnings.append(f"{key}: {e}")
+            continue
+        document += markup.encode('utf-8')
+        for field, default in (('cssPath', 'index.css'), ('jsPath', 'index.js')):
+            name = fragment.entry(field, default)
+            if name in archive.names:
+                document += archive.read(name)
+
+        scanner = _ResourceScanner()
+        scanner.feed(markup)
+        for kind, url, attributes in scanner.found:
+            if url.startswith('data:') or url in seen:
+                continue
+            seen.add(url)
+            lazy = attributes.get('loading') == 'lazy'
+            phase = 'deferred' if lazy else 'async'
+            if kind in ('css', 'js') and not lazy:
+                phase = 'blocking' if kind == 'css' or not ({'async', 'defer'} & attributes.keys()) else 'deferred'
+            if url.startswith(prefix):
+                name = unquote(url[len(prefix):])
+                if name not in archive.names:
+                    continue  # already reported as an unresolved resource
+                data = archive.read(name)
+                sub_requests.append(_request(name, kind, phase, len(data), transfer_size(name, data), source=key))
+            elif url.startswith(('http://', 'https://', '//')):
+                origin = url.split('/')[2]
+                sub_requests.append(_request(url, kind, phase, None, None, origin=origin, source=key))
+            elif url.strip():
+                sub_requests.append(_request(url, kind, phase, None, None, source=key))
+
+    requests = [_request('(document)', 'html', 'document', len(document),
+                         len(gzip.compress(bytes(document), compresslevel=6, mtime=0)), source=', '.join(fragment_keys))]
+    if extension is not None:
+        requests += extension_requests(extension)
+    return requests + sub_requests, warnings
+
+
+def estimate(requests, profile):
+    """
+    Phase-based timing for one throttling profile
+
+    The document pays connection setup plus a round trip; each later phase
+    starts when the previous one ends, fetches its requests in parallel on
+    the shared link, and pays one round trip plus a connection per new
+    origin. Unknown sizes (external URLs) only cost their round trips.
+    Returns {'first_render', 'load', 'requests': [(request, start, end)]}.
+    """
+    rtt, kbps = PROFILES[profile]
+    bytes_per_ms = kbps * 1024 / 8 / 1000
+    timeline = []
+    clock = 0.0
+    origins = {'same'}
+    first_render = None
+    for phase in PHASES:
+        batch = [r for r in requests if r['phase'] == phase]
+        if phase == 'document':
+            start = 0.0
+            setup = CONNECT_ROUND_TRIPS * rtt
+        elif not batch:
+            if phase == 'blocking':
+                first_render = clock
+            continue
+        else:
+            start = clock
+            new_origins = {r['origin'] for r in batch} - origins
+            origins |= new_origins
+            setup = CONNECT_ROUND_TRIPS * rtt if new_origins else 0.0
+        transfer = sum(r['transfer'] or 0 for r in batch)
+        end = start + setup + rtt + transfer / bytes_per_ms
+        # Parallel downloads share the link, so each finishes in proportion to its size
+        for request in batch:
+            share = (request['transfer'] or 0) / transfer if transfer else 0.0
+            timeline.append((request, start, start + setup + rtt + share * transfer / bytes_per_ms))
+        clock = end
+        if phase == 'blocking':
+            first_render = clock
+    return {'first_render': first_render, 'load': clock, 'requests': timeline}
+
+
+def summarize(requests, profiles):
+    """Totals, render-blocking requests and per-profile estimates, JSON-ready"""
+    known = [r for r in requests if r['size'] is not None]
+    return {
+        'requests': len(requests),
+        'bytes': sum(r['size'] for r in known),
+        'transfer_bytes': sum(r['transfer'] for r in known),
+        'unknown_size': [r['url'] for r in requests if r['size'] is None],
+        'render_blocking': [{'url': r['url'], 'kind': r['kind'], 'transfer': r['transfer']}
+                            for r in requests if r['phase'] == 'blocking'],
+        'estimates': {profile: {key: round(value) for key, value in estimate(requests, profile).items()
+                                if key != 'requests'} for profile in profiles},
+    }
+
+
+def print_waterfall(requests, profile, width=40):
+    """Text waterfall for one profile: one bar per request on a shared time axis"""
+    timing = estimate(requests, profile)
+    scale = width / max(timing['load'], 1)
+    print(f"\nWaterfall ({profile}: {PROFILES[profile][0]:g} ms RTT, {PROFILES[profile][1]:g} kbps)")
+    for request, start, end in timing['requests']:
+        bar = ' ' * int(start * scale) + '█' * max(1, int((end - start) * scale))
+        size = f"{request['transfer']:,}" if request['transfer'] is not None else '?'
+        label = request['url'] if len(request['url']) <= 48 else '…' + request['url'][-47:]
+        print(f"  {label:<48} {request['phase']:<9} {size:>9} B  {bar:<{width}}  {end:7.0f} ms")
+
+
+def find_extension(collection_path, brand):
+    """The brand's client-extension ZIP in the collection ZIP's directory, or in <brand>-builds/"""
+    for directory in (os.path.dirname(collection_path), f"{brand}-builds"):
+        matches = sorted(glob.glob(os.path.join(directory, f"{brand}-*client-extension*.zip")))
+        if matches:
+            return matches[0]
+    return None
+
+
+def main(argv=None):
+    """Report page weight, render-blocking resources and estimated timings"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('collection', help='Built collection (or fragment) ZIP')
+    parser.add_argument('--extension', help="Client-extension ZIP (default: the brand's, next to the collection)")
+    parser.add_argument('--no-extension', action='store_true', help='Ignore client extensions')
+    parser.add_argument('--fragments', nargs='+', metavar='KEY',
+                        help='Fragments on the page, top to bottom (default: every fragment in the ZIP)')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default=DEFAULT_PROFILE,
+                        help=f'Profile for the waterfall (default: {DEFAULT_PROFILE})')
+    parser.add_argument('--json', metavar='PATH', help="Write the report as JSON to PATH, or '-' for stdout")
+    args = parser.parse_args(argv)
+
+    archive = PreviewArchive(args.collection)
+    fragment_keys = args.fragments or sorted(archive.fragments)
+    unknown = [key for key in fragment_keys if key not in archive.fragments]
+    if unknown:
+        print(f"❌ Not in {archive.path}: {', '.join(unknown)} (available: {', '.join(sorted(archive.fragments))})")
+        return False
+
+    extension = None
+    if not args.no_extension:
+        extension_path = args.extension or find_extension(archive.path, fragment_keys[0].split('-', 1)[0])
+        if extension_path:
+            extension = PreviewArchive(extension_path)
+    requests, warnings = compose_page(archive, fragment_keys, extension)
+    report = summarize(requests, PROFILES)
+    report.update({'collection': archive.path, 'extension': extension.path if extension else None,
+                   'fragments': fragment_keys, 'warnings': warnings, 'requests_detail': requests})
+
+    if args.json:
+        text = json.dumps(report, indent=2)
+        if args.json == '-':
+            print(text)
+            return True
+        with open(args.json, 'w') as f:
+            f.write(text + '\n')
+
+    print(f"📄 Page: {', '.join(fragment_keys)}")
+    print(f"   from {archive.path}" + (f" + {extension.path}" if extension else " (no client extension)"))
+    for warning in warnings:
+        print(f"  ⚠️ {warning}")
+    print(f"\n{report['requests']} requests, {report['bytes']:,} bytes ({report['transfer_bytes']:,} transferred)")
+    if report['unknown_size']:
+        print(f"  + {len(report['unknown_size'])} external requests of unknown size")
+    if report['render_blocking']:
+        print("\n🚧 Render-blocking in <head>:")
+        for request in report['render_blocking']:
+            print(f"  {request['kind']:<4} {request['url']}  ({request['transfer']:,} bytes transferred)"
+                  if request['transfer'] is not None else f"  {request['kind']:<4} {request['url']}  (missing)")
+    else:
+        print("\n✓ Nothing render-blocking in <head>")
+
+    print("\nEstimated timings (first render / load):")
+    for profile, timing in report['estimates'].items():
+        rtt, kbps = PROFILES[profile]
+        print(f"  {profile:<8} {rtt:>6g} ms RTT {kbps:>8g} kbps   {timing['first_render']:>6,} ms / {timing['load']:>6,} ms")
+    print_waterfall(requests, args.profile)
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
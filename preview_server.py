@@ -0,0 +1,807 @@
+#!/usr/bin/env python3
+"""
+Local preview server for built fragment ZIPs
+Simulates a Liferay import of each collection or fragment ZIP in fragment-zips/
+and *-builds/ without extracting it, renders every fragment's index.html with
+its configuration.json defaults and [resources:...] substitutions, and serves
+assets straight from the ZIPs with ETags and gzip (brotli when installed)
+
+A stub of /o/headless-delivery/v1.0/navigation-menus lets the header fetch
+path run offline; --nav-latency makes it behave like a slow server. Fragment
+configuration can be overridden per page with query parameters, e.g.
+/preview/ybs-builds/ybs-collection.zip/ybs-header?navigationMenuId=main
+
+Usage:
+    python3 preview_server.py                          # every ZIP, on http://127.0.0.1:8080/
+    python3 preview_server.py ybs-builds/ybs-collection.zip --port 9000
+    python3 preview_server.py --check                  # simulate the import and render only
+"""
+
+import os
+import re
+import sys
+import glob
+import gzip
+import html
+import json
+import time
+import zlib
+import struct
+import zipfile
+import argparse
+import mimetypes
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, quote, unquote
+
+from build_manifest import read_raw_entry
+from asset_fingerprint import SIDECAR_SUFFIXES, is_fingerprinted
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_PORT = 8080
+ZIP_PATTERNS = ('fragment-zips/*.zip', '*-builds/*.zip')
+NAVIGATION_PATH = '/o/headless-delivery/v1.0/navigation-menus'
+AUTH_TOKEN = 'preview-auth-token'
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+# Below this, compression headers cost more than they save
+MIN_COMPRESS_SIZE = 256
+BROTLI_QUALITY = 5
+
+# Served when no --menu file is given
+DEFAULT_MENU = [
+    ('About', '/about', [('Our History', '/about/history'), ('Leadership', '/about/leadership')]),
+    ('Products', '/products', [('Savings', '/products/savings'), ('Mortgages', '/products/mortgages')]),
+    ('Investors', '/investors', [('Share Price', '/investors/share-price'), ('Reports', '/investors/reports')]),
+    ('News', '/news', []),
+    ('Contact', '/contact', []),
+]
+
+
+class TemplateError(ValueError):
+    """Raised when a fragment's FreeMarker fails to render, as it would in Liferay"""
+
+
+# FreeMarker subset used by fragments: ${expr}, [#if]/[#elseif]/[#else]/[/#if]
+_FTL_TAG = re.compile(r'\[#(if|elseif)\s+(.*?)\]|\[#else\]|\[/#if\]|\$\{(.*?)\}', re.S)
+_FTL_TOKEN = re.compile(r'''\s*(?:("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')|(\d+(?:\.\d+)?)|(==|!=|>=|<=|&&|\|\||\?\?|[!?().,<>])|([A-Za-z_]\w*))''')
+_MISSING = object()
+
+
+def compile_ftl(text, name='index.html'):
+    """Parse FreeMarker text into nodes: strings, ('expr', source) and ('if', [(condition, nodes)], else_nodes)"""
+    root = []
+    stack = [(root, None)]
+    cursor = 0
+    for match in _FTL_TAG.finditer(text):
+        nodes, block = stack[-1]
+        if match.start() > cursor:
+            nodes.append(text[cursor:match.start()])
+        cursor = match.end()
+        directive, condition, expression = match.groups()
+        tag = match.group()
+        if expression is not None:
+            nodes.append(('expr', expression))
+        elif directive == 'if':
+            block = ('if', [(condition, [])], [])
+            nodes.append(block)
+            stack.append((block[1][0][1], block))
+        elif block is None:
+            line = text.count('\n', 0, match.start()) + 1
+            raise TemplateError(f"{name}:{line}: {tag} without [#if]")
+        elif directive == 'elseif':
+            block[1].append((condition, []))
+            stack[-1] = (block[1][-1][1], block)
+        elif tag == '[#else]':
+            stack[-1] = (block[2], block)
+        else:
+            stack.pop()
+    if len(stack) > 1:
+        raise TemplateError(f"{name}: unclosed [#if]")
+    if cursor < len(text):
+        root.append(text[cursor:])
+    return root
+
+
+class _Expression:
+    """Recursive-descent evaluator for the FreeMarker expressions fragments use"""
+
+    def __init__(self, source, context):
+        self.source = source
+        self.context = context
+        self.tokens = []
+        position = 0
+        while position < len(source):
+            match = _FTL_TOKEN.match(source, position)
+            if not match:
+                if source[position:].strip():
+                    raise TemplateError(f"cannot parse '{source}'")
+                break
+            self.tokens.append(next(group for group in match.groups() if group is not None))
+            position = match.end()
+        self.index = 0
+
+    def peek(self):
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def take(self, expected=None):
+        token = self.peek()
+        if token is None or (expected is not None and token != expected):
+            raise TemplateError(f"expected '{expected or 'a value'}' in '{self.source}'")
+        self.index += 1
+        return token
+
+    def evaluate(self):
+        value = self.parse_or()
+        if self.peek() is not None:
+            raise TemplateError(f"unexpected '{self.peek()}' in '{self.source}'")
+        return value
+
+    def defined(self, value):
+        if value is _MISSING:
+            raise TemplateError(f"'{self.source}' refers to an undefined value")
+        return value
+
+    def parse_or(self):
+        value = self.parse_and()
+        while self.peek() == '||':
+            self.take()
+            right = self.parse_and()
+            value = bool(self.defined(value)) or bool(self.defined(right))
+        return value
+
+    def parse_and(self):
+        value = self.parse_not()
+        while self.peek() == '&&':
+            self.take()
+            right = self.parse_not()
+            value = bool(self.defined(value)) and bool(self.defined(right))
+        return value
+
+    def parse_not(self):
+        if self.peek() == '!':
+            self.take()
+            return not self.defined(self.parse_not())
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        value = self.parse_postfix()
+        operator = self.peek()
+        if operator not in ('==', '!=', '>', '<', '>=', '<='):
+            return value
+        self.take()
+        left, right = self.defined(value), self.defined(self.parse_postfix())
+        if operator == '==':
+            return left == right
+        if operator == '!=':
+            return left != right
+        try:
+            return {'>': left > right, '<': left < right, '>=': left >= right, '<=': left <= right}[operator]
+        except TypeError:
+            raise TemplateError(f"cannot compare {left!r} and {right!r} in '{self.source}'")
+
+    def parse_postfix(self):
+        value = self.parse_primary()
+        while True:
+            token = self.peek()
+            if token == '??':
+                self.take()
+                value = value is not _MISSING
+            elif token == '!':
+                # After a value, '!' is the default operator: name!'fallback'
+                self.take()
+                fallback = self.parse_primary() if self.peek() not in (None, ')', ',', '==', '!=', '&&', '||') else ''
+                value = fallback if value is _MISSING else value
+            elif token == '?':
+                self.take()
+                value = self.builtin(self.take(), value)
+            else:
+                return value
+
+    def builtin(self, name, value):
+        value = self.defined(value)
+        arguments = []
+        if self.peek() == '(':
+            self.take()
+            while self.peek() != ')':
+                arguments.append(self.defined(self.parse_or()))
+                if self.peek() == ',':
+                    self.take()
+            self.take(')')
+        if name == 'string' and len(arguments) == 2 and isinstance(value, bool):
+            return arguments[0] if value else arguments[1]
+        if name in ('string', 'c'):
+            return ('true' if value else 'false') if isinstance(value, bool) else str(value)
+        if name == 'has_content':
+            return value not in ('', None, [], {})
+        if name == 'html':
+            return html.escape(str(value))
+        if name == 'trim':
+            return str(value).strip()
+        if name == 'upper_case':
+            return str(value).upper()
+        if name == 'lower_case':
+            return str(value).lower()
+        raise TemplateError(f"unsupported built-in ?{name} in '{self.source}'")
+
+    def parse_primary(self):
+        token = self.take()
+        if token == '(':
+            value = self.parse_or()
+            self.take(')')
+            return value
+        if token[0] in '"\'':
+            return json.loads('"' + token[1:-1].replace('"', '\\"') + '"') if token[0] == "'" else json.loads(token)
+        if token[0].isdigit():
+            return float(token) if '.' in token else int(token)
+        if token in ('true', 'false'):
+            return token == 'true'
+        if not (token[0].isalpha() or token[0] == '_'):
+            raise TemplateError(f"unexpected '{token}' in '{self.source}'")
+
+        value = self.context.get(token, _MISSING)
+        while self.peek() in ('.', '('):
+            if self.take() == '.':
+                attribute = self.take()
+                if isinstance(value, dict):
+                    value = value.get(attribute, _MISSING)
+                else:
+                    value = getattr(value, attribute, _MISSING) if value is not _MISSING else _MISSING
+            else:
+                self.take(')')
+                value = value() if callable(value) else _MISSING
+        return value
+
+
+def render_ftl(nodes, context):
+    """Render compiled FreeMarker nodes; raises TemplateError like Liferay would"""
+    output = []
+    for node in nodes:
+        if isinstance(node, str):
+            output.append(node)
+        elif node[0] == 'expr':
+            value = _Expression(node[1], context)
+            result = value.defined(value.evaluate())
+            output.append(('true' if result else 'false') if isinstance(result, bool) else str(result))
+        else:
+            _, branches, else_nodes = node
+            for condition, children in branches:
+                expression = _Expression(condition, context)
+                if expression.defined(expression.evaluate()):
+                    output.append(render_ftl(children, context))
+                    break
+            else:
+                output.append(render_ftl(else_nodes, context))
+    return ''.join(output)
+
+
+class PreviewThemeDisplay:
+    """The parts of themeDisplay fragment templates call"""
+
+    def __init__(self, signed_in=False):
+        self.signed_in = signed_in
+
+    def isSignedIn(self):
+        return self.signed_in
+
+    def getLanguageId(self):
+        return 'en_US'
+
+    def getPortalURL(self):
+        return ''
+
+
+def gzip_from_deflate(raw, crc, size):
+    """Wrap a raw deflate stream (a ZIP_DEFLATED entry) as gzip without recompressing"""
+    return b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff' + raw + struct.pack('<LL', crc, size & 0xffffffff)
+
+
+def configuration_defaults(configuration):
+    """{field: default} and {field: type} from a parsed configuration.json"""
+    defaults = {}
+    types = {}
+    for field_set in configuration.get('fieldSets', []):
+        for field in field_set.get('fields', []):
+            name = field.get('name')
+            if not name:
+                continue
+            types[name] = field.get('type')
+            default = field.get('defaultValue', '')
+            if field.get('type') == 'checkbox':
+                default = default in (True, 'true')
+            defaults[name] = default
+    return defaults, types
+
+
+class PreviewFragment:
+    """One fragment found in an archive, with the errors and warnings its import would raise"""
+
+    def __init__(self, key, directory, data):
+        self.key = key
+        self.directory = directory
+        self.data = data
+        self.name = data.get('name', key)
+        self.defaults = {}
+        self.types = {}
+        self.nodes = []
+        self.errors = []
+        self.warnings = []
+
+    def entry(self, field, default):
+        return f"{self.directory}{self.data.get(field, default)}"
+
+    def configuration(self, overrides=None):
+        """Configuration defaults with query-string overrides, typed like Liferay passes them"""
+        configuration = dict(self.defaults)
+        for name, value in (overrides or {}).items():
+            if name in self.types:
+                configuration[name] = value in ('true', '1', 'on') if self.types[name] == 'checkbox' else value
+        return configuration
+
+
+class PreviewArchive:
+    """
+    A built ZIP served in place
+
+    Import is simulated on load: fragments are discovered, parsed and
+    rendered with their defaults. The archive is reloaded whenever the file
+    on disk changes, so it can sit next to a --watch build.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.normpath(path)
+        self._lock = threading.Lock()
+        self._signature = None
+        self._zip = None
+        self.refresh()
+
+    def refresh(self):
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return False
+        with self._lock:
+            if self._zip is not None:
+                self._zip.close()
+            self._zip = zipfile.ZipFile(self.path, 'r')
+            self._signature = signature
+            self._cache = {}
+            self.names = set(self._zip.namelist())
+        self.simulate_import()
+        return True
+
+    def info(self, name):
+        try:
+            return self._zip.getinfo(name)
+        except KeyError:
+            return None
+
+    def read(self, name):
+        """Entry bytes, read once per archive version"""
+        key = ('data', name)
+        if key not in self._cache:
+            with self._lock:
+                self._cache[key] = self._zip.read(name)
+        return self._cache[key]
+
+    def encoded(self, name, encoding):
+        """Entry bytes in a content encoding, or None if not worth it"""
+        key = (encoding, name)
+        if key not in self._cache:
+            info = self._zip.getinfo(name)
+            if encoding == 'gzip' and info.compress_type == zipfile.ZIP_DEFLATED:
+                with self._lock:
+                    raw = read_raw_entry(self._zip, info)
+                self._cache[key] = gzip_from_deflate(raw, info.CRC, info.file_size)
+            elif encoding == 'gzip':
+                self._cache[key] = gzip.compress(self.read(name), compresslevel=6, mtime=0)
+            else:
+                self._cache[key] = brotli.compress(self.read(name), quality=BROTLI_QUALITY)
+        return self._cache[key]
+
+    def simulate_import(self):
+        """Discover fragments and record what a Liferay import and first render would report"""
+        self.issues = []
+        self.fragments = {}
+        roots = {name.split('/', 1)[0] for name in self.names if name.count('/') == 1}
+        self.collection_root = next((root for root in sorted(roots) if f"{root}/collection.json" in self.names), None)
+        self.resources_prefix = f"{self.collection_root}/resources/" if self.collection_root else 'resources/'
+        self.is_extension = 'client-extension.yaml' in self.names
+
+        if self.collection_root:
+            try:
+                self.collection = json.loads(self.read(f"{self.collection_root}/collection.json"))
+            except json.JSONDecodeError as e:
+                self.collection = {}
+                self.issues.append(f"collection.json: invalid JSON: {e}")
+
+        for name in sorted(self.names):
+            if not name.endswith('/fragment.json'):
+                continue
+            directory = name[:-len('fragment.json')]
+            try:
+                data = json.loads(self.read(name))
+            except json.JSONDecodeError as e:
+                self.issues.append(f"{name}: invalid JSON: {e}")
+                continue
+            key = data.get('fragmentEntryKey') or directory.rstrip('/').rsplit('/', 1)[-1]
+            fragment = PreviewFragment(key, directory, data)
+            self._load_fragment(fragment)
+            self.fragments[key] = fragment
+
+    def _load_fragment(self, fragment):
+        configuration_path = fragment.entry('configurationPath', 'configuration.json')
+        if configuration_path in self.names:
+            try:
+                fragment.defaults, fragment.types = configuration_defaults(json.loads(self.read(configuration_path)))
+            except (json.JSONDecodeError, AttributeError) as e:
+                fragment.errors.append(f"configuration.json: {e}")
+        html_path = fragment.entry('htmlPath', 'index.html')
+        if html_path not in self.names:
+            fragment.errors.append(f"{html_path} is missing")
+            return
+        try:
+            fragment.nodes = compile_ftl(self.read(html_path).decode('utf-8'), html_path)
+            self.render(fragment)
+        except TemplateError as e:
+            fragment.errors.append(str(e))
+
+    def resource_url(self, name):
+        return f"/zip/{quote(self.path)}/{quote(self.resources_prefix + name)}"
+
+    def render(self, fragment, overrides=None, signed_in=False):
+        """A fragment's index.html as Liferay would output it"""
+        context = {
+            'configuration': fragment.configuration(overrides),
+            'fragmentEntryLinkNamespace': f"preview-{fragment.key}",
+            'themeDisplay': PreviewThemeDisplay(signed_in),
+        }
+        markup = render_ftl(fragment.nodes, context)
+
+        def resource(match):
+            name = match.group(1).strip()
+            if self.resources_prefix + name not in self.names:
+                if f"unresolved [resources:{name}]" not in fragment.warnings:
+                    fragment.warnings.append(f"unresolved [resources:{name}]")
+            return self.resource_url(name)
+        return re.sub(r'\[resources:([^\]]+)\]', resource, markup)
+
+    def close(self):
+        with self._lock:
+            self._zip.close()
+
+
+def navigation_menu(menu_id, menu=None):
+    """A headless-delivery navigation menu response for the stub endpoint"""
+    if menu is not None:
+        if isinstance(menu, dict) and 'navigationMenuItems' not in menu:
+            menu = menu.get(menu_id, menu.get('default'))
+        if isinstance(menu, list):
+            menu = {'navigationMenuItems': menu}
+        if menu is not None:
+            return dict(menu, id=menu.get('id', menu_id))
+    items = [{'name': name, 'link': link, 'type': 'url',
+              'navigationMenuItems': [{'name': child, 'link': child_link, 'type': 'url', 'navigationMenuItems': []}
+                                      for child, child_link in children]}
+             for name, link, children in DEFAULT_MENU]
+    return {'id': menu_id, 'name': f"Preview menu {menu_id}", 'navigationMenuItems': items}
+
+
+_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+{styles}
+<script>
+window.Liferay = window.Liferay || {{
+  authToken: '{auth_token}',
+  ThemeDisplay: {{isSignedIn: () => {signed_in}, getLanguageId: () => 'en_US', getPortalURL: () => location.origin}},
+  on() {{}}, fire() {{}}
+}};
+window.__fragmentPreview = window.__fragmentPreview || {{}};
+window.__fragmentPreview[{namespace}] = {{configuration: {configuration}}};
+</script>
+{scripts}
+</head>
+<body>
+<div id="{element_id}" class="lfr-fragment-preview">
+{markup}
+</div>
+<script src="{fragment_js}" data-fragment-namespace="{element_id}"></script>
+</body>
+</html>
+"""
+
+# Liferay runs fragment JS as a function of fragmentElement and configuration
+_JS_WRAPPER = """(function (preview, namespace) {{
+(function (fragmentElement, configuration, fragmentNamespace) {{
+{source}
+}})(document.getElementById(namespace), preview.configuration, namespace);
+}})(window.__fragmentPreview[document.currentScript.dataset.fragmentNamespace], document.currentScript.dataset.fragmentNamespace);
+"""
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    """Routes: / (index), /preview/<zip>/<fragment>, /fragment-js/<zip>/<fragment>.js, /zip/<zip>/<entry>, navigation menus"""
+
+    server_version = 'FragmentPreview/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        query = dict(parse_qsl(url.query))
+        try:
+            if path == '/':
+                self.send_body(self.index_page().encode('utf-8'), 'text/html; charset=utf-8')
+            elif path.startswith(NAVIGATION_PATH):
+                self.navigation(path[len(NAVIGATION_PATH):].strip('/'))
+            elif path.startswith('/zip/'):
+                self.zip_entry(path[len('/zip/'):])
+            elif path.startswith('/preview/'):
+                archive, fragment = self.fragment_for(path[len('/preview/'):])
+                signed_in = query.pop('signedIn', 'false') == 'true'
+                self.send_body(self.fragment_page(archive, fragment, query, signed_in).encode('utf-8'),
+                               'text/html; charset=utf-8')
+            elif path.startswith('/fragment-js/') and path.endswith('.js'):
+                archive, fragment = self.fragment_for(path[len('/fragment-js/'):-len('.js')])
+                source = archive.read(fragment.entry('jsPath', 'index.js')).decode('utf-8') \
+                    if fragment.entry('jsPath', 'index.js') in archive.names else ''
+                self.send_body(_JS_WRAPPER.format(source=source).encode('utf-8'), 'application/javascript')
+            else:
+                self.send_error(HTTPStatus.NOT_FOUND)
+        except LookupError as e:
+            self.send_error(HTTPStatus.NOT_FOUND, str(e))
+        except TemplateError as e:
+            self.send_body(f"Render error: {e}\n".encode('utf-8'), 'text/plain; charset=utf-8',
+                           status=HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    def archive(self, zip_path):
+        archive = self.server.archives.get(zip_path)
+        if archive is None:
+            raise LookupError(f"No archive {zip_path}")
+        archive.refresh()
+        return archive
+
+    def fragment_for(self, rest):
+        zip_path, _, key = rest.partition('.zip/')
+        archive = self.archive(zip_path + '.zip')
+        if key not in archive.fragments:
+            raise LookupError(f"No fragment {key} in {archive.path}")
+        return archive, archive.fragments[key]
+
+    def accepted_encoding(self, content_type, size, sidecars=()):
+        if size < MIN_COMPRESS_SIZE or not content_type.startswith(COMPRESSIBLE_TYPES):
+            return None
+        accepted = {part.split(';')[0].strip() for part in self.headers.get('Accept-Encoding', '').split(',')}
+        if (brotli is not None or 'br' in sidecars) and 'br' in accepted:
+            return 'br'
+        return 'gzip' if 'gzip' in accepted else None
+
+    def not_modified(self, etag, cache_control='no-cache'):
+        candidates = [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]
+        if etag in candidates or '*' in candidates:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', cache_control)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return True
+        return False
+
+    def send_body(self, body, content_type, etag=None, encoded=None, status=HTTPStatus.OK, sidecars=(),
+                  cache_control='no-cache'):
+        """
+        Send a response with an ETag, compressing it if the client accepts
+
+        encoded(encoding) may supply pre-compressed bytes (e.g. reused from
+        the ZIP, or a sidecar among sidecars); otherwise generated bodies are
+        compressed on the fly.
+        """
+        if etag is None:
+            etag = f'"{zlib.crc32(body):08x}-{len(body):x}"'
+        encoding = self.accepted_encoding(content_type, len(body), sidecars) if status == HTTPStatus.OK else None
+        if encoding:
+            etag = f'{etag[:-1]}-{encoding}"'
+        if status == HTTPStatus.OK and self.not_modified(etag, cache_control):
+            return
+        if encoding:
+            if encoded is not None:
+                body = encoded(encoding)
+            elif encoding == 'gzip':
+                body = gzip.compress(body, compresslevel=6, mtime=0)
+            else:
+                body = brotli.compress(body, quality=BROTLI_QUALITY)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', cache_control)
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def zip_entry(self, rest):
+        zip_path, _, name = rest.partition('.zip/')
+        archive = self.archive(zip_path + '.zip')
+        info = archive.info(name)
+        if info is None or name.endswith('/'):
+            raise LookupError(f"No entry {name} in {archive.path}")
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/'):
+            content_type += '; charset=utf-8'
+        # The entry CRC identifies its content, so the ETag needs no hashing
+        etag = f'"{info.CRC:08x}-{info.file_size:x}"'
+        # Fingerprinted assets (--fingerprint-assets) never change and ship precompressed sidecars
+        cache_control = 'public, max-age=31536000, immutable' if is_fingerprinted(name) else 'no-cache'
+        sidecars = {encoding: name + suffix for encoding, suffix in SIDECAR_SUFFIXES.items()
+                    if name + suffix in archive.names}
+        encoding = self.accepted_encoding(content_type, info.file_size, sidecars)
+        if self.not_modified(f'{etag[:-1]}-{encoding}"' if encoding else etag, cache_control):
+            return
+        self.send_body(archive.read(name), content_type, etag,
+                       lambda encoding: archive.read(sidecars[encoding]) if encoding in sidecars
+                       else archive.encoded(name, encoding), sidecars=sidecars, cache_control=cache_control)
+
+    def navigation(self, menu_id):
+        if self.server.nav_latency:
+            time.sleep(self.server.nav_latency)
+        if not menu_id:
+            items = [navigation_menu('main', self.server.menu)]
+            body = {'items': items, 'page': 1, 'pageSize': 20, 'totalCount': len(items), 'lastPage': 1}
+        else:
+            body = navigation_menu(menu_id, self.server.menu)
+        self.send_body(json.dumps(body, indent=2).encode('utf-8'), 'application/json')
+
+    def extension_assets(self, fragment):
+        """CSS and JS of the brand's client extension ZIPs, as globalCSS/globalJS would load them"""
+        brand = fragment.key.split('-', 1)[0]
+        styles, scripts = [], []
+        for archive in self.server.archives.values():
+            if not archive.is_extension or not os.path.basename(archive.path).startswith(f"{brand}-"):
+                continue
+            archive.refresh()
+            for name in sorted(archive.names):
+                if not name.startswith('assets/'):
+                    continue
+                url = f"/zip/{quote(archive.path)}/{quote(name)}"
+                if name.endswith('.css'):
+                    styles.append(f'<link rel="stylesheet" href="{url}">')
+                elif name.endswith('.js'):
+                    scripts.append(f'<script src="{url}" data-senna-track="permanent"></script>')
+        return styles, scripts
+
+    def fragment_page(self, archive, fragment, overrides, signed_in):
+        styles, scripts = self.extension_assets(fragment)
+        css_path = fragment.entry('cssPath', 'index.css')
+        if css_path in archive.names:
+            styles.append(f'<link rel="stylesheet" href="/zip/{quote(archive.path)}/{quote(css_path)}">')
+        element_id = f"preview-{fragment.key}"
+        return _PAGE.format(
+            title=html.escape(f"{fragment.name} · preview"),
+            styles='\n'.join(styles),
+            scripts='\n'.join(scripts),
+            auth_token=AUTH_TOKEN,
+            signed_in='true' if signed_in else 'false',
+            namespace=json.dumps(element_id),
+            configuration=json.dumps(fragment.configuration(overrides)),
+            element_id=element_id,
+            markup=archive.render(fragment, overrides, signed_in),
+            fragment_js=f"/fragment-js/{quote(archive.path)}/{quote(fragment.key)}.js",
+        )
+
+    def index_page(self):
+        rows = []
+        for archive in self.server.archives.values():
+            archive.refresh()
+            if archive.is_extension:
+                rows.append(f"<h2>{html.escape(archive.path)}</h2><p>Client extension: assets load on brand pages</p>")
+                continue
+            rows.append(f"<h2>{html.escape(archive.path)}</h2><ul>")
+            for issue in archive.issues:
+                rows.append(f"<li>❌ {html.escape(issue)}</li>")
+            for key, fragment in archive.fragments.items():
+                status = ''.join(f" ❌ {html.escape(issue)}" for issue in fragment.errors) + \
+                    ''.join(f" ⚠️ {html.escape(issue)}" for issue in fragment.warnings)
+                rows.append(f'<li><a href="/preview/{quote(archive.path)}/{quote(key)}">{html.escape(fragment.name)}</a>'
+                            f' <code>{html.escape(key)}</code>{status}</li>')
+            rows.append("</ul>")
+        return ("<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"utf-8\"><title>Fragment preview</title></head>"
+                f"<body><h1>Fragment preview</h1>{''.join(rows)}</body></html>")
+
+
+def discover_archives(paths=None):
+    """Built ZIPs to serve: the given paths, or everything in fragment-zips/ and *-builds/"""
+    if not paths:
+        paths = sorted(path for pattern in ZIP_PATTERNS for path in glob.glob(pattern))
+    return {os.path.normpath(path): PreviewArchive(path) for path in paths}
+
+
+def print_import_report(archives):
+    """One line per archive, then its import and render problems; False if any would fail in Liferay"""
+    clean = True
+    for archive in archives.values():
+        if archive.is_extension:
+            print(f"🧩 {archive.path}: client extension")
+            continue
+        errors = archive.issues + [f"{key}: {error}" for key, f in archive.fragments.items() for error in f.errors]
+        warnings = [f"{key}: {warning}" for key, f in archive.fragments.items() for warning in f.warnings]
+        failed = bool(errors) or not archive.fragments
+        count = len(archive.fragments)
+        print(f"{'❌' if failed else '⚠️' if warnings else '✓'} {archive.path}: "
+              f"{count} fragment{'s' if count != 1 else ''}")
+        for error in errors:
+            print(f"    ❌ {error}")
+        for warning in warnings:
+            print(f"    ⚠️ {warning}")
+        clean = clean and not failed
+    return clean
+
+
+def main(argv=None):
+    """Simulate importing built ZIPs, then serve previews until interrupted"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('zips', nargs='*', help='Built ZIPs to serve (default: fragment-zips/*.zip and *-builds/*.zip)')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    parser.add_argument('--menu', metavar='FILE',
+                        help='JSON navigation menu (or {menuId: menu}) for the navigation-menus stub')
+    parser.add_argument('--nav-latency', type=int, default=0, metavar='MS',
+                        help='Delay every navigation-menus response by MS milliseconds')
+    parser.add_argument('--check', action='store_true',
+                        help='Only simulate the import and render every fragment; exit 1 on problems')
+    parser.add_argument('--quiet', action='store_true', help='Do not log requests')
+    args = parser.parse_args(argv)
+
+    missing = [path for path in args.zips if not os.path.exists(path)]
+    if missing:
+        print(f"❌ Not found: {', '.join(missing)}")
+        return False
+    archives = discover_archives(args.zips)
+    if not archives:
+        print("❌ No built ZIPs found; run a build first")
+        return False
+    print("📦 Simulated import:")
+    clean = print_import_report(archives)
+    if args.check:
+        return clean
+
+    menu = None
+    if args.menu:
+        with open(args.menu, 'r') as f:
+            menu = json.load(f)
+
+    server = ThreadingHTTPServer((args.host, args.port), PreviewHandler)
+    server.daemon_threads = True
+    server.archives = archives
+    server.menu = menu
+    server.nav_latency = args.nav_latency / 1000
+    server.quiet = args.quiet
+    encodings = 'gzip, br' if brotli is not None else 'gzip (install brotli for br)'
+    print(f"\n👀 Previewing on http://{args.host}:{server.server_port}/ ({encodings}). Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped preview server")
+    finally:
+        server.server_close()
+        for archive in archives.values():
+            archive.close()
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
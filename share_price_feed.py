@@ -0,0 +1,562 @@
+#!/usr/bin/env python3
+"""
+Share price feed for the jm-share-price fragment
+An asyncio HTTP service that keeps one cached quote per stock symbol,
+refreshes it on a fixed interval, and pushes every change to all subscribers
+over Server-Sent Events. Polling clients get the same cached quote with
+ETag/Last-Modified, so unchanged quotes cost a 304.
+
+Endpoints:
+    GET /quotes/<SYMBOL>          quote JSON (conditional requests supported; --symbols only)
+    GET /quotes/<SYMBOL>/stream   text/event-stream of quotes (Last-Event-ID honoured)
+    GET /health                   subscribers and cached quotes per symbol
+
+Usage:
+    python3 share_price_feed.py                              # simulated quotes on http://127.0.0.1:8090/
+    python3 share_price_feed.py --upstream 'https://example.com/quote?s={symbol}' --symbols JMAT JMPLY
+    python3 share_price_feed.py --bench 2000                 # 2,000 SSE subscribers against a child server
+    python3 share_price_feed.py --bench 2000 --bench-mode poll
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import subprocess
+import urllib.request
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8090
+DEFAULT_INTERVAL = 15.0
+HEARTBEAT_SECONDS = 15.0
+RECONNECT_MS = 5000
+MAX_HEADER_BYTES = 16 * 1024
+UPSTREAM_TIMEOUT = 10
+# Intervals a request waits for a symbol's first quote before giving up with a 504
+READY_INTERVALS = 3
+DEFAULT_SYMBOLS = ('JMAT',)
+
+SYMBOL = re.compile(r'^[A-Z0-9.]{1,12}$')
+
+# Quote fields that change on every refresh; not part of a quote's version
+TIME_FIELDS = ('date', 'timestamp')
+
+# Starting points for simulated quotes; unknown symbols start at 1,000
+SEED_QUOTES = {
+    'JMAT': {'price': 1789.00, 'previousClose': 1765.00, 'currency': 'GBX', 'yearLow': 1420, 'yearHigh': 1850,
+             'volume': 1_200_000, 'shares': 190_000_000},
+}
+
+
+class SimulatedSource:
+    """Random-walk quotes; deterministic for a given seed"""
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.state = {}
+
+    async def quote(self, symbol):
+        state = self.state.get(symbol)
+        if state is None:
+            seed = SEED_QUOTES.get(symbol, {'price': 1000.0, 'previousClose': 1000.0, 'currency': 'GBX',
+                                            'yearLow': 800, 'yearHigh': 1200, 'volume': 500_000,
+                                            'shares': 100_000_000})
+            state = self.state[symbol] = dict(seed, dayLow=seed['price'], dayHigh=seed['price'])
+        else:
+            state['price'] = round(max(1.0, state['price'] * (1 + self.rng.gauss(0, 0.001))), 2)
+            state['volume'] += self.rng.randrange(1_000, 20_000)
+        state['dayLow'] = min(state['dayLow'], state['price'])
+        state['dayHigh'] = max(state['dayHigh'], state['price'])
+        return format_quote(symbol, state)
+
+
+class UpstreamSource:
+    """Quotes fetched from a URL template ({symbol} expands) returning the quote fields as JSON"""
+
+    def __init__(self, url):
+        self.url = url
+
+    def _fetch(self, symbol):
+        request = urllib.request.Request(self.url.replace('{symbol}', symbol), headers={'Accept': 'application/json'})
+        with urllib.request.urlopen(request, timeout=UPSTREAM_TIMEOUT) as response:
+            return json.load(response)
+
+    async def quote(self, symbol):
+        data = await asyncio.to_thread(self._fetch, symbol)
+        return dict(data, symbol=symbol)
+
+
+def format_quote(symbol, state):
+    """A quote in the shape jm-share-price renders (see updatePriceDisplay)"""
+    change = state['price'] - state['previousClose']
+    now = time.time()
+    return {
+        'symbol': symbol,
+        'price': state['price'],
+        'currency': state['currency'],
+        'change': round(change, 2),
+        'changePercent': round(change / state['previousClose'] * 100, 2),
+        'date': datetime.fromtimestamp(now, timezone.utc).strftime('%d %B %Y %H:%M UTC'),
+        'dayRange': f"{state['dayLow']:,.0f} - {state['dayHigh']:,.0f}",
+        'yearRange': f"{state['yearLow']:,} - {state['yearHigh']:,}",
+        'volume': f"{state['volume'] / 1e6:.1f}M",
+        'marketCap': f"£{state['price'] * state['shares'] / 100 / 1e9:.1f}B",
+        'timestamp': datetime.fromtimestamp(now, timezone.utc).isoformat(),
+    }
+
+
+class SymbolFeed:
+    """The cached quote of one symbol, pre-encoded once for every subscriber"""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.version = None
+        self.payload = None
+        self.event = None
+        self.modified = None
+        self.published = None
+        self.subscribers = 0
+        self.requests = 0
+        self.ready = asyncio.Event()
+        self._changed = asyncio.Event()
+
+    def publish(self, quote):
+        """
+        Store a quote; True when its market fields differ from the cached one
+
+        Only then are subscribers woken. The version covers the market fields
+        alone, so a refresh that only moves the time fields is not a change.
+        """
+        market = {name: value for name, value in quote.items() if name not in TIME_FIELDS}
+        version = hashlib.sha256(json.dumps(market, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()[:16]
+        if version == self.version:
+            return False
+        self.published = time.time()
+        payload = json.dumps(quote, separators=(',', ':')).encode('utf-8')
+        payload = payload[:-1] + f',"publishedAt":{self.published:.6f}}}'.encode('utf-8')
+        self.version, self.payload, self.modified = version, payload, int(self.published)
+        self.event = b'id: ' + version.encode('ascii') + b'\nevent: quote\ndata: ' + payload + b'\n\n'
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+        self.ready.set()
+        return True
+
+    async def next_change(self, timeout):
+        """Wait for the next publish; False on timeout"""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class QuoteFeed:
+    """
+    Symbol feeds, each refreshed by one task however many clients read it
+
+    Only the allowed symbols get a feed, so clients cannot start refresh
+    tasks (and upstream fetches) for arbitrary symbols.
+    """
+
+    def __init__(self, source, interval=DEFAULT_INTERVAL, symbols=DEFAULT_SYMBOLS):
+        self.source = source
+        self.interval = interval
+        self.symbols = frozenset(symbols)
+        self.feeds = {}
+        self._tasks = {}
+
+    def get(self, symbol):
+        """The feed of an allowed symbol, started on first use; None for any other symbol"""
+        if symbol not in self.symbols:
+            return None
+        feed = self.feeds.get(symbol)
+        if feed is None:
+            feed = self.feeds[symbol] = SymbolFeed(symbol)
+            self._tasks[symbol] = asyncio.get_running_loop().create_task(self._refresh(feed))
+        return feed
+
+    async def _refresh(self, feed):
+        while True:
+            try:
+                feed.publish(await self.source.quote(feed.symbol))
+            except Exception as e:
+                # Keep serving the last good quote; the next interval retries
+                print(f"⚠️ {feed.symbol}: quote refresh failed: {e}", file=sys.stderr)
+            await asyncio.sleep(self.interval)
+
+    def stats(self):
+        return {symbol: {'subscribers': feed.subscribers, 'requests': feed.requests, 'version': feed.version,
+                         'published': feed.published}
+                for symbol, feed in sorted(self.feeds.items())}
+
+
+async def read_request(reader):
+    """(method, path, headers) of the next request, or None when the client closed"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    except asyncio.LimitOverrunError:
+        raise ValueError("request headers too large")
+    lines = head.decode('latin-1').split('\r\n')
+    parts = lines[0].split(' ')
+    if len(parts) != 3:
+        raise ValueError(f"malformed request line: {lines[0]!r}")
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    return parts[0], parts[1], headers
+
+
+def response_head(status, reason, headers):
+    lines = [f"HTTP/1.1 {status} {reason}"] + [f"{name}: {value}" for name, value in headers.items()]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+def not_modified(feed, headers):
+    """True when the client's cached copy is the current quote"""
+    if_none_match = headers.get('if-none-match')
+    if if_none_match is not None:
+        return any(tag.strip() in (f'"{feed.version}"', '*') for tag in if_none_match.split(','))
+    if_modified_since = headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            return feed.modified <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class FeedServer:
+    """HTTP/1.1 with keep-alive for quote requests; a held-open connection per SSE subscriber"""
+
+    def __init__(self, feed, allow_origin='*'):
+        self.feed = feed
+        self.allow_origin = allow_origin
+
+    def common_headers(self):
+        headers = {'Date': formatdate(usegmt=True)}
+        if self.allow_origin:
+            headers['Access-Control-Allow-Origin'] = self.allow_origin
+            headers['Access-Control-Expose-Headers'] = 'ETag, Last-Modified'
+        return headers
+
+    async def send(self, writer, status, reason, body=b'', content_type='application/json', extra=None):
+        headers = self.common_headers()
+        headers.update(extra or {})
+        headers['Content-Type'] = content_type
+        headers['Content-Length'] = str(len(body))
+        writer.write(response_head(status, reason, headers) + body)
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except ValueError as e:
+                    await self.send(writer, 400, 'Bad Request', json.dumps({'error': str(e)}).encode('utf-8'),
+                                    extra={'Connection': 'close'})
+                    return
+                if request is None:
+                    return
+                method, target, headers = request
+                path = target.split('?', 1)[0].rstrip('/')
+                match = re.match(r'^/quotes/([^/]+)(/stream)?$', path)
+                feed = self.feed.get(match.group(1).upper()) if match else None
+                if method == 'OPTIONS':
+                    await self.send(writer, 204, 'No Content', content_type='text/plain',
+                                    extra={'Access-Control-Allow-Headers': 'Last-Event-ID, If-None-Match, Cache-Control',
+                                           'Access-Control-Max-Age': '86400'})
+                elif method != 'GET':
+                    await self.send(writer, 405, 'Method Not Allowed', extra={'Allow': 'GET, OPTIONS'})
+                elif path == '/health':
+                    body = {'interval': self.feed.interval, 'symbols': self.feed.stats()}
+                    await self.send(writer, 200, 'OK', json.dumps(body, indent=2).encode('utf-8'))
+                elif feed is not None:
+                    if not await self.wait_ready(feed):
+                        await self.send(writer, 504, 'Gateway Timeout',
+                                        json.dumps({'error': f"no quote for {feed.symbol} yet"}).encode('utf-8'),
+                                        extra={'Retry-After': str(max(1, int(self.feed.interval)))})
+                    elif match.group(2):
+                        await self.stream(feed, writer, headers)
+                        return
+                    else:
+                        await self.quote(feed, writer, headers)
+                else:
+                    await self.send(writer, 404, 'Not Found', b'{"error":"not found"}')
+                if headers.get('connection', '').lower() == 'close':
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def wait_ready(self, feed):
+        """Wait for a symbol's first quote; False when none arrived within a few intervals"""
+        try:
+            await asyncio.wait_for(feed.ready.wait(), READY_INTERVALS * self.feed.interval)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def quote(self, feed, writer, headers):
+        feed.requests += 1
+        cache = {'ETag': f'"{feed.version}"', 'Last-Modified': formatdate(feed.modified, usegmt=True),
+                 'Cache-Control': f"public, max-age={max(1, int(self.feed.interval))}"}
+        if not_modified(feed, headers):
+            await self.send(writer, 304, 'Not Modified', extra=cache)
+        else:
+            await self.send(writer, 200, 'OK', feed.payload, extra=cache)
+
+    async def stream(self, feed, writer, headers):
+        """Hold the connection open and write every new quote; comments keep proxies from timing out"""
+        stream_headers = self.common_headers()
+        stream_headers.update({'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache',
+                               'Connection': 'keep-alive', 'X-Accel-Buffering': 'no'})
+        writer.write(response_head(200, 'OK', stream_headers) + f"retry: {RECONNECT_MS}\n\n".encode('ascii'))
+        # A reconnecting EventSource sends the last id it saw; skip the quote it already has
+        if headers.get('last-event-id') != feed.version:
+            writer.write(feed.event)
+        await writer.drain()
+        feed.subscribers += 1
+        try:
+            while True:
+                if await feed.next_change(HEARTBEAT_SECONDS):
+                    writer.write(feed.event)
+                else:
+                    writer.write(b': ping\n\n')
+                await writer.drain()
+        finally:
+            feed.subscribers -= 1
+
+
+async def serve(host, port, source, interval, allow_origin='*', ready=None, symbols=DEFAULT_SYMBOLS):
+    feed = QuoteFeed(source, interval, symbols)
+    server = await asyncio.start_server(FeedServer(feed, allow_origin).handle, host, port,
+                                        limit=MAX_HEADER_BYTES, backlog=4096)
+    if ready is not None:
+        ready(server.sockets[0].getsockname()[1])
+    async with server:
+        await server.serve_forever()
+
+
+def raise_file_limit(needed):
+    """Lift the soft open-file limit towards needed descriptors where the platform allows"""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard) if hard != resource.RLIM_INFINITY else needed, hard))
+
+
+async def _open(port, path, extra=''):
+    reader, writer = await asyncio.open_connection(DEFAULT_HOST, port, limit=MAX_HEADER_BYTES)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {DEFAULT_HOST}\r\n{extra}\r\n".encode('latin-1'))
+    await writer.drain()
+    return reader, writer
+
+
+async def _push_subscriber(port, symbol, latencies, ready, stop):
+    reader, writer = await _open(port, f"/quotes/{symbol}/stream", 'Accept: text/event-stream\r\n')
+    try:
+        await reader.readuntil(b'\r\n\r\n')
+        ready()
+        while not stop.is_set():
+            block = await reader.readuntil(b'\n\n')
+            for line in block.split(b'\n'):
+                if line.startswith(b'data: '):
+                    latencies.append(time.time() - json.loads(line[6:])['publishedAt'])
+    except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _poll_subscriber(port, symbol, poll_interval, latencies, counts, ready, stop):
+    reader, writer = await _open(port, f"/quotes/{symbol}", '')
+    etag, seen = None, None
+    ready_called = False
+    try:
+        while not stop.is_set():
+            if etag:
+                writer.write(f"GET /quotes/{symbol} HTTP/1.1\r\nHost: {DEFAULT_HOST}\r\n"
+                             f"If-None-Match: {etag}\r\n\r\n".encode('latin-1'))
+                await writer.drain()
+            head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1')
+            length = int(re.search(r'Content-Length: (\d+)', head).group(1))
+            body = await reader.readexactly(length)
+            counts['requests'] += 1
+            if head.startswith('HTTP/1.1 304'):
+                counts['not_modified'] += 1
+            else:
+                etag = re.search(r'ETag: (\S+)', head).group(1)
+                quote = json.loads(body)
+                if seen is not None:
+                    latencies.append(time.time() - quote['publishedAt'])
+                seen = etag
+            if not ready_called:
+                ready_called = True
+                ready()
+            # Clients start out of phase, like tabs opened at different times
+            await asyncio.sleep(poll_interval * random.uniform(0.9, 1.1))
+    except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+def _percentile(values, fraction):
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def benchmark(subscribers, mode='push', symbol='JMAT', interval=1.0, duration=10.0, poll_interval=None):
+    """
+    Start a feed server in a child process and connect simulated subscribers
+
+    Push subscribers hold an SSE stream; poll subscribers repeat conditional
+    GETs every poll_interval seconds (default: the quote interval). Reports
+    how long each new quote took to reach subscribers and what the server
+    handled.
+    """
+    raise_file_limit(subscribers * 2 + 256)
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--port', '0', '--interval', str(interval),
+                               '--seed', '1', '--print-port'], stdout=subprocess.PIPE, text=True)
+    try:
+        port = int(server.stdout.readline().strip())
+        return asyncio.run(_benchmark(port, subscribers, mode, symbol, duration, poll_interval or interval, server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def _benchmark(port, subscribers, mode, symbol, duration, poll_interval, server_pid):
+    latencies, counts = [], {'requests': 0, 'not_modified': 0}
+    connected = 0
+    all_connected = asyncio.Event()
+    stop = asyncio.Event()
+
+    def ready():
+        nonlocal connected
+        connected += 1
+        if connected == subscribers:
+            all_connected.set()
+
+    started = time.perf_counter()
+    if mode == 'push':
+        tasks = [asyncio.create_task(_push_subscriber(port, symbol, latencies, ready, stop)) for _ in range(subscribers)]
+    else:
+        tasks = [asyncio.create_task(_poll_subscriber(port, symbol, poll_interval, latencies, counts, ready, stop))
+                 for _ in range(subscribers)]
+    await asyncio.wait_for(all_connected.wait(), timeout=max(30.0, subscribers / 100))
+    connect_seconds = time.perf_counter() - started
+    latencies.clear()
+
+    await asyncio.sleep(duration)
+    stop.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return {
+        'mode': mode,
+        'subscribers': subscribers,
+        'connect_seconds': connect_seconds,
+        'deliveries': len(latencies),
+        'requests': counts['requests'],
+        'not_modified': counts['not_modified'],
+        'latency_p50_ms': _percentile(latencies, 0.5) * 1000,
+        'latency_p95_ms': _percentile(latencies, 0.95) * 1000,
+        'latency_max_ms': max(latencies, default=0.0) * 1000,
+        'server_rss_kb': _process_rss_kb(server_pid),
+        'duration': duration,
+    }
+
+
+def _process_rss_kb(pid):
+    """Current resident memory of another process (Linux), or None"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def print_benchmark(result):
+    print(f"\n📡 {result['subscribers']:,} {result['mode']} subscribers for {result['duration']:.0f}s "
+          f"(connected in {result['connect_seconds']:.2f}s)")
+    print(f"  quotes delivered: {result['deliveries']:,}")
+    if result['mode'] == 'poll':
+        print(f"  requests: {result['requests']:,} ({result['not_modified']:,} answered 304 Not Modified)")
+    print(f"  quote age on arrival: p50 {result['latency_p50_ms']:.1f} ms, p95 {result['latency_p95_ms']:.1f} ms, "
+          f"max {result['latency_max_ms']:.1f} ms")
+    if result['server_rss_kb']:
+        print(f"  server RSS: {result['server_rss_kb'] / 1024:.1f} MB")
+
+
+def main(argv=None):
+    """Run the feed service, or benchmark it with simulated subscribers"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Address to bind (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT}; 0 picks one)')
+    parser.add_argument('--interval', type=float,
+                        help=f'Seconds between quote refreshes (default: {DEFAULT_INTERVAL:g}, 1 with --bench)')
+    parser.add_argument('--upstream', metavar='URL',
+                        help='Fetch quotes from URL ({symbol} expands) instead of simulating them')
+    parser.add_argument('--symbols', nargs='+', metavar='SYMBOL', default=list(DEFAULT_SYMBOLS),
+                        help=f"Symbols the service quotes; others get a 404 (default: {' '.join(DEFAULT_SYMBOLS)})")
+    parser.add_argument('--allow-origin', default='*',
+                        help="Access-Control-Allow-Origin for the Liferay site (default: '*'; '' disables CORS)")
+    parser.add_argument('--seed', type=int, help='Seed for simulated quotes')
+    parser.add_argument('--print-port', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--bench', type=int, metavar='SUBSCRIBERS',
+                        help='Benchmark a child server with this many simulated subscribers')
+    parser.add_argument('--bench-mode', choices=['push', 'poll'], default='push',
+                        help='Subscribers hold SSE streams (push) or send conditional GETs (poll)')
+    parser.add_argument('--bench-seconds', type=float, default=10.0, help='Benchmark duration (default: 10)')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        print_benchmark(benchmark(args.bench, args.bench_mode, interval=args.interval or 1.0,
+                                  duration=args.bench_seconds))
+        return True
+    interval = args.interval or DEFAULT_INTERVAL
+    symbols = [symbol.upper() for symbol in args.symbols]
+    invalid = [symbol for symbol in symbols if not SYMBOL.match(symbol)]
+    if invalid:
+        parser.error(f"invalid symbol: {', '.join(invalid)}")
+
+    source = UpstreamSource(args.upstream) if args.upstream else SimulatedSource(args.seed)
+
+    def ready(port):
+        if args.print_port:
+            print(port, flush=True)
+        else:
+            print(f"📈 Share price feed on http://{args.host}:{port}/quotes/{symbols[0]} "
+                  f"(stream: /quotes/{symbols[0]}/stream, refresh every {interval:g}s). Press Ctrl+C to stop.")
+
+    try:
+        asyncio.run(serve(args.host, args.port, source, interval, args.allow_origin, ready, symbols))
+    except KeyboardInterrupt:
+        print("\n👋 Feed stopped")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,50 @@
+"""
+The JM build must leave its sources untouched
+Template generation and fragment preparation both write into
+fragment-collection/; if they disagree on a file's bytes, every build
+rewrites it and --watch repackages the fragment for nothing
+"""
+
+import os
+import sys
+import glob
+import shutil
+import hashlib
+import subprocess
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DIRS = ('fragment-collection', 'fragment-templates')
+
+
+def snapshot(root):
+    """Content hash of every source file under root"""
+    hashes = {}
+    for directory in SOURCE_DIRS:
+        for path in glob.glob(os.path.join(root, directory, '**', '*'), recursive=True):
+            if os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    hashes[os.path.relpath(path, root)] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+
+def build(root):
+    result = subprocess.run([sys.executable, 'create_fragment_zips.py', '--quiet'], cwd=root,
+                            capture_output=True, text=True, timeout=600)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result.stdout
+
+
+def test_jm_build_twice_leaves_sources_clean(tmp_path):
+    for name in os.listdir(REPO):
+        if name.endswith('.py'):
+            shutil.copy2(os.path.join(REPO, name), tmp_path / name)
+    for directory in SOURCE_DIRS:
+        shutil.copytree(os.path.join(REPO, directory), tmp_path / directory)
+
+    before = snapshot(tmp_path)
+    build(tmp_path)
+    assert snapshot(tmp_path) == before
+    output = build(tmp_path)
+    assert snapshot(tmp_path) == before
+    assert '✓ Wrote' not in output
+    assert '(0 files updated)' in output
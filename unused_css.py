@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+Unused CSS detection across fragments and the global CSS client extensions
+Matches every selector in each brand's client-extension global.css and in
+each fragment's index.css against the fragment markup, finds rules that are
+duplicated between stylesheets, and reports the bytes that could be removed
+
+Markup comes from each fragment's index.html. FreeMarker directives are
+dropped and both branches of every [#if] are kept. Classes and attributes
+that a fragment's scripts (or the brand's global.js) mention in string
+literals count as present, because scripts add them at runtime. Selectors
+below an embedded Liferay portlet or taglib are kept, because that markup is
+only known at runtime. Rules for bare elements (#wrapper h1, a:hover) are
+kept, because they also style web content.
+
+Usage:
+    python3 unused_css.py                     # every brand
+    python3 unused_css.py --only ybs --verbose
+    python3 unused_css.py --json unused-css.json
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import argparse
+
+from build_stages import BuildStage, origin
+from critical_css import (
+    DEFERRED_PSEUDO_CLASSES, PAGE_CONTEXT_TAGS, CSSNode, SelectorMatcher, _COMPOUND_PART,
+    _FREEMARKER_DIRECTIVE, _FREEMARKER_EXPRESSION, DYNAMIC, _TreeBuilder, _split_complex, _split_top_level,
+    parse_css, split_inline_styles,
+)
+from js_tokenizer import tokenize
+from minify import minify_css
+
+# Markup Liferay renders around every fragment
+LIFERAY_PAGE_IDS = frozenset({'wrapper', 'content', 'main-content', 'banner', 'footer', 'control-menu'})
+LIFERAY_PAGE_CLASSES = (
+    'lfr-', 'portlet', 'control-menu', 'has-control-menu', 'has-edit-mode-menu', 'signed-in', 'signed-out',
+    'controls-visible', 'controls-hidden', 'fragment-entry-link', 'is-edit-mode', 'yui3-', 'modal-open',
+    'page-editor',
+)
+
+# Stand-in element for markup a Liferay portlet or taglib renders at runtime
+RUNTIME_TAG = 'lfr-runtime'
+# Elements Liferay fills with other fragments and widgets
+DROP_ZONE_TAG = 'lfr-drop-zone'
+# Stand-in for a tag name chosen by configuration, e.g. <${configuration.headingLevel}>
+DYNAMIC_TAG = 'dynamic-tag'
+_DYNAMIC_TAG_NAME = re.compile(r'<(/?)\$\{[^}]*\}')
+_TAG_PART = re.compile(r'^[a-zA-Z][\w-]*')
+_RUNTIME_DIRECTIVE = re.compile(r'\[@liferay[\w.]*(?:\["[^"]*"\])?[^\]]*\]')
+_INLINE_SCRIPT = re.compile(r'<script\b[^>]*>(.*?)</script>', re.IGNORECASE | re.DOTALL)
+_WORD = re.compile(r'[A-Za-z_][\w-]*')
+_INTERACTION_PSEUDO = re.compile(rf"(?<!:):(?:{'|'.join(sorted(DEFERRED_PSEUDO_CLASSES))})(?![\w-])")
+_NEGATION = re.compile(r':not\((?:[^()]|\([^()]*\))*\)')
+_CLASS_PART = re.compile(r'\.([\w-]+)')
+_ATTRIBUTE_PART = re.compile(r'\[\s*([\w:-]+)[^\]]*\]')
+_ANIMATION = re.compile(r'animation(?:-name)?\s*:\s*([^;}]+)')
+
+
+def parse_markup(html):
+    """Parse a fragment template into an Element tree, keeping every conditional branch"""
+    html = _RUNTIME_DIRECTIVE.sub(f'<{RUNTIME_TAG}></{RUNTIME_TAG}>', html)
+    html = _DYNAMIC_TAG_NAME.sub(rf'<\1{DYNAMIC_TAG}', html)
+    html = _FREEMARKER_DIRECTIVE.sub('', html)
+    html = _FREEMARKER_EXPRESSION.sub(DYNAMIC, html)
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def script_words(sources):
+    """Every class-like word inside string and template literals of the given scripts"""
+    words = set()
+    for source in sources:
+        for token in tokenize(source):
+            if token.kind in ('string', 'template'):
+                words.update(_WORD.findall(token.value))
+    return words
+
+
+class UsageMatcher(SelectorMatcher):
+    """
+    Decides whether a selector can match anything a fragment renders
+
+    Unlike the first-paint matcher, interaction states always match, classes
+    and attributes the scripts add match any element, and only Liferay's own
+    page markup counts as outside the fragment.
+    """
+
+    def __init__(self, root, words=(), prefix=None):
+        super().__init__(root)
+        self.words = set(words)
+        # String concatenation and template literals build classes from prefixes like 'sigma-status-'
+        self.prefixes = tuple(word for word in self.words if word.endswith('-'))
+        self.runtime_containers = [e for e in self.elements if e.tag == DROP_ZONE_TAG
+                                   or any(d.tag == RUNTIME_TAG for d in e.walk() if d is not e)]
+        self.owned = self.fragment_classes | self.fragment_ids
+        # Classes with the brand prefix are the brand's own, so a missing one is unused, not Liferay's
+        self.prefix = prefix
+        self._stripped = {}
+
+    def _added_by_script(self, name):
+        return name in self.words or name.startswith(self.prefixes)
+
+    def _is_page_context(self, compound):
+        for part in _COMPOUND_PART.finditer(self._runtime_free(compound)):
+            if part.group('cls') and not part.group('cls').startswith(LIFERAY_PAGE_CLASSES):
+                return False
+            if part.group('id') and part.group('id') not in LIFERAY_PAGE_IDS:
+                return False
+            tag = part.group('tag')
+            if tag and tag.lower() not in PAGE_CONTEXT_TAGS:
+                return False
+        return True
+
+    def _runtime_free(self, compound):
+        """The compound without the states and classes scripts can add"""
+        if compound not in self._stripped:
+            stripped = _NEGATION.sub('', _INTERACTION_PSEUDO.sub('', compound))
+            stripped = _CLASS_PART.sub(lambda m: '' if self._added_by_script(m.group(1)) else m.group(0), stripped)
+            # Liferay sets its own attributes on <lfr-drop-zone> and friends while editing
+            liferay_element = compound.lower().startswith('lfr-')
+            stripped = _ATTRIBUTE_PART.sub(
+                lambda m: '' if liferay_element or m.group(1) in self.words else m.group(0), stripped)
+            self._stripped[compound] = stripped or '*'
+        return self._stripped[compound]
+
+    def _match_compound(self, compound, element):
+        compound = self._runtime_free(compound)
+        if element.tag == DYNAMIC_TAG:
+            compound = _TAG_PART.sub('', compound) or '*'
+        return super()._match_compound(compound, element)
+
+    def usage(self, selector):
+        """'used', 'runtime' (Liferay-rendered markup) or None when nothing can match"""
+        selector = _INTERACTION_PSEUDO.sub('', selector)
+        compounds, combinators = _split_complex(selector)
+        if not compounds or len(combinators) != len(compounds) - 1:
+            return 'used'
+        subject = [p for p in _COMPOUND_PART.finditer(compounds[-1])
+                   if p.group('cls') or p.group('id') or p.group('attr')]
+        if not subject or self.matches_any(selector, self.elements):
+            return 'used'
+        # Liferay's editor markup, or widget markup when the fragment embeds Liferay content
+        names = {p.group('cls') or p.group('id') for c in compounds for p in _COMPOUND_PART.finditer(c)} - {None}
+        if any(p.group('cls') and p.group('cls').startswith(LIFERAY_PAGE_CLASSES) for p in subject) or \
+                (self.runtime_containers and not names & self.owned and
+                 not any(self.prefix and name.startswith(self.prefix) for name in names)):
+            return 'runtime'
+        for index, combinator in enumerate(combinators):
+            if combinator in (' ', '>') and not all(self._is_page_context(c) for c in compounds[:index + 1]):
+                prefix = compounds[0] + ''.join(f" {combinators[i]} {compounds[i + 1]}" for i in range(index))
+                if self.matches_any(prefix, self.runtime_containers):
+                    return 'runtime'
+        return None
+
+
+def fragment_matcher(html, scripts=(), prefix=None):
+    """UsageMatcher for one fragment's index.html and the scripts that can change its markup"""
+    markup, _ = split_inline_styles(html)
+    inline_scripts = _INLINE_SCRIPT.findall(markup)
+    return UsageMatcher(parse_markup(markup), script_words(list(scripts) + inline_scripts), prefix)
+
+
+def selector_usage(selector, matchers):
+    """Best usage of a selector over several fragments"""
+    best = None
+    for matcher in matchers:
+        usage = matcher.usage(selector)
+        if usage == 'used':
+            return usage
+        best = best or usage
+    return best
+
+
+def referenced_animations(css_texts, words=()):
+    """Keyframe names referenced by any animation declaration or script"""
+    names = set(words)
+    for css in css_texts:
+        for value in _ANIMATION.findall(css):
+            names.update(_WORD.findall(value))
+    return names
+
+
+def _size(nodes):
+    return len(minify_css(''.join(node.to_css() for node in nodes)).encode('utf-8'))
+
+
+def prune_nodes(nodes, is_used, animations, context=()):
+    """
+    Drop unused selectors, rules, empty at-rule blocks and unreferenced keyframes
+
+    Returns (kept_nodes, removed) where removed lists {'selector', 'context',
+    'bytes'} with bytes measured minified.
+    """
+    kept = []
+    removed = []
+    for node in nodes:
+        if node.kind == 'rule':
+            selectors = _split_top_level(node.prelude, ',')
+            live = [s for s in selectors if is_used(s)]
+            dead = [s for s in selectors if s not in live]
+            if not dead:
+                kept.append(node)
+                continue
+            if live:
+                kept.append(CSSNode('rule', ', '.join(live), body=node.body))
+                saved = sum(len(s.encode('utf-8')) + 1 for s in dead)
+            else:
+                saved = _size([node])
+            removed.append({'selector': ', '.join(dead), 'context': ' '.join(context), 'bytes': saved})
+        elif node.kind == 'block' and node.children is not None:
+            children, inner = prune_nodes(node.children, is_used, animations, context + (node.prelude,))
+            removed += inner
+            if children:
+                kept.append(CSSNode('block', node.prelude, children=children))
+        elif node.prelude.lower().startswith(('@keyframes', '@-webkit-keyframes')) and \
+                node.prelude.split(None, 1)[-1].strip() not in animations:
+            removed.append({'selector': node.prelude, 'context': ' '.join(context), 'bytes': _size([node])})
+        else:
+            kept.append(node)
+    return kept, removed
+
+
+def prune_css(css, matchers, animations):
+    """Return (pruned_css, removed) for a stylesheet against the fragments that can use it"""
+    kept, removed = prune_nodes(parse_css(css), lambda s: selector_usage(s, matchers) is not None, animations)
+    return ''.join(node.to_css() for node in kept), removed
+
+
+def _normalized_body(body):
+    declarations = []
+    for declaration in _split_top_level(body or '', ';'):
+        name, _, value = declaration.partition(':')
+        declarations.append(f"{name.strip().lower()}:{' '.join(value.split())}")
+    return ';'.join(declarations)
+
+
+def rule_signatures(nodes, context=()):
+    """(signature, node) for every rule: its context, selector list and declarations, normalized"""
+    for node in nodes:
+        if node.kind == 'rule':
+            selectors = sorted(' '.join(s.split()) for s in _split_top_level(node.prelude, ','))
+            yield (' '.join(context), ', '.join(selectors), _normalized_body(node.body)), node
+        elif node.kind == 'block' and node.children is not None:
+            yield from rule_signatures(node.children, context + (' '.join(node.prelude.split()),))
+
+
+def find_duplicates(sheets, global_sheets=()):
+    """
+    Rules declared identically more than once across a brand's stylesheets
+
+    sheets maps a label to parsed nodes. A fragment copy of a global rule is
+    removable, because global.css is on every page; so is every extra copy
+    within one stylesheet. Copies shared only between fragments are reported
+    as candidates for global.css, not as removable, since each fragment can
+    be placed on a page alone.
+    """
+    copies = {}
+    for label, nodes in sheets.items():
+        for signature, node in rule_signatures(nodes):
+            copies.setdefault(signature, []).append((label, node))
+
+    duplicates = []
+    for (context, selector, _), found in copies.items():
+        if len(found) < 2:
+            continue
+        labels = [label for label, _ in found]
+        size = _size([found[0][1]])
+        in_global = any(label in global_sheets for label in labels)
+        if in_global:
+            removable = sum(1 for label in labels if label not in global_sheets)
+            removable += max(0, sum(1 for label in labels if label in global_sheets) - 1)
+        else:
+            removable = len(labels) - len(set(labels))
+        duplicates.append({'selector': selector, 'context': context, 'stylesheets': labels,
+                           'bytes': size, 'removable_bytes': size * removable})
+    return sorted(duplicates, key=lambda d: d['removable_bytes'], reverse=True)
+
+
+def brand_prefix(fragment_dir):
+    """Class prefix a fragment's brand owns, from its key (ybs-header -> 'ybs-')"""
+    return f"{os.path.basename(fragment_dir.rstrip('/')).split('-', 1)[0]}-"
+
+
+def _read(path):
+    if not path or not os.path.exists(path):
+        return ''
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def brand_sources(base_dir='.'):
+    """
+    {brand: {'global_css': [...], 'global_js': [...], 'fragments': [fragment_dir, ...]}}
+
+    Uses the same brand discovery as the builders.
+    """
+    from build_collections import discover_targets, collection_brand
+
+    brands = {}
+    for target in discover_targets(base_dir):
+        sources = brands.setdefault(target['brand'], {'global_css': [], 'global_js': [], 'fragments': []})
+        if target['kind'] == 'client-extension':
+            sources['global_css'] += sorted(glob.glob(os.path.join(target['source'], 'assets', '*.css')))
+            sources['global_js'] += sorted(glob.glob(os.path.join(target['source'], 'assets', '*.js')))
+        else:
+            sources['fragments'] += sorted(
+                os.path.join(target['source'], name) for name in os.listdir(target['source'])
+                if os.path.exists(os.path.join(target['source'], name, 'fragment.json')))
+    return brands
+
+
+def brand_matchers(sources, read=None):
+    """
+    Stylesheet path -> the fragment matchers it applies to, for one brand
+
+    global.css applies to every fragment, a fragment's index.css to that
+    fragment. read(path) returns a source's text (default: from disk).
+    """
+    read = read or _read
+    global_scripts = [read(path) for path in sources['global_js']]
+    stylesheets = {path: [] for path in sources['global_css']}
+    for fragment_dir in sources['fragments']:
+        scripts = [read(os.path.join(fragment_dir, 'index.js'))] + global_scripts
+        matcher = fragment_matcher(read(os.path.join(fragment_dir, 'index.html')), scripts, brand_prefix(fragment_dir))
+        for path in sources['global_css']:
+            stylesheets[path].append(matcher)
+        stylesheets[os.path.join(fragment_dir, 'index.css')] = [matcher]
+    return stylesheets
+
+
+def brand_animations(stylesheets, read=None):
+    """Keyframe names used anywhere in a brand's stylesheets or scripts"""
+    read = read or _read
+    words = set().union(*(m.words for matchers in stylesheets.values() for m in matchers))
+    return referenced_animations([read(path) for path in stylesheets], words)
+
+
+def analyze_brand(sources):
+    """Usage, removable bytes, pruned CSS and duplicates for one brand's stylesheets"""
+    stylesheets = {path: matchers for path, matchers in brand_matchers(sources).items() if os.path.exists(path)}
+    texts = {path: _read(path) for path in stylesheets}
+    animations = brand_animations(stylesheets)
+
+    report = {'stylesheets': [], 'duplicates': []}
+    parsed = {}
+    for path, sheet_matchers in stylesheets.items():
+        nodes = parse_css(texts[path])
+        parsed[path] = nodes
+        selectors = [s for _, node in rule_signatures(nodes) for s in _split_top_level(node.prelude, ',')]
+        runtime = sum(1 for s in selectors if selector_usage(s, sheet_matchers) == 'runtime')
+        pruned, removed = prune_css(texts[path], sheet_matchers, animations)
+        report['stylesheets'].append({
+            'path': path,
+            'global': path in sources['global_css'],
+            'selectors': len(selectors),
+            'runtime_selectors': runtime,
+            'bytes': _size(nodes),
+            'removable_bytes': sum(r['bytes'] for r in removed),
+            'pruned_bytes': len(minify_css(pruned).encode('utf-8')),
+            'unused': removed,
+            'pruned_css': pruned,
+        })
+    report['duplicates'] = find_duplicates(parsed, global_sheets=set(sources['global_css']))
+    return report
+
+
+class PruneCSSStage(BuildStage):
+    """
+    Build stage that drops CSS rules no fragment markup can match
+
+    A fragment's index.css is pruned against its own markup and scripts, and
+    a client extension's stylesheets against every fragment of its brand.
+    Duplicated rules are only reported (by unused_css.py), never removed.
+    """
+
+    name = 'prune-css'
+    version = 1
+
+    def __init__(self, base_dir='.', **kwargs):
+        super().__init__(**kwargs)
+        self.base_dir = base_dir
+        self._brands = None
+        self._seen = set()
+
+    def _brand_of(self, source_path):
+        """(brand, sources) for a stylesheet in a fragment or client extension, or (None, None)"""
+        if self._brands is None:
+            self._brands = brand_sources(self.base_dir)
+        source_path = os.path.normpath(source_path)
+        for brand, sources in self._brands.items():
+            stylesheets = [os.path.normpath(p) for p in sources['global_css']]
+            stylesheets += [os.path.normpath(os.path.join(d, 'index.css')) for d in sources['fragments']]
+            if source_path in stylesheets:
+                return brand, sources
+        return None, None
+
+    @staticmethod
+    def _brand_inputs(sources):
+        paths = list(sources['global_css']) + list(sources['global_js'])
+        for fragment_dir in sources['fragments']:
+            paths += [os.path.join(fragment_dir, name) for name in ('index.html', 'index.js', 'index.css')]
+        return [path for path in paths if os.path.exists(path)]
+
+    def _produce(self, source_path, sources, paths, inputs):
+        texts = {os.path.normpath(path): data.decode('utf-8') for path, data in zip(paths, inputs)}
+        css = texts.pop('\0stylesheet')
+        read = lambda path: texts.get(os.path.normpath(path), '')
+        stylesheets = brand_matchers(sources, read)
+        matchers = next(m for path, m in stylesheets.items() if os.path.normpath(path) == source_path)
+        pruned, removed = prune_css(css, matchers, brand_animations(stylesheets, read))
+        return [pruned.encode('utf-8') if removed else None] + [None] * len(texts)
+
+    def process(self, entries):
+        output = []
+        for file_path, archive_path in entries:
+            source_path = os.path.normpath(origin(file_path))
+            brand, sources = self._brand_of(source_path) if archive_path.endswith('.css') else (None, None)
+            if brand is None:
+                output.append((file_path, archive_path))
+                continue
+
+            # The stylesheet itself may come from an earlier stage; the markup always comes from source
+            brand_inputs = self._brand_inputs(sources)
+            paths = [file_path] + brand_inputs
+            suffixes = [f"-{os.path.basename(archive_path)}"] + [f"-input{i}" for i in range(len(brand_inputs))]
+            names = ['\0stylesheet'] + brand_inputs
+            outputs, hit = self.cached_outputs(
+                paths, suffixes, lambda inputs: self._produce(source_path, sources, names, inputs))
+            output.append((outputs[0], archive_path))
+
+            if outputs[0] != file_path and source_path not in self._seen:
+                self._seen.add(source_path)
+                self.record(file_path, os.path.getsize(file_path), os.path.getsize(outputs[0]),
+                            'cached' if hit else '')
+        return output
+
+
+def print_brand_report(brand, report, verbose=False):
+    sheets = report['stylesheets']
+    unused = sum(r['removable_bytes'] for r in sheets)
+    duplicated = sum(d['removable_bytes'] for d in report['duplicates'])
+    print(f"\n🧹 {brand}: {len(sheets)} stylesheets, {unused:,} bytes unused, "
+          f"{duplicated:,} bytes duplicated (minified)")
+    print(f"  {'selectors':>9} {'unused':>7} {'runtime':>7} {'bytes':>8} {'removable':>9}  stylesheet")
+    for sheet in sheets:
+        print(f"  {sheet['selectors']:>9,} {len(sheet['unused']):>7,} {sheet['runtime_selectors']:>7,} "
+              f"{sheet['bytes']:>8,} {sheet['removable_bytes']:>9,}  {sheet['path']}")
+        if verbose:
+            for removed in sheet['unused']:
+                context = f"  (in {removed['context']})" if removed['context'] else ''
+                print(f"      - {removed['selector']}{context}  {removed['bytes']:,} B")
+    if report['duplicates']:
+        removable = [d for d in report['duplicates'] if d['removable_bytes']]
+        print(f"  Duplicated rules: {len(report['duplicates'])} ({len(removable)} removable)")
+        for duplicate in report['duplicates'] if verbose else removable[:10]:
+            sheets_list = ', '.join(sorted({os.path.relpath(s) for s in duplicate['stylesheets']}))
+            print(f"      = {duplicate['selector']}  {duplicate['bytes']:,} B × {len(duplicate['stylesheets'])}"
+                  f"  [{sheets_list}]")
+
+
+def main(argv=None):
+    """Report unused and duplicated CSS for every brand"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--only', nargs='+', metavar='BRAND', help='Only analyze these brands (e.g. ybs jm)')
+    parser.add_argument('--verbose', action='store_true', help='List every unused selector and duplicated rule')
+    parser.add_argument('--json', metavar='PATH', help="Write the report as JSON to PATH, or '-' for stdout")
+    parser.add_argument('--write-pruned', metavar='DIR',
+                        help='Write pruned copies of every stylesheet under DIR, mirroring the source tree')
+    args = parser.parse_args(argv)
+
+    brands = brand_sources()
+    reports = {brand: analyze_brand(sources) for brand, sources in sorted(brands.items())
+               if not args.only or brand in args.only}
+
+    if args.write_pruned:
+        for report in reports.values():
+            for sheet in report['stylesheets']:
+                output_path = os.path.join(args.write_pruned, os.path.relpath(sheet['path']))
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    f.write(sheet['pruned_css'])
+
+    if args.json:
+        data = {brand: {'stylesheets': [{k: v for k, v in sheet.items() if k != 'pruned_css'}
+                                        for sheet in report['stylesheets']],
+                        'duplicates': report['duplicates']}
+                for brand, report in reports.items()}
+        text = json.dumps(data, indent=2)
+        if args.json == '-':
+            print(text)
+            return True
+        with open(args.json, 'w') as f:
+            f.write(text + '\n')
+
+    for brand, report in reports.items():
+        print_brand_report(brand, report, args.verbose)
+    total = sum(s['removable_bytes'] for r in reports.values() for s in r['stylesheets'])
+    total += sum(d['removable_bytes'] for r in reports.values() for d in r['duplicates'])
+    print(f"\n{'✓ No unused CSS found' if not total else f'Removable: {total:,} bytes minified'}")
+    if args.write_pruned:
+        print(f"📦 Pruned stylesheets written to {args.write_pruned}/")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Store-vs-deflate compression policy for Liferay ZIP packaging
+Already-compressed formats are stored as-is; text is deflated at a configurable level
+"""
+
+import os
+import time
+import zlib
+import zipfile
+
+# Formats that are already compressed, where deflate burns CPU for ~no gain
+STORED_EXTENSIONS = frozenset({
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.ico',
+    '.woff', '.woff2', '.mp4', '.webm', '.mp3',
+    '.zip', '.gz', '.br', '.pdf',
+})
+
+DEFAULT_COMPRESSION_LEVEL = 6
+
+
+class CompressionPolicy:
+    """
+    Decide per entry whether to store or deflate, and at which level
+
+    With measure=True every entry is also compressed the other way, so the
+    report can show what each policy actually saved. With reproducible=True
+    entries are sorted and written with fixed metadata (see zip_reproducible).
+    """
+
+    def __init__(self, level=DEFAULT_COMPRESSION_LEVEL, stored_extensions=STORED_EXTENSIONS, measure=False,
+                 reproducible=False):
+        if not 0 <= level <= 9:
+            raise ValueError(f"Compression level must be between 0 and 9, got {level}")
+        self.level = level
+        self.stored_extensions = frozenset(ext.lower() for ext in stored_extensions)
+        self.measure = measure
+        self.reproducible = reproducible
+
+    def compress_type(self, archive_path):
+        """Return the zipfile compression constant for an entry"""
+        extension = os.path.splitext(archive_path)[1].lower()
+        if extension in self.stored_extensions or self.level == 0:
+            return zipfile.ZIP_STORED
+        return zipfile.ZIP_DEFLATED
+
+    def fingerprint(self):
+        """Stable description of the policy, recorded in the build manifest"""
+        fingerprint = f"deflate-{self.level}:store-{','.join(sorted(self.stored_extensions))}"
+        return f"{fingerprint}:reproducible" if self.reproducible else fingerprint
+
+
+class PolicyStats:
+    """
+    Per-policy counters: files, bytes in/out and seconds spent compressing
+
+    When the policy measures, 'alt_bytes' and 'alt_seconds' hold what the
+    other choice would have produced and cost for the same entries.
+    """
+
+    POLICIES = ('stored', 'deflated')
+
+    def __init__(self):
+        self.policies = {
+            name: {'files': 0, 'bytes_in': 0, 'bytes_out': 0, 'seconds': 0.0,
+                   'alt_bytes': 0, 'alt_seconds': 0.0, 'measured': 0}
+            for name in self.POLICIES
+        }
+
+    def add(self, policy_name, bytes_in, bytes_out, seconds, alt_bytes=None, alt_seconds=None):
+        counters = self.policies[policy_name]
+        counters['files'] += 1
+        counters['bytes_in'] += bytes_in
+        counters['bytes_out'] += bytes_out
+        counters['seconds'] += seconds
+        if alt_bytes is not None:
+            counters['alt_bytes'] += alt_bytes
+            counters['alt_seconds'] += alt_seconds
+            counters['measured'] += 1
+
+    def merge(self, other):
+        """Add counters from another PolicyStats or its to_dict() output"""
+        policies = other.policies if isinstance(other, PolicyStats) else other
+        for name, counters in policies.items():
+            for key, value in counters.items():
+                self.policies[name][key] += value
+
+    def to_dict(self):
+        return {name: dict(counters) for name, counters in self.policies.items()}
+
+    def print_report(self, policy):
+        """Print how much time and how many bytes each policy saved"""
+        print(f"\nCompression policy (deflate level {policy.level}):")
+        for name in self.POLICIES:
+            c = self.policies[name]
+            if not c['files']:
+                continue
+            line = (f"  {name:<9} {c['files']:>4} files  {c['bytes_in']:>12,} → {c['bytes_out']:>12,} bytes"
+                    f"  {c['seconds']:6.2f}s")
+            if name == 'deflated':
+                line += f"  saved {c['bytes_in'] - c['bytes_out']:,} bytes"
+            if c['measured']:
+                if name == 'stored':
+                    line += (f"  (deflate would save {c['bytes_out'] - c['alt_bytes']:,} bytes"
+                             f" for {c['alt_seconds']:.2f}s more CPU)")
+                else:
+                    line += f"  (storing would save {c['seconds'] - c['alt_seconds']:.2f}s)"
+            print(line)
+        if not policy.measure:
+            print("  Run with --measure-policy to compare against the alternative policy")
+
+
+def deflate_raw(data, level):
+    """Raw deflate stream, exactly as zipfile writes ZIP_DEFLATED entries"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_with_policy(data, archive_path, policy, stats=None):
+    """
+    Compress one entry's bytes using the policy's choice
+
+    Returns (compress_type, compressed_bytes) and adds timings to stats.
+    """
+    compress_type = policy.compress_type(archive_path)
+    started = time.perf_counter()
+    if compress_type == zipfile.ZIP_STORED:
+        compressed = data
+    else:
+        compressed = deflate_raw(data, policy.level)
+    elapsed = time.perf_counter() - started
+
+    if stats is not None:
+        alt_bytes = alt_seconds = None
+        if policy.measure:
+            started = time.perf_counter()
+            if compress_type == zipfile.ZIP_STORED:
+                alt_bytes = len(deflate_raw(data, policy.level or DEFAULT_COMPRESSION_LEVEL))
+            else:
+                alt_bytes = len(data)
+            alt_seconds = time.perf_counter() - started
+        name = 'stored' if compress_type == zipfile.ZIP_STORED else 'deflated'
+        stats.add(name, len(data), len(compressed), elapsed, alt_bytes, alt_seconds)
+
+    return compress_type, compressed
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Reproducible ZIP entries for cache-friendly deploys
+Identical sources give byte-identical archives: entries are written in
+archive-path order with a fixed timestamp and normalized permissions, so
+nothing from the build machine (mtimes, umask, walk order) reaches the output
+
+SOURCE_DATE_EPOCH, when set, replaces the default 1980-01-01 timestamp.
+"""
+
+import os
+import stat
+import time
+import zipfile
+
+# Earliest date a ZIP entry can hold
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+FILE_MODE = 0o644
+EXECUTABLE_MODE = 0o755
+UNIX_SYSTEM = 3
+
+
+def fixed_date_time():
+    """The timestamp every reproducible entry gets"""
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    if not epoch:
+        return ZIP_EPOCH
+    return max(tuple(time.gmtime(int(epoch))[:6]), ZIP_EPOCH)
+
+
+def sorted_entries(entries):
+    """(file_path, archive_path) entries in archive-path order"""
+    return sorted(entries, key=lambda entry: entry[1].replace(os.sep, '/'))
+
+
+def normalize_zipinfo(zinfo, date_time=None):
+    """
+    Strip build-machine metadata from a ZipInfo in place
+
+    Permissions become 644 (755 if any execute bit was set, as git tracks
+    them) and the entry is marked as created on Unix, whatever the host.
+    """
+    executable = (zinfo.external_attr >> 16) & 0o111
+    zinfo.date_time = date_time or fixed_date_time()
+    zinfo.create_system = UNIX_SYSTEM
+    zinfo.external_attr = (stat.S_IFREG | (EXECUTABLE_MODE if executable else FILE_MODE)) << 16
+    return zinfo
+
+
+def entry_info(file_path, archive_path, reproducible=False):
+    """ZipInfo for a file, normalized when building reproducibly"""
+    zinfo = zipfile.ZipInfo.from_file(file_path, archive_path)
+    return normalize_zipinfo(zinfo) if reproducible else zinfo
+
+
+def print_digests(digests):
+    """Print artifact digests in sha256sum format, so a deploy step can compare them"""
+    print("\nArtifact digests (sha256):")
+    for output_path, digest in sorted(digests.items()):
+        print(f"{digest}  {output_path}")
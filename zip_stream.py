@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Streaming Liferay ZIP writer with bounded memory
+Reads every input and writes the output in fixed-size chunks, so peak memory
+stays flat regardless of collection size and the ZIP can go straight to a pipe
+
+Usage:
+    python3 zip_stream.py fragment-collection/ybs-collection --archive-root ybs-collection -o - | upload-tool
+"""
+
+import os
+import sys
+import time
+import zlib
+import zipfile
+import argparse
+
+from zip_policy import CompressionPolicy, DEFAULT_COMPRESSION_LEVEL
+from zip_reproducible import entry_info, sorted_entries
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class ChunkedWriter:
+    """
+    Binary writer that forwards data to a raw stream in fixed-size chunks
+
+    Only the final chunk written by close() may be shorter. There is no seek(),
+    so zipfile switches to data descriptors and never rewinds the output.
+    """
+
+    def __init__(self, raw, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.raw = raw
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+        self.position = 0
+        self.chunks = 0
+
+    def write(self, data):
+        self.buffer += data
+        self.position += len(data)
+        while len(self.buffer) >= self.chunk_size:
+            self.raw.write(self.buffer[:self.chunk_size])
+            del self.buffer[:self.chunk_size]
+            self.chunks += 1
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        # Partial chunks are held back until close() to keep chunk sizes fixed
+        self.raw.flush()
+
+    def close(self):
+        if self.buffer:
+            self.raw.write(bytes(self.buffer))
+            self.buffer.clear()
+            self.chunks += 1
+        self.raw.flush()
+
+
+def _read_chunks(file_path, chunk_size):
+    with open(file_path, 'rb') as f:
+        yield from iter(lambda: f.read(chunk_size), b'')
+
+
+def _payload_chunks(file_path, compress_type, level, chunk_size):
+    """An entry's data as it is written into the ZIP, in chunks"""
+    if compress_type == zipfile.ZIP_STORED:
+        yield from _read_chunks(file_path, chunk_size)
+        return
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    for chunk in _read_chunks(file_path, chunk_size):
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _measure_payload(file_path, compress_type, level, chunk_size):
+    """CRC-32, size and compressed size of a file, read in chunks"""
+    crc = size = compress_size = 0
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15) if compress_type == zipfile.ZIP_DEFLATED else None
+    for chunk in _read_chunks(file_path, chunk_size):
+        crc = zlib.crc32(chunk, crc)
+        size += len(chunk)
+        if compressor is not None:
+            compress_size += len(compressor.compress(chunk))
+    compress_size = compress_size + len(compressor.flush()) if compressor is not None else size
+    return crc, size, compress_size
+
+
+def write_streamed_entry(zipf, file_path, archive_path, policy, stats=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Write one file into an open ZipFile without holding it in memory
+
+    Deflated entries go through zipfile's own chunked writer. Stored entries
+    get their CRC from a first chunked pass and are written with sizes in the
+    local header, since many readers cannot stream stored entries that rely
+    on a trailing data descriptor. Reproducible builds take that two-pass
+    route for deflated entries too, so an entry's bytes never depend on
+    whether the output could seek or on data descriptors.
+    """
+    compress_type = policy.compress_type(archive_path)
+    started = time.perf_counter()
+
+    if compress_type == zipfile.ZIP_DEFLATED and not policy.reproducible:
+        zipf.write(file_path, archive_path, compress_type=compress_type, compresslevel=policy.level)
+        zinfo = zipf.NameToInfo[archive_path]
+    else:
+        zinfo = entry_info(file_path, archive_path, policy.reproducible)
+        zinfo.compress_type = compress_type
+        zinfo.CRC, zinfo.file_size, zinfo.compress_size = _measure_payload(file_path, compress_type, policy.level,
+                                                                           chunk_size)
+        zinfo.header_offset = zipf.fp.tell()
+        zipf.fp.write(zinfo.FileHeader())
+        for chunk in _payload_chunks(file_path, compress_type, policy.level, chunk_size):
+            zipf.fp.write(chunk)
+        zipf.filelist.append(zinfo)
+        zipf.NameToInfo[archive_path] = zinfo
+        zipf.start_dir = zipf.fp.tell()
+
+    if stats is not None:
+        name = 'stored' if compress_type == zipfile.ZIP_STORED else 'deflated'
+        stats.add(name, zinfo.file_size, zinfo.compress_size, time.perf_counter() - started)
+
+
+def stream_zip(entries, output, policy=None, stats=None, chunk_size=DEFAULT_CHUNK_SIZE, progress_every=0):
+    """
+    Stream (file_path, archive_path) entries as a ZIP to a binary file object
+
+    Returns the number of bytes written. With progress_every=N a line is
+    printed to stderr every N entries instead of one per file.
+    """
+    policy = policy or CompressionPolicy()
+    if policy.reproducible:
+        entries = sorted_entries(entries)
+    writer = ChunkedWriter(output, chunk_size)
+    with zipfile.ZipFile(writer, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for count, (file_path, archive_path) in enumerate(entries, 1):
+            write_streamed_entry(zipf, file_path, archive_path, policy, stats, chunk_size)
+            if progress_every and count % progress_every == 0:
+                print(f"  Streamed {count} entries ({writer.tell():,} bytes)", file=sys.stderr)
+    writer.close()
+    return writer.tell()
+
+
+def main(argv=None):
+    """Stream a directory as a ZIP to a file or stdout"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('source_dir', help='Directory to package')
+    parser.add_argument('-o', '--output', default='-', help="Output ZIP path, or '-' for stdout (default)")
+    parser.add_argument('--archive-root', help='Wrap entries in this root directory (collection name)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'Output chunk size in bytes (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--compression-level', type=int, default=DEFAULT_COMPRESSION_LEVEL,
+                        help=f'Deflate level 0-9 for text entries (default: {DEFAULT_COMPRESSION_LEVEL})')
+    parser.add_argument('--progress-every', type=int, default=0, metavar='N',
+                        help='Print progress to stderr every N entries')
+    parser.add_argument('--reproducible', action='store_true',
+                        help='Sorted entries, fixed timestamps and permissions: identical sources, identical bytes')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.source_dir):
+        print(f"❌ Source directory not found: {args.source_dir}", file=sys.stderr)
+        return False
+
+    # Imported here: build_collections imports this module via build_manifest
+    from build_collections import collect_directory_entries
+
+    policy = CompressionPolicy(level=args.compression_level, reproducible=args.reproducible)
+    entries = collect_directory_entries(args.source_dir, archive_root=args.archive_root)
+    if args.output == '-':
+        written = stream_zip(entries, sys.stdout.buffer, policy, chunk_size=args.chunk_size,
+                             progress_every=args.progress_every)
+    else:
+        with open(args.output, 'wb') as output:
+            written = stream_zip(entries, output, policy, chunk_size=args.chunk_size,
+                                 progress_every=args.progress_every)
+    print(f"✓ Streamed {written:,} bytes to {args.output}", file=sys.stderr)
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)